@@ -0,0 +1,123 @@
+import math
+from datetime import timedelta, timezone
+
+from app.spatial import bbox_contains
+
+# 예상혼잡도는 프론트엔드와 같이 한국 시각 기준으로 계산
+KST = timezone(timedelta(hours=9))
+
+# 지도 타일(256px) 한 장의 가로를 몇 칸으로 나눠 묶을지 (칸 하나가 약 64px)
+CLUSTER_CELLS_PER_TILE = 4
+
+# 예상혼잡도 (예상이용객수 / 전체 충전기대수)가 이 값 이상이면 혼잡 예상
+CROWDED_BUSY_RATE = 0.75
+
+MIN_ZOOM = 0
+MAX_ZOOM = 21
+
+
+def _js_round(value):
+    """JavaScript Math.round와 같은 반올림"""
+    return math.floor(value + 0.5)
+
+
+def predict_1hour_visit_num(station, hour_now, departs_num):
+    """1시간내 예상이용객수 계산 (프론트엔드 predict1HourVisitNum과 동일)"""
+    info = station.info
+    vn_arr = station.hourly_visit_num
+    param_c = 0
+    if len(vn_arr) == 24:
+        param_c = _js_round(((0 if hour_now == 0 else vn_arr[hour_now - 1]) + vn_arr[hour_now]) / 2)
+    return _js_round(
+        (info['usingChargers'] or 0) * 0.8 + departs_num * 0.8 + station.current_view_num * 0.33 + param_c * 0.5
+    )
+
+
+def predict_crowded(station, hour_now, now):
+    """충전소의 예상혼잡 여부 (True: 혼잡, False: 여유, None: 예측 불가)
+
+    StationMarker의 예상혼잡도 표시 규칙과 같다.
+    """
+    info = station.info
+    usable = info['usableChargers'] or 0
+    using = info['usingChargers'] or 0
+    if usable > 0:
+        total = info['totalChargers'] or 0
+        if total <= 0:
+            return None
+        departs_num = len(station.departs) - station.expired_departs(now)
+        return predict_1hour_visit_num(station, hour_now, departs_num) / total >= CROWDED_BUSY_RATE
+    if using > 0:
+        # 모두 사용중인 충전소는 혼잡 예상으로 처리
+        return True
+    return None
+
+
+def cell_size_deg(zoom):
+    """줌 레벨별 클러스터 격자 한 칸의 크기 (도)"""
+    return 360.0 / (2 ** zoom) / CLUSTER_CELLS_PER_TILE
+
+
+def build_clusters(stations, zoom, now):
+    """줌 레벨에 맞는 격자 단위로 충전소를 묶어 집계"""
+    cell = cell_size_deg(zoom)
+    hour_now = now.astimezone(KST).hour
+    groups = {}
+    for station in stations:
+        if station.lat is None or station.lng is None:
+            continue
+        key = (math.floor(station.lat / cell), math.floor(station.lng / cell))
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                "count": 0, "latSum": 0.0, "lngSum": 0.0,
+                "totalChargers": 0, "usableChargers": 0, "usingChargers": 0,
+                "predictedCrowded": 0, "predictedFree": 0, "firstStatId": station.stat_id
+            }
+        info = station.info
+        group["count"] += 1
+        group["latSum"] += station.lat
+        group["lngSum"] += station.lng
+        group["totalChargers"] += info['totalChargers'] or 0
+        group["usableChargers"] += info['usableChargers'] or 0
+        group["usingChargers"] += info['usingChargers'] or 0
+        crowded = predict_crowded(station, hour_now, now)
+        if crowded is True:
+            group["predictedCrowded"] += 1
+        elif crowded is False:
+            group["predictedFree"] += 1
+
+    clusters = []
+    for group in groups.values():
+        count = group["count"]
+        clusters.append({
+            "lat": round(group["latSum"] / count, 6),
+            "lng": round(group["lngSum"] / count, 6),
+            "count": count,
+            "totalChargers": group["totalChargers"],
+            "usableChargers": group["usableChargers"],
+            "usingChargers": group["usingChargers"],
+            "predictedCrowded": group["predictedCrowded"],
+            "predictedFree": group["predictedFree"],
+            # 충전소가 하나뿐인 클러스터만 statId 포함
+            "statId": group["firstStatId"] if count == 1 else None
+        })
+    clusters.sort(key=lambda cluster: (-cluster["count"], cluster["lat"], cluster["lng"]))
+    return clusters
+
+
+def get_clusters(snapshot, zoom, now, bbox=None):
+    """스냅샷의 줌 레벨별 클러스터 (스냅샷/시각/만료된 출발 수/조회수 증감 기준으로 캐싱)
+
+    캐시 키는 응답 ETag(StationSnapshot.validators)와 같은 값으로 만든다.
+    """
+    key = ('clusters', zoom, now.astimezone(KST).hour, snapshot.expired_departs(now), snapshot.view_num_tag())
+    clusters = snapshot.derived.get(key)
+    if clusters is None:
+        # 같은 줌의 이전 캐시는 더 이상 쓰이지 않으므로 정리
+        for old_key in [k for k in snapshot.derived if k[0] == 'clusters' and k[1] == zoom]:
+            del snapshot.derived[old_key]
+        clusters = snapshot.derived[key] = build_clusters(snapshot.stations, zoom, now)
+    if bbox is None:
+        return clusters
+    return [cluster for cluster in clusters if bbox_contains(bbox, cluster["lat"], cluster["lng"])]
@@ -0,0 +1,158 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+from app.metrics import DB_BUCKETS, Histogram, registry
+
+# 지표 수집 대상 SingleFlight 목록
+_flights = []
+
+admission_wait_duration = registry.register(Histogram(
+    'request_admission_wait_seconds', 'DB 조회 요청이 실행 슬롯을 기다린 시간 (초)', ('limiter',), DB_BUCKETS))
+
+
+class OverloadedError(Exception):
+    """요청이 몰려 처리하지 않고 거절함 (503 + Retry-After로 응답)"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 작업을 한 번만 실행하고 결과를 함께 받음
+
+    결과는 보관하지 않는다. 실행 중인 작업이 끝나면 다음 요청은 새로 실행한다.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        # 지표용 (실제 실행 수, 실행 중인 작업의 결과를 함께 받은 요청 수)
+        self.executions = 0
+        self.shared = 0
+        _flights.append(self)
+
+    async def run(self, key, func, *args):
+        """key로 실행 중인 작업이 있으면 그 결과를, 없으면 func(*args)를 실행한 결과를 반환"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.executions += 1
+        else:
+            self.shared += 1
+        # 먼저 요청한 클라이언트가 연결을 끊어도 같은 결과를 기다리는 요청을 위해 작업은 계속 실행
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 기다리던 요청이 모두 취소된 경우에도 예외가 처리되지 않았다는 경고가 남지 않도록
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def in_flight(self):
+        return len(self._calls)
+
+
+class AdmissionLimiter:
+    """DB를 조회하는 요청의 동시 실행 수 제한과 대기 시간 기반 거절
+
+    동시에 max_concurrent개까지만 실행하고 나머지는 대기한다. 대기가 max_wait를 넘으면
+    거절하고, 그 뒤 shed_window 동안은 빈 슬롯이 없으면 기다리지 않고 바로 거절한다.
+    DB가 포화됐을 때 요청마다 커넥션 대기 시간 초과까지 기다리는 대신 빠르게 503으로 응답한다.
+    """
+
+    def __init__(self, name, max_concurrent=8, max_queue=64, max_wait=0.5, shed_window=1.0, retry_after=1):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.shed_window = shed_window
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._shed_until = 0.0
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = {'queue_full': 0, 'wait_timeout': 0, 'shedding': 0}
+
+    def _reject(self, reason, message):
+        self.rejected[reason] += 1
+        return OverloadedError(message, self.retry_after)
+
+    @asynccontextmanager
+    async def slot(self):
+        """실행 슬롯을 얻어 블록을 실행 (얻지 못하면 OverloadedError)"""
+        if self._semaphore.locked():
+            if time.monotonic() < self._shed_until:
+                raise self._reject('shedding', "요청이 많아 잠시 후 다시 시도해 주세요")
+            if self.waiting >= self.max_queue:
+                raise self._reject('queue_full', "요청 대기열이 가득 찼습니다")
+
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            self._shed_until = time.monotonic() + self.shed_window
+            raise self._reject('wait_timeout', f"{self.max_wait}초 안에 처리를 시작하지 못했습니다") from None
+        finally:
+            self.waiting -= 1
+        admission_wait_duration.observe(self.name, value=time.monotonic() - started)
+
+        self.admitted += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        return {
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "maxConcurrent": self.max_concurrent,
+            "shedding": time.monotonic() < self._shed_until,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected)
+        }
+
+
+# 충전소 상세/간략정보, 변경분 조회 (같은 조건의 동시 조회는 DB 쿼리 1회로)
+station_flight = SingleFlight('station_query')
+
+# 요청 처리 중 DB를 조회하는 작업의 동시 실행 제한 (DB 커넥션 풀 크기보다 작게)
+station_admission = AdmissionLimiter(
+    'station_query',
+    max_concurrent=int(os.getenv('STATION_QUERY_CONCURRENCY', '8')),
+    max_queue=int(os.getenv('STATION_QUERY_MAX_QUEUE', '64')),
+    max_wait=int(os.getenv('STATION_QUERY_MAX_WAIT_MS', '500')) / 1000,
+    shed_window=int(os.getenv('STATION_QUERY_SHED_WINDOW_MS', '1000')) / 1000,
+    retry_after=int(os.getenv('OVERLOAD_RETRY_AFTER', '1')),
+)
+
+
+def _metrics():
+    """요청 묶음 실행 / 동시 실행 제한 지표"""
+    limiter = station_admission
+    return [
+        ('singleflight_executions_total', 'counter', '묶음 실행에서 실제로 실행한 작업 수',
+         {(('flight', flight.name),): flight.executions for flight in _flights}),
+        ('singleflight_shared_total', 'counter', '실행 중인 같은 작업의 결과를 함께 받은 요청 수',
+         {(('flight', flight.name),): flight.shared for flight in _flights}),
+        ('request_admission_in_flight', 'gauge', '실행 슬롯을 얻어 처리 중인 요청 수',
+         {(('limiter', limiter.name),): limiter.in_flight}),
+        ('request_admission_waiting', 'gauge', '실행 슬롯을 기다리는 요청 수',
+         {(('limiter', limiter.name),): limiter.waiting}),
+        ('request_admission_rejected_total', 'counter', '과부하로 거절한 요청 수 (이유별)',
+         {(('limiter', limiter.name), ('reason', reason)): count for reason, count in limiter.rejected.items()}),
+    ]
+
+
+registry.add_collector(_metrics)
@@ -0,0 +1,72 @@
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts):
+    """버전 구성 요소들로 강한 ETag 생성"""
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(if_none_match, etag):
+    """If-None-Match 헤더에 etag가 포함되는지 확인 (약한 비교)"""
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _not_modified_since(if_modified_since, last_modified):
+    """If-Modified-Since 이후로 변경이 없는지 확인"""
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since is None:
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP 날짜는 초 단위이므로 비교 전에 버림
+    return last_modified.replace(microsecond=0) <= since
+
+
+def validator_headers(etag, last_modified=None):
+    """응답에 붙일 캐시 검증 헤더"""
+    headers = {
+        'ETag': etag,
+        # 브라우저가 저장은 하되 매번 서버에 재검증하도록
+        'Cache-Control': 'no-cache',
+    }
+    if last_modified is not None:
+        headers['Last-Modified'] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag, last_modified=None):
+    """조건부 요청 헤더 기준으로 클라이언트 사본이 최신인지 판단
+
+    If-None-Match가 있으면 그것만 보고, 없을 때만 If-Modified-Since를 본다.
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is not None:
+        return _not_modified_since(if_modified_since, last_modified)
+    return False
+
+
+def not_modified_response(etag, last_modified=None):
+    """304 Not Modified 응답"""
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import time
+
+from app.db import execute_query, get_pool, note_write_seq
+from app.metrics import registry
+from app.snapshot import set_view_num_source, station_cache
+
+# 충전소별 조회수 증감을 한 번에 반영 (증가분은 UPSERT, 감소분은 기존 행만 UPDATE)
+FLUSH_VIEW_NUM_QUERY = """
+    WITH deltas AS (
+        SELECT * FROM unnest(%s::varchar[], %s::integer[]) AS d(stat_id, delta)
+    ),
+    increased AS (
+        INSERT INTO demand_info (stat_id, view_num)
+        SELECT stat_id, delta FROM deltas WHERE delta > 0
+        ON CONFLICT (stat_id)
+        DO UPDATE SET
+            view_num = GREATEST(demand_info.view_num + EXCLUDED.view_num, 0),
+            updated_at = CURRENT_TIMESTAMP
+        RETURNING stat_id
+    ),
+    decreased AS (
+        UPDATE demand_info di
+        SET view_num = GREATEST(di.view_num + d.delta, 0),
+            updated_at = CURRENT_TIMESTAMP
+        FROM deltas d
+        WHERE di.stat_id = d.stat_id AND d.delta < 0
+        RETURNING di.stat_id
+    )
+    INSERT INTO station_changes (stat_id, change_type)
+    SELECT stat_id, 'demand' FROM increased
+    UNION ALL
+    SELECT stat_id, 'demand' FROM decreased
+    RETURNING stat_id
+"""
+
+
+class ViewNumAggregator:
+    """조회수 증감 모아서 쓰기
+
+    요청마다 demand_info를 갱신하지 않고 충전소별 증감을 메모리에 모았다가,
+    일정 시간 또는 일정 횟수마다 한 번의 쿼리로 반영한다. 아직 스냅샷에 반영되지 않은
+    증감은 조회 응답에 더해서 보여준다.
+    """
+
+    def __init__(self, flush_interval=0.5, flush_max_events=100):
+        self.flush_interval = flush_interval
+        self.flush_max_events = flush_max_events
+        self._pending = {}
+        self._pending_events = 0
+        # DB에 쓰는 중이거나 썼지만 아직 스냅샷에 반영되지 않은 묶음: [완료 시각, 증감]
+        self._batches = []
+        self._wake = None
+        self._task = None
+        self._stopping = False
+        self._flush_lock = asyncio.Lock()
+
+    def start(self):
+        """백그라운드 반영 작업 시작"""
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def add(self, stat_id, delta):
+        """조회수 증감 기록"""
+        self._pending[stat_id] = self._pending.get(stat_id, 0) + delta
+        self._pending_events += 1
+        if self._pending_events >= self.flush_max_events and self._wake is not None:
+            self._wake.set()
+
+    def delta_for(self, stat_id, read_started_at):
+        """read_started_at 시점에 시작한 조회에 반영되지 않은 조회수 증감"""
+        delta = self._pending.get(stat_id, 0)
+        for completed_at, deltas in self._batches:
+            if completed_at is None or completed_at > read_started_at:
+                delta += deltas.get(stat_id, 0)
+        return delta
+
+    def deltas_for(self, read_started_at):
+        """read_started_at 시점에 시작한 조회에 반영되지 않은 충전소별 조회수 증감 (0은 제외)"""
+        deltas = dict(self._pending)
+        for completed_at, batch in self._batches:
+            if completed_at is None or completed_at > read_started_at:
+                for stat_id, delta in batch.items():
+                    deltas[stat_id] = deltas.get(stat_id, 0) + delta
+        return {stat_id: delta for stat_id, delta in deltas.items() if delta}
+
+    def on_snapshot(self, previous, current):
+        """스냅샷 교체 콜백: 새 스냅샷에 반영된 묶음 정리"""
+        self._batches = [
+            batch for batch in self._batches
+            if batch[0] is None or batch[0] > current.loaded_at
+        ]
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    @staticmethod
+    def _write(deltas):
+        """증감 반영 쿼리 실행 후 (결과, 커밋 직후 시각) 반환 (DB 스레드에서 실행)"""
+        stat_ids = list(deltas)
+        result = execute_query(FLUSH_VIEW_NUM_QUERY, (stat_ids, [deltas[s] for s in stat_ids]), name='flush_view_num')
+        # 이후 읽기가 이 변경을 반영하지 않은 레플리카로 가지 않도록
+        note_write_seq(result)
+        return result, time.monotonic()
+
+    async def flush(self):
+        """모아 둔 증감을 DB에 반영"""
+        async with self._flush_lock:
+            deltas = {stat_id: delta for stat_id, delta in self._pending.items() if delta}
+            self._pending = {}
+            self._pending_events = 0
+            if not deltas:
+                return True
+
+            batch = [None, deltas]
+            self._batches.append(batch)
+            result, completed_at = await get_pool().run(self._write, deltas)
+
+            if result is None:
+                # 실패한 증감은 다음 반영 때 다시 시도
+                self._batches.remove(batch)
+                for stat_id, delta in deltas.items():
+                    self._pending[stat_id] = self._pending.get(stat_id, 0) + delta
+                print(f"조회수 반영 실패 ({len(deltas)}개 충전소), 다음 주기에 재시도")
+                return False
+
+            batch[0] = completed_at
+            station_cache.mark_stale()
+            return True
+
+    def metrics(self):
+        """조회수 반영 대기 지표"""
+        return [
+            ('view_num_pending_stations', 'gauge', 'DB 반영을 기다리는 조회수 증감의 충전소 수', len(self._pending)),
+            ('view_num_pending_events', 'gauge', 'DB 반영을 기다리는 조회수 증감 요청 수', self._pending_events),
+        ]
+
+    async def close(self):
+        """반영 작업을 멈추고 남은 증감을 모두 반영"""
+        if self._task is not None:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+
+view_counter = ViewNumAggregator(
+    flush_interval=int(os.getenv('VIEW_NUM_FLUSH_INTERVAL_MS', '500')) / 1000,
+    flush_max_events=int(os.getenv('VIEW_NUM_FLUSH_MAX_EVENTS', '100')),
+)
+set_view_num_source(view_counter)
+station_cache.add_listener(view_counter.on_snapshot)
+registry.add_collector(view_counter.metrics)
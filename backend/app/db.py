@@ -0,0 +1,601 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache, partial
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2 import pool as pg_pool
+from psycopg2.extras import RealDictCursor
+
+from app.metrics import db_pool_acquire_duration, db_query_duration, db_query_errors_total, registry
+from app.profiler import query_profiler
+
+
+class PoolTimeoutError(Exception):
+    """커넥션 풀에서 제한 시간 내에 연결을 얻지 못한 경우"""
+
+
+def load_postgres_config():
+    """환경변수에서 PostgreSQL 연결 정보 읽기"""
+    return {
+        'host': os.getenv('POSTGRES_HOST'),
+        'database': os.getenv('POSTGRES_DB'),
+        'user': os.getenv('POSTGRES_USER'),
+        'password': os.getenv('POSTGRES_PASSWORD'),
+        'port': os.getenv('POSTGRES_PORT')
+    }
+
+
+def load_replica_config():
+    """환경변수에서 읽기 전용 레플리카 연결 정보 읽기 (POSTGRES_REPLICA_HOST가 없으면 None)
+
+    호스트 외의 항목을 지정하지 않으면 주 DB와 같은 값을 쓴다.
+    """
+    host = os.getenv('POSTGRES_REPLICA_HOST')
+    if not host:
+        return None
+    primary = load_postgres_config()
+    return {
+        'host': host,
+        'database': os.getenv('POSTGRES_REPLICA_DB') or primary['database'],
+        'user': os.getenv('POSTGRES_REPLICA_USER') or primary['user'],
+        'password': os.getenv('POSTGRES_REPLICA_PASSWORD') or primary['password'],
+        'port': os.getenv('POSTGRES_REPLICA_PORT') or primary['port']
+    }
+
+
+def load_pool_settings():
+    """환경변수에서 커넥션 풀 설정 읽기"""
+    max_size = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+    return {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+        'max_size': max_size,
+        # 반납된 연결을 닫지 않고 보관할 최대 개수
+        'max_idle': int(os.getenv('DB_POOL_MAX_IDLE', str(max_size))),
+        # 풀에서 연결을 기다리는 최대 시간 (초)
+        'acquire_timeout': float(os.getenv('DB_POOL_TIMEOUT', '5')),
+        # 새 연결을 맺을 때의 연결 타임아웃 (초)
+        'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+        # 쿼리 하나의 최대 실행 시간 (밀리초, 0이면 제한 없음)
+        'statement_timeout_ms': int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '10000')),
+    }
+
+
+@lru_cache(maxsize=256)
+def prepare_statement(query):
+    """쿼리 문자열을 정리하고 조회 쿼리 여부를 캐싱
+
+    매 호출마다 반복되던 strip/upper 처리를 쿼리 문자열당 한 번만 수행한다.
+    """
+    text = query.strip()
+    return text, text.upper().startswith('SELECT')
+
+
+class ConnectionPool:
+    """스레드 안전한 PostgreSQL 커넥션 풀
+
+    psycopg2의 ThreadedConnectionPool은 연결이 모두 사용 중이면 바로 예외를 던지므로,
+    세마포어로 동시 사용 개수를 제한하고 제한 시간 동안 대기하도록 감싼다.
+    동기 드라이버를 그대로 쓰되, 쿼리는 풀 크기만큼의 전용 스레드에서 실행해
+    이벤트 루프를 막지 않는다.
+    """
+
+    def __init__(self, config, min_size=1, max_size=10, acquire_timeout=5.0,
+                 connect_timeout=5, statement_timeout_ms=10000, max_idle=None, name='primary'):
+        self.config = dict(config)
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max(min_size, max_idle if max_idle is not None else max_size)
+        self.acquire_timeout = acquire_timeout
+
+        connect_kwargs = dict(self.config)
+        connect_kwargs['connect_timeout'] = connect_timeout
+        if statement_timeout_ms:
+            connect_kwargs['options'] = f'-c statement_timeout={statement_timeout_ms}'
+        self._connect_kwargs = connect_kwargs
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # psycopg2 풀은 반납된 연결을 minconn(min_size)개까지만 보관하고 나머지는 닫으므로,
+        # 그보다 많은 연결은 max_idle개까지 여기에 보관했다가 먼저 빌려준다
+        # (트래픽이 몰렸다 빠질 때마다, 헬스체크마다 새 연결을 맺지 않도록)
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.executor = ThreadPoolExecutor(max_workers=max_size, thread_name_prefix=f'db_{name}')
+
+        # 풀 통계
+        self._stats_lock = threading.Lock()
+        self._in_use = 0
+        self._waiting = 0
+        self._acquired_total = 0
+        self._timeouts_total = 0
+        self._errors_total = 0
+        self._acquire_time_total = 0.0
+        self._acquire_time_max = 0.0
+
+    def _get_pool(self):
+        """실제 psycopg2 풀은 첫 사용 시점에 생성"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = pg_pool.ThreadedConnectionPool(
+                        self.min_size, self.max_size, **self._connect_kwargs
+                    )
+        return self._pool
+
+    @contextmanager
+    def connection(self):
+        """풀에서 연결을 빌려오고 블록이 끝나면 반납"""
+        started = time.perf_counter()
+        with self._stats_lock:
+            self._waiting += 1
+        acquired = self._slots.acquire(timeout=self.acquire_timeout)
+        with self._stats_lock:
+            self._waiting -= 1
+            if not acquired:
+                self._timeouts_total += 1
+        if not acquired:
+            raise PoolTimeoutError(f"{self.acquire_timeout}초 내에 DB 연결을 얻지 못했습니다")
+
+        conn = None
+        try:
+            conn = self._take_idle() or self._get_pool().getconn()
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self._in_use += 1
+                self._acquired_total += 1
+                self._acquire_time_total += waited
+                self._acquire_time_max = max(self._acquire_time_max, waited)
+            db_pool_acquire_duration.observe(self.name, value=waited)
+        except Exception:
+            self._slots.release()
+            with self._stats_lock:
+                self._errors_total += 1
+            raise
+
+        try:
+            yield conn
+        finally:
+            # 트랜잭션이 남아 있거나 끊어진 연결은 정리 후 반납
+            broken = conn.closed != 0
+            if not broken:
+                try:
+                    if conn.status != extensions.STATUS_READY:
+                        conn.rollback()
+                except Exception:
+                    broken = True
+            self._release(conn, broken)
+            with self._stats_lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def _take_idle(self):
+        """직접 보관 중인 연결 하나 (없으면 None)"""
+        with self._pool_lock:
+            return self._idle.pop() if self._idle else None
+
+    def _release(self, conn, broken):
+        """연결 반납 (psycopg2 풀이 보관하는 min_size개를 넘는 연결은 max_idle개까지 직접 보관)"""
+        pool = self._get_pool()
+        if not broken:
+            with self._pool_lock:
+                if len(self._idle) < self.max_idle - self.min_size:
+                    self._idle.append(conn)
+                    return
+        pool.putconn(conn, close=broken)
+
+    def prewarm(self, count):
+        """연결 count개를 동시에 빌려 미리 열어 둠 (블로킹, 연 연결 수 반환)"""
+        count = min(count, self.max_idle)
+        with ExitStack() as stack:
+            for _ in range(count):
+                conn = stack.enter_context(self.connection())
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                conn.rollback()
+        return count
+
+    async def run(self, func, *args, **kwargs):
+        """블로킹 DB 작업을 DB 전용 스레드에서 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    def stats(self):
+        """풀 사용 현황"""
+        with self._stats_lock:
+            acquired = self._acquired_total
+            return {
+                'minSize': self.min_size,
+                'maxSize': self.max_size,
+                'maxIdle': self.max_idle,
+                'inUse': self._in_use,
+                'idle': len(self._idle) + (len(self._pool._pool) if self._pool is not None else 0),
+                'waiting': self._waiting,
+                'acquiredTotal': acquired,
+                'timeoutsTotal': self._timeouts_total,
+                'errorsTotal': self._errors_total,
+                'acquireTimeAvgMs': round(self._acquire_time_total / acquired * 1000, 3) if acquired else 0.0,
+                'acquireTimeMaxMs': round(self._acquire_time_max * 1000, 3),
+            }
+
+    def close(self):
+        """풀의 모든 연결과 실행 스레드 정리"""
+        self.executor.shutdown(wait=True)
+        if self._pool is not None:
+            # 직접 보관 중인 연결도 psycopg2 풀에는 사용 중으로 남아 있어 함께 닫힘
+            self._pool.closeall()
+            self._pool = None
+            self._idle = []
+
+
+_db_pool = None
+_replica_router = None
+
+# 레플리카에 반영된 변경 이력의 마지막 번호
+REPLICA_SEQ_QUERY = "SELECT COALESCE(MAX(seq), 0) FROM station_changes"
+
+# 주 DB에 커밋된 변경 이력의 마지막 번호 (쓰기 직후 레플리카 라우터에 알릴 값)
+WRITE_SEQ_QUERY = "SELECT COALESCE(MAX(seq), 0) as seq FROM station_changes"
+
+
+class ReplicaRouter:
+    """읽기 쿼리를 레플리카로 보낼지 결정
+
+    쓰기 작업(수집 Lambda, 조회수, 출발 시각)은 모두 같은 트랜잭션에서 station_changes에
+    기록되고 커밋할 때 발급받은 seq 순서대로 커밋되므로(마이그레이션 3), 레플리카의 마지막 seq가 요청이 기대하는 seq(스냅샷의 change_seq)보다 작으면
+    복제가 밀린 것으로 보고 주 DB에서 읽는다. 레플리카 연결이 실패하면 retry_interval 동안
+    주 DB만 사용한다.
+    """
+
+    def __init__(self, replica, primary, lag_check_interval=0.5, retry_interval=30.0):
+        self.replica = replica
+        self.primary = primary
+        self.lag_check_interval = lag_check_interval
+        self.retry_interval = retry_interval
+        # 레플리카에서 마지막으로 확인한 seq (복제는 앞으로만 진행하므로 이보다 작은 요구는 바로 통과)
+        self.replica_seq = 0
+        # 이 프로세스가 주 DB에 쓴 마지막 seq (자기가 쓴 내용은 항상 읽히도록 읽기 요구 seq의 하한)
+        self.write_seq = 0
+        self._checked_at = 0.0
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        # 읽기 쿼리 라우팅 결과별 횟수 (replica 외에는 주 DB에서 실행, failover는 레플리카 실행 중 연결이 끊긴 경우)
+        self.routed = {'replica': 0, 'lagging': 0, 'unavailable': 0, 'busy': 0, 'failover': 0}
+
+    def count(self, result):
+        with self._lock:
+            self.routed[result] += 1
+
+    def mark_down(self, error):
+        """레플리카 장애로 표시 (retry_interval 동안 주 DB 사용)"""
+        with self._lock:
+            self._down_until = time.monotonic() + self.retry_interval
+        print(f"⚠️ 레플리카 연결 실패, {self.retry_interval:.0f}초 동안 주 DB에서 읽음: {error}")
+
+    def _refresh_seq(self):
+        """레플리카의 마지막 seq 다시 확인 (블로킹)"""
+        with self.replica.connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(REPLICA_SEQ_QUERY)
+                    seq = cursor.fetchone()[0]
+            finally:
+                conn.rollback()
+        with self._lock:
+            self.replica_seq = max(self.replica_seq, seq)
+            self._checked_at = time.monotonic()
+
+    def note_write(self, seq):
+        with self._lock:
+            self.write_seq = max(self.write_seq, seq)
+
+    def choose(self, min_seq=0):
+        """읽기 쿼리를 보낼 곳 ('replica' 또는 주 DB로 보내는 이유) (블로킹, 필요하면 레플리카의 seq 확인)"""
+        min_seq = max(min_seq, self.write_seq)
+        now = time.monotonic()
+        if now < self._down_until:
+            return 'unavailable'
+        if min_seq > self.replica_seq:
+            # 밀린 레플리카에 요청마다 확인 쿼리를 보내지 않도록 확인 간격 제한
+            if now - self._checked_at < self.lag_check_interval:
+                return 'lagging'
+            try:
+                self._refresh_seq()
+            except PoolTimeoutError:
+                return 'busy'
+            except Exception as e:
+                self.mark_down(e)
+                return 'unavailable'
+            if min_seq > self.replica_seq:
+                return 'lagging'
+        return 'replica'
+
+    def stats(self):
+        with self._lock:
+            down_for = max(self._down_until - time.monotonic(), 0.0)
+            return {
+                'replicaSeq': self.replica_seq,
+                'writeSeq': self.write_seq,
+                'downForSeconds': round(down_for, 3),
+                'routed': dict(self.routed)
+            }
+
+
+def init_pool():
+    """환경변수 설정으로 전역 커넥션 풀 생성 (레플리카 설정이 있으면 레플리카 풀도 생성)"""
+    global _db_pool, _replica_router
+    if _db_pool is None:
+        settings = load_pool_settings()
+        _db_pool = ConnectionPool(load_postgres_config(), **settings)
+        replica_config = load_replica_config()
+        if replica_config is not None:
+            replica = ConnectionPool(replica_config, name='replica', **settings)
+            _replica_router = ReplicaRouter(
+                replica, _db_pool,
+                lag_check_interval=float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', '0.5')),
+                retry_interval=float(os.getenv('REPLICA_RETRY_INTERVAL', '30')),
+            )
+    return _db_pool
+
+
+def get_pool():
+    """전역 커넥션 풀 (주 DB, 없으면 생성)"""
+    return _db_pool if _db_pool is not None else init_pool()
+
+
+def get_replica_router():
+    """레플리카 라우터 (레플리카 설정이 없으면 None)"""
+    get_pool()
+    return _replica_router
+
+
+def get_read_pool():
+    """읽기 작업을 실행할 스레드를 가진 풀 (레플리카가 있으면 레플리카 풀)
+
+    실제 연결은 실행 시점에 레플리카 상태를 보고 정하므로, 스레드만 쓰기 작업과 나눠 쓴다.
+    """
+    router = get_replica_router()
+    return router.replica if router is not None else get_pool()
+
+
+def note_write_seq(rows):
+    """station_changes에 쓴 쿼리가 커밋된 뒤 주 DB의 마지막 seq를 레플리카 라우터에 알림 (블로킹)
+
+    seq는 커밋할 때 발급되므로(마이그레이션 3) RETURNING으로 받은 번호 대신 커밋 뒤의 MAX(seq)를 쓴다.
+    rows는 쓰기 쿼리의 결과이며, 비어 있으면 쓴 행이 없으므로 확인하지 않는다.
+    """
+    router = get_replica_router()
+    if router is None or not rows:
+        return
+    result = execute_query(WRITE_SEQ_QUERY, name='write_seq')
+    if result:
+        router.note_write(result[0]['seq'])
+
+
+def close_pool():
+    """전역 커넥션 풀 종료"""
+    global _db_pool, _replica_router
+    if _replica_router is not None:
+        _replica_router.replica.close()
+        _replica_router = None
+    if _db_pool is not None:
+        _db_pool.close()
+        _db_pool = None
+
+
+@contextmanager
+def _read_connection(read_seq):
+    """쿼리를 실행할 (풀, 연결)
+
+    read_seq가 있으면 읽기 전용 쿼리로 보고 레플리카 라우터가 정한 곳의 연결을 준다.
+    레플리카 연결을 얻지 못하면 레플리카를 장애로 표시하고 주 DB 연결을 준다.
+    """
+    router = get_replica_router()
+    primary = get_pool()
+    result = router.choose(read_seq) if read_seq is not None and router is not None else None
+    with ExitStack() as stack:
+        conn = None
+        if result == 'replica':
+            try:
+                conn = stack.enter_context(router.replica.connection())
+                pool = router.replica
+            except PoolTimeoutError:
+                result = 'busy'
+            except Exception as e:
+                router.mark_down(e)
+                result = 'unavailable'
+        if conn is None:
+            pool = primary
+            conn = stack.enter_context(primary.connection())
+        if result is not None:
+            router.count(result)
+        yield pool, conn
+
+
+class _ReplicaFailure(Exception):
+    """레플리카 연결이 쿼리 실행 중 끊김 (주 DB에서 다시 실행)"""
+
+
+def _fail_over(error):
+    router = get_replica_router()
+    router.mark_down(error)
+    router.count('failover')
+
+
+def _run_statement(pool, conn, text, params, fetch, is_select, statement):
+    """연결 하나로 쿼리 실행 (실패 시 None, 레플리카 연결 끊김은 예외로 전달)"""
+    started = time.perf_counter()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(text, params)
+
+            if fetch and is_select:
+                rows = cursor.fetchall()
+                conn.rollback()
+                return rows
+            # 쓰기 쿼리의 RETURNING 결과
+            rows = cursor.fetchall() if fetch and cursor.description is not None else None
+            conn.commit()
+            return rows if rows is not None else cursor.rowcount
+    except Exception as e:
+        print(f"Query execution error: {e}")
+        db_query_errors_total.inc(statement, pool.name)
+        if pool.name == 'replica' and isinstance(e, psycopg2.OperationalError):
+            raise _ReplicaFailure(e) from e
+        conn.rollback()
+        return None
+    finally:
+        _record_query(pool, text, params, statement, time.perf_counter() - started, is_select)
+
+
+def execute_query(query, params=None, fetch=True, name=None, read_seq=None):
+    """쿼리 실행 유틸리티 함수 (블로킹)
+
+    실패 시 None을 반환한다. name은 지표에 쓰이는 쿼리 이름이다.
+    read_seq를 주면 읽기 전용 쿼리로 보고, 레플리카가 변경 이력 read_seq까지 반영했으면
+    레플리카에서 실행한다 (레플리카가 없거나 밀렸거나 실행 중 연결이 끊기면 주 DB).
+    """
+    text, is_select = prepare_statement(query)
+    statement = name or 'other'
+    try:
+        try:
+            with _read_connection(read_seq) as (pool, conn):
+                return _run_statement(pool, conn, text, params, fetch, is_select, statement)
+        except _ReplicaFailure as e:
+            _fail_over(e.__cause__)
+        with get_pool().connection() as conn:
+            return _run_statement(get_pool(), conn, text, params, fetch, is_select, statement)
+    except Exception as e:
+        print(f"❌ 데이터베이스 연결 실패: {e}")
+        db_query_errors_total.inc(statement, 'primary')
+        return None
+
+
+def iter_query(query, params=None, batch_size=1000, name=None, read_seq=None):
+    """서버 측 커서로 조회 결과를 batch_size개씩 받아 한 행씩 반환 (블로킹 제너레이터)
+
+    전체 결과를 한 번에 메모리에 올리지 않는다. 실패 시 예외를 그대로 던지며,
+    반복이 끝날 때까지 연결을 점유하므로 DB 전용 스레드 안에서 끝까지 소비해야 한다.
+    read_seq는 execute_query와 같고, 레플리카 연결이 첫 행을 받기 전에 끊기면 주 DB에서 다시 실행한다.
+    """
+    text, is_select = prepare_statement(query)
+    statement = name or 'other'
+    pool = None
+    yielded = False
+    try:
+        with _read_connection(read_seq) as (pool, conn):
+            for row in _stream(pool, conn, text, params, batch_size, statement, is_select):
+                yielded = True
+                yield row
+            return
+    except psycopg2.OperationalError as e:
+        if yielded or pool is None or pool.name != 'replica':
+            raise
+        _fail_over(e)
+    with get_pool().connection() as conn:
+        yield from _stream(get_pool(), conn, text, params, batch_size, statement, is_select)
+
+
+def _stream(pool, conn, text, params, batch_size, statement, is_select):
+    started = time.perf_counter()
+    try:
+        with conn.cursor(name=f'stream_{uuid.uuid4().hex}', cursor_factory=RealDictCursor) as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(text, params)
+            yield from cursor
+    except Exception:
+        db_query_errors_total.inc(statement, pool.name)
+        raise
+    finally:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            pass
+        _record_query(pool, text, params, statement, time.perf_counter() - started, is_select)
+
+
+def _record_query(pool, text, params, statement, duration, is_select):
+    """쿼리 실행 시간을 지표/프로파일러에 기록하고, 느린 SELECT는 실행 계획을 따로 수집"""
+    db_query_duration.observe(statement, pool.name, value=duration)
+    key = query_profiler.record(text, statement, duration, is_select)
+    if key is not None:
+        # 요청을 붙잡지 않도록 같은 풀의 다른 DB 스레드에서 실행
+        try:
+            pool.executor.submit(_capture_explain, pool, key, text, params, duration)
+        except RuntimeError:
+            # 풀 종료 중
+            pass
+
+
+def _capture_explain(pool, key, text, params, duration):
+    """느린 쿼리를 EXPLAIN (ANALYZE, BUFFERS)로 다시 실행해 실행 계획 저장 (블로킹)"""
+    try:
+        with pool.connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + text, params)
+                    plan = [row[0] for row in cursor.fetchall()]
+            finally:
+                conn.rollback()
+        query_profiler.save_explain(key, duration, plan)
+    except Exception as e:
+        print(f"실행 계획 수집 실패: {e}")
+
+
+async def run_query(query, params=None, fetch=True, name=None, read_seq=None):
+    """쿼리를 DB 전용 스레드에서 실행 (이벤트 루프를 막지 않음)
+
+    읽기 쿼리(read_seq 지정)는 레플리카 풀의 스레드에서 실행해 쓰기 작업과 스레드를 나눠 쓰지 않는다.
+    """
+    pool = get_read_pool() if read_seq is not None else get_pool()
+    return await pool.run(execute_query, query, params, fetch, name, read_seq)
+
+
+def ping():
+    """DB 연결 확인용 SELECT 1 (블로킹)"""
+    with get_pool().connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        conn.rollback()
+    return True
+
+
+def _pool_metrics():
+    """커넥션 풀 사용 현황 지표 (풀별)"""
+    if _db_pool is None:
+        return []
+    pools = [_db_pool]
+    router = _replica_router
+    if router is not None:
+        pools.append(router.replica)
+    stats = [(((('pool', pool.name),), pool.stats())) for pool in pools]
+    samples = [
+        ('db_pool_connections_in_use', 'gauge', '사용 중인 DB 연결 수',
+         {labels: s['inUse'] for labels, s in stats}),
+        ('db_pool_connections_idle', 'gauge', '풀에서 대기 중인 DB 연결 수',
+         {labels: s['idle'] for labels, s in stats}),
+        ('db_pool_waiting', 'gauge', 'DB 연결을 기다리는 작업 수',
+         {labels: s['waiting'] for labels, s in stats}),
+        ('db_pool_max_size', 'gauge', '커넥션 풀 최대 크기',
+         {labels: s['maxSize'] for labels, s in stats}),
+        ('db_pool_timeouts_total', 'counter', 'DB 연결 대기 시간 초과 수',
+         {labels: s['timeoutsTotal'] for labels, s in stats}),
+    ]
+    if router is not None:
+        replica = router.stats()
+        samples.append(('db_replica_seq', 'gauge', '레플리카에서 마지막으로 확인한 변경 이력 번호',
+                        replica['replicaSeq']))
+        samples.append(('db_read_routing_total', 'counter', '읽기 쿼리 라우팅 결과별 횟수',
+                        {(('result', result),): count for result, count in replica['routed'].items()}))
+    return samples
+
+
+registry.add_collector(_pool_metrics)
@@ -0,0 +1,68 @@
+import os
+from collections import OrderedDict
+
+from app.metrics import registry
+from app.snapshot import station_cache
+
+
+class StationDetailCache:
+    """충전소 상세정보 캐시 (최근에 조회된 충전소만 최대 max_size개 보관)
+
+    충전소 정보와 충전기 목록을 닫는 괄호를 뺀 JSON 조각으로 인코딩해 보관하고,
+    수요 정보는 조회 시점의 스냅샷 값을 붙인다.
+    항목은 저장 당시 충전소의 last_update_time을 키로 가지므로, 수집 Lambda가
+    충전소를 다시 쓰면 다음 조회에서 DB를 다시 읽는다.
+    """
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, stat_id, last_update_time):
+        """last_update_time이 같은 항목이 있으면 반환"""
+        entry = self._entries.get(stat_id)
+        if entry is None or entry[0] != last_update_time:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(stat_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, stat_id, last_update_time, fragment):
+        """상세정보 조각 저장 (가장 오래 조회되지 않은 항목부터 제거)"""
+        if self.max_size <= 0:
+            return
+        self._entries[stat_id] = (last_update_time, fragment)
+        self._entries.move_to_end(stat_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def on_snapshot(self, previous, current):
+        """스냅샷 교체 콜백: 갱신되거나 삭제된 충전소 항목 정리"""
+        for stat_id, (last_update_time, _) in list(self._entries.items()):
+            station = current.by_id.get(stat_id)
+            if station is None or station.last_update_time != last_update_time:
+                del self._entries[stat_id]
+
+    def metrics(self):
+        """상세정보 캐시 지표"""
+        return [
+            ('station_detail_cache_entries', 'gauge', '상세정보 캐시 항목 수', len(self._entries)),
+            ('station_detail_cache_requests_total', 'counter', '상세정보 캐시 조회 수 (적중 여부별)',
+             {(('result', 'hit'),): self.hits, (('result', 'miss'),): self.misses}),
+        ]
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+detail_cache = StationDetailCache(max_size=int(os.getenv('STATION_DETAIL_CACHE_SIZE', '256')))
+station_cache.add_listener(detail_cache.on_snapshot)
+registry.add_collector(detail_cache.metrics)
@@ -0,0 +1,117 @@
+import gzip
+import json
+
+try:
+    import msgpack
+except ImportError:  # msgpack이 없으면 MessagePack 응답 대신 기본 JSON으로 응답
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # brotli가 없으면 gzip으로만 압축
+    brotli = None
+
+# 필드별 배열로 묶은 열 단위 JSON
+COLUMNAR_MEDIA_TYPE = 'application/vnd.evolution.columnar+json'
+MSGPACK_MEDIA_TYPE = 'application/x-msgpack'
+
+# 이 크기보다 작은 응답은 압축하지 않음 (바이트)
+MIN_COMPRESS_SIZE = 1024
+
+# 스냅샷당 보관할 인코딩된 응답 개수
+ENCODED_CACHE_SIZE = 32
+
+
+def _accepted(header):
+    """Accept / Accept-Encoding 헤더에서 q=0이 아닌 값 목록"""
+    values = []
+    for part in header.split(','):
+        value, _, params = part.partition(';')
+        value = value.strip().lower()
+        if not value:
+            continue
+        q = params.replace(' ', '')
+        if q.startswith('q=') and q[2:] in ('0', '0.0', '0.00', '0.000'):
+            continue
+        values.append(value)
+    return values
+
+
+def negotiate_format(accept):
+    """Accept 헤더로 목록 응답 형식 결정 (None이면 기존 JSON 배열)"""
+    accepted = _accepted(accept or '')
+    if msgpack is not None and (MSGPACK_MEDIA_TYPE in accepted or 'application/msgpack' in accepted):
+        return MSGPACK_MEDIA_TYPE
+    if COLUMNAR_MEDIA_TYPE in accepted:
+        return COLUMNAR_MEDIA_TYPE
+    return None
+
+
+def negotiate_encoding(accept_encoding):
+    """Accept-Encoding 헤더로 압축 방식 결정 (None이면 압축하지 않음)"""
+    accepted = _accepted(accept_encoding or '')
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def station_columns(stations, now):
+    """충전소 목록을 필드별 배열로 변환 (좌표/최고속도는 숫자로)"""
+    columns = {
+        "count": len(stations),
+        "statId": [], "statNm": [], "lat": [], "lng": [], "chargerTypes": [], "parkingFree": [],
+        "totalChargers": [], "usableChargers": [], "usingChargers": [], "maxOutput": [], "useTime": [],
+        "lastUpdateTime": [], "viewNum": [], "departsIn30m": [], "hourlyVisitNum": []
+    }
+    for station in stations:
+        info = station.info
+        columns["statId"].append(station.stat_id)
+        columns["statNm"].append(info["statNm"])
+        columns["lat"].append(station.lat)
+        columns["lng"].append(station.lng)
+        columns["chargerTypes"].append(info["chargerTypes"])
+        columns["parkingFree"].append(station.parking_free)
+        columns["totalChargers"].append(info["totalChargers"])
+        columns["usableChargers"].append(info["usableChargers"])
+        columns["usingChargers"].append(info["usingChargers"])
+        columns["maxOutput"].append(station.max_output)
+        columns["useTime"].append(info["useTime"])
+        columns["lastUpdateTime"].append(station.last_update_time)
+        columns["viewNum"].append(station.current_view_num)
+        columns["departsIn30m"].append(station.recent_departs(now))
+        columns["hourlyVisitNum"].append(station.hourly_visit_num)
+    return columns
+
+
+def encode_station_list(stations, now, media_type, content_encoding=None):
+    """충전소 목록을 요청한 형식으로 인코딩하고 압축"""
+    columns = station_columns(stations, now)
+    if media_type == MSGPACK_MEDIA_TYPE:
+        body = msgpack.packb(columns, use_bin_type=True)
+    else:
+        body = json.dumps(columns, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    if content_encoding is None or len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    if content_encoding == 'br':
+        return brotli.compress(body), 'br'
+    return gzip.compress(body, compresslevel=6), 'gzip'
+
+
+def cached_station_list(snapshot, etag, load_stations, now, media_type, content_encoding=None):
+    """ETag별로 한 번만 인코딩한 목록 응답 (본문, Content-Encoding)
+
+    ETag에 데이터 버전/요청 조건/형식/압축 방식이 모두 들어가므로, 같은 ETag의 응답은
+    스냅샷의 파생 캐시에 보관해 두고 검색/인코딩 없이 그대로 다시 보낸다.
+    """
+    key = ('encoded', etag)
+    encoded = snapshot.derived.get(key)
+    if encoded is None:
+        encoded = snapshot.derived[key] = encode_station_list(load_stations(), now, media_type, content_encoding)
+        # 오래된 항목부터 정리
+        encoded_keys = [k for k in snapshot.derived if k[0] == 'encoded']
+        for old_key in encoded_keys[:-ENCODED_CACHE_SIZE]:
+            del snapshot.derived[old_key]
+    return encoded
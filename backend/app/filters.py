@@ -0,0 +1,96 @@
+from bisect import bisect_left
+
+# 요청한 충전기 타입별로 호환되는 충전기 타입 코드
+# (01: DC차데모, 02: AC완속, 03: DC차데모+AC3상, 04: DC콤보, 05: DC차데모+DC콤보,
+#  06: DC차데모+AC3상+DC콤보, 07: AC3상, 08: DC콤보(완속))
+CHARGER_TYPE_COMPAT = {
+    '01': ['01', '03', '05', '06'],  # DC차데모
+    '02': ['02'],                    # AC완속
+    '04': ['04', '05', '06', '08'],  # DC콤보
+    '07': ['03', '06', '07'],        # AC3상
+}
+
+
+def _bitset(size, indexes):
+    """인덱스 목록을 비트셋(int)으로 변환"""
+    flags = bytearray((size + 7) // 8)
+    for i in indexes:
+        flags[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(flags, 'little')
+
+
+class StationFilterIndex:
+    """충전기 타입/최고속도/무료주차 조건 검색용 컬럼 인덱스
+
+    충전소 i번째를 i번째 비트로 하는 비트셋(int)을 조건 값별로 미리 만들어 두고,
+    조건 조합은 비트셋 AND 한 번으로 계산한다.
+    """
+
+    def __init__(self, stations):
+        self.stations = stations
+        self.size = len(stations)
+        self.all_mask = (1 << self.size) - 1
+
+        type_indexes = {}
+        parking_indexes = {}
+        output_indexes = {}
+        for i, station in enumerate(stations):
+            for type_code in station.charger_types:
+                type_indexes.setdefault(type_code, []).append(i)
+            parking_indexes.setdefault(station.parking_free, []).append(i)
+            output_indexes.setdefault(station.max_output, []).append(i)
+
+        type_masks = {code: _bitset(self.size, indexes) for code, indexes in type_indexes.items()}
+        # 요청 타입 코드별로 호환 타입까지 합친 비트셋
+        self.type_masks = {}
+        for requested, compatible in CHARGER_TYPE_COMPAT.items():
+            mask = 0
+            for code in compatible:
+                mask |= type_masks.get(code, 0)
+            self.type_masks[requested] = mask
+        self.parking_masks = {value: _bitset(self.size, indexes) for value, indexes in parking_indexes.items()}
+
+        # 최고속도 값 오름차순과, 각 값 이상인 충전소들의 비트셋
+        self.outputs = sorted(output_indexes)
+        self.output_masks = [0] * len(self.outputs)
+        mask = 0
+        for j in range(len(self.outputs) - 1, -1, -1):
+            mask |= _bitset(self.size, output_indexes[self.outputs[j]])
+            self.output_masks[j] = mask
+
+    def mask(self, charger_types=None, min_output=None, parking_free=None):
+        """조건에 맞는 충전소들의 비트셋"""
+        mask = self.all_mask
+        if charger_types:
+            requested = [code for code in charger_types.split(',') if code in self.type_masks]
+            if requested:
+                type_mask = 0
+                for code in requested:
+                    type_mask |= self.type_masks[code]
+                mask &= type_mask
+        if min_output:
+            j = bisect_left(self.outputs, min_output)
+            mask &= self.output_masks[j] if j < len(self.outputs) else 0
+        if parking_free:
+            mask &= self.parking_masks.get(parking_free, 0)
+        return mask
+
+    def select(self, mask, limit=None):
+        """비트셋에 해당하는 충전소 목록 (원래 순서 유지, limit개까지)"""
+        if mask == self.all_mask:
+            return self.stations if limit is None else self.stations[:limit]
+        stations = self.stations
+        bits = bin(mask)[:1:-1]
+        selected = []
+        i = bits.find('1')
+        while i >= 0 and (limit is None or len(selected) < limit):
+            selected.append(stations[i])
+            i = bits.find('1', i + 1)
+        return selected
+
+    def predicate(self, mask):
+        """충전소가 비트셋에 포함되는지 확인하는 함수 (충전소의 index 기준)"""
+        if mask == self.all_mask:
+            return None
+        flags = mask.to_bytes((self.size + 7) // 8, 'little')
+        return lambda station: flags[station.index >> 3] >> (station.index & 7) & 1
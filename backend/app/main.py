@@ -1,141 +1,61 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+import asyncio
+import hmac
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from datetime import datetime, timedelta, timezone
+import time
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 
-# .env 파일 로드
+# .env 파일 로드 (app 모듈들이 환경변수를 읽기 전에 실행)
 load_dotenv()
 
-# PostgreSQL 연결 정보 (환경변수 사용)
-POSTGRES_CONFIG = {
-    'host': os.getenv('POSTGRES_HOST'),
-    'database': os.getenv('POSTGRES_DB'),
-    'user': os.getenv('POSTGRES_USER'),
-    'password': os.getenv('POSTGRES_PASSWORD'),
-    'port': os.getenv('POSTGRES_PORT')
-}
-
-# 디버깅: 환경변수 확인
-print("=== 환경변수 디버깅 ===")
-print(f"POSTGRES_HOST: {os.getenv('POSTGRES_HOST')}")
-print(f"POSTGRES_DB: {os.getenv('POSTGRES_DB')}")
-print(f"POSTGRES_USER: {os.getenv('POSTGRES_USER')}")
-print(f"POSTGRES_PASSWORD: {'***' if os.getenv('POSTGRES_PASSWORD') else 'None'}")
-print(f"POSTGRES_PORT: {os.getenv('POSTGRES_PORT')}")
-print("======================")
-
-def get_db_connection():
-    """PostgreSQL 데이터베이스 연결"""
-    try:
-        print(f"데이터베이스 연결 시도 중: {POSTGRES_CONFIG['host']}:{POSTGRES_CONFIG['port']}")
-        conn = psycopg2.connect(**POSTGRES_CONFIG)
-        print("✓ 데이터베이스 연결 성공!")
-        return conn
-    except Exception as e:
-        print(f"❌ 데이터베이스 연결 실패: {e}")
-        print(f"연결 정보: {POSTGRES_CONFIG}")
-        return None
-    
-def execute_query(query, params=None, fetch=True):
-    """쿼리 실행 유틸리티 함수"""
-    conn = get_db_connection()
-    if not conn:
-        return None
-    
-    try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute(query, params)
-            
-            if fetch:
-                if query.strip().upper().startswith('SELECT'):
-                    return cursor.fetchall()
-                else:
-                    conn.commit()
-                    return cursor.rowcount
-            else:
-                conn.commit()
-                return cursor.rowcount
-    except Exception as e:
-        print(f"Query execution error: {e}")
-        conn.rollback()
-        return None
-    finally:
-        conn.close()
-
-def convert_charger_to_camel_case(charger):
-    """충전기 데이터의 키를 snake_case에서 camelCase로 변환"""
-    camel_case_mapping = {
-        'chger_id': 'chgerId',
-        'chger_type': 'chgerType',
-        'stat_upd_dt': 'statUpdDt',
-        'last_tsdt': 'lastTsdt',
-        'last_tedt': 'lastTedt',
-        'now_tsdt': 'nowTsdt',
-        'del_yn': 'delYn',
-        'del_detail': 'delDetail',
-        'busi_id': 'busiId',
-        'busi_nm': 'busiNm',
-        'busi_call': 'busiCall',
-        'kind_detail': 'kindDetail',
-        'limit_yn': 'limitYn',
-        'limit_detail': 'limitDetail',
-        'parking_free': 'parkingFree',
-        'traffic_yn': 'trafficYn',
-        'use_time': 'useTime',
-        'stat_id': 'statId',
-        'stat_nm': 'statNm',
-        'created_at': 'createdAt',
-        'updated_at': 'updatedAt'
-    }
-    
-    converted = {}
-    for key, value in charger.items():
-        # 매핑에 있는 키면 camelCase로 변환, 없으면 그대로 사용
-        new_key = camel_case_mapping.get(key, key)
-        converted[new_key] = value
-    
-    return converted
-
-def create_tables_if_not_exists():
-    """필요한 테이블들이 없으면 생성"""
-    create_demand_info_table = """
-    CREATE TABLE IF NOT EXISTS demand_info (
-        id SERIAL PRIMARY KEY,
-        stat_id VARCHAR(50) UNIQUE NOT NULL,
-        view_num INTEGER DEFAULT 0,
-        departs_in_30m TIMESTAMP[],
-        hourly_visit_num INTEGER[],
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """
-    
-    # 기존 테이블에 컬럼 추가 (이미 존재하면 무시됨)
-    add_columns_queries = [
-        "ALTER TABLE demand_info ADD COLUMN IF NOT EXISTS departs_in_30m TIMESTAMP[];",
-        "ALTER TABLE demand_info ADD COLUMN IF NOT EXISTS hourly_visit_num INTEGER[];"
-    ]
-    
-    try:
-        execute_query(create_demand_info_table, fetch=False)
-        print("demand_info 테이블 확인/생성 완료")
-        
-        for query in add_columns_queries:
-            execute_query(query, fetch=False)
-        print("demand_info 테이블 컬럼 추가 완료")
-        
-    except Exception as e:
-        print(f"테이블 생성 오류: {e}")
+from app.db import PoolTimeoutError, run_query, init_pool, get_pool, get_replica_router, close_pool, note_write_seq, ping
+from app.clusters import KST, MAX_ZOOM, MIN_ZOOM, get_clusters
+from app.concurrency import OverloadedError, station_admission, station_flight
+from app.conditional import is_not_modified, not_modified_response, validator_headers
+from app.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, registry
+from app.profiler import query_profiler
+from app.sampler import ProfilerMiddleware, request_profiler
+from app.readiness import readiness
+from app.push import station_hub, stream_events
+from app.serialize import dumps, join_array, with_field
+from app.counters import view_counter
+from app.details import detail_cache
+from app.encoding import cached_station_list, negotiate_encoding, negotiate_format
+from app.notify import change_listener
+from app.snapshot import CHANGED_STATIONS_QUERY, RECENT_DEPARTS_COLUMN, pending_view_num, station_cache, station_etag, to_utc
+from app.spatial import parse_bbox
+
+# 충전소별로 보관하는 30분내 출발 시각 최대 개수
+MAX_DEPARTS_PER_STATION = int(os.getenv('MAX_DEPARTS_PER_STATION', '100'))
+
+# 한 번에 조회할 수 있는 최대 충전소 수
+MAX_BATCH_STATIONS = int(os.getenv('MAX_BATCH_STATIONS', '100'))
+
+# 시작할 때 미리 열어 둘 DB 연결 수
+DB_POOL_PREWARM = int(os.getenv('DB_POOL_PREWARM', '4'))
+
+# 헬스체크의 DB 확인 결과를 재사용하는 시간 (초)
+HEALTH_DB_CHECK_INTERVAL = float(os.getenv('HEALTH_DB_CHECK_INTERVAL', '10'))
+
+# 관리자 API 토큰 (설정하지 않으면 관리자 API 비활성화)
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
 
 # Pydantic 모델 정의
 class DepartTimeRequest(BaseModel):
     depart_time: str
 
+class StationBatchRequest(BaseModel):
+    statIds: List[str]
+    brief: bool = True
+
+class ProfilerSettingsRequest(BaseModel):
+    sampleRate: float
+
 ######### FastAPI app 설정 #########
 
 app = FastAPI(title="Simple Test API")
@@ -155,306 +75,506 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
+    expose_headers=["ETag", "Last-Modified", "X-Next-Cursor"],
 )
 
-# FastAPI 시작 이벤트에서 테이블 생성 실행
+# X-Profile 헤더(관리자) 또는 샘플링 비율로 고른 요청의 스택 샘플링
+app.add_middleware(ProfilerMiddleware, profiler=request_profiler, admin_token=ADMIN_TOKEN)
+
+# 라우트별 요청 수/처리 시간/응답 크기 지표
+app.add_middleware(MetricsMiddleware)
+
+# 서버 준비 작업 (커넥션 예열, 스키마 확인, 스냅샷/캐시 생성)
+_warm_up_task = None
+
+# FastAPI 시작 이벤트: 준비 작업은 백그라운드로 돌리고 바로 요청을 받음 (/api/ready로 완료 확인)
 @app.on_event("startup")
 async def startup():
-    try:
-        create_tables_if_not_exists()
-        print("테이블 생성/확인 완료")
-    except Exception as e:
-        print(f"테이블 생성 중 오류 (무시하고 계속): {e}")
+    global _warm_up_task
+    pool = init_pool()
+    print(f"DB 커넥션 풀 생성 (최대 {pool.max_size}개, 보관 {pool.max_idle}개)")
+    view_counter.start()
+    if change_listener is not None:
+        change_listener.start()
+    _warm_up_task = asyncio.create_task(readiness.warm_up(prewarm=DB_POOL_PREWARM))
+
+# FastAPI 종료 이벤트에서 커넥션 풀 정리
+@app.on_event("shutdown")
+async def shutdown():
+    if _warm_up_task is not None:
+        _warm_up_task.cancel()
+    if change_listener is not None:
+        await change_listener.close()
+    await station_hub.close()
+    # 반영 대기 중인 조회수를 DB에 쓴 뒤 풀 종료
+    await view_counter.close()
+    close_pool()
+    print("DB 커넥션 풀 종료")
 
 # 루트 엔드포인트
 @app.get("/")
 async def root():
     return {"message": "FastAPI 충전소 API 서버가 정상적으로 실행 중입니다!"}
 
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+# 목록 페이지 크기 (limit 미지정 시 기본값, 최대값)
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 1000
+
+def stream_ndjson(stations, now, chunk_size=200):
+    """충전소를 한 줄에 하나씩 JSON으로 변환하며 전송 (전체 응답을 메모리에 만들지 않음)"""
+    lines = []
+    for station in stations:
+        lines.append(station.to_json(now))
+        if len(lines) >= chunk_size:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
 # 주변 충전소 목록 가져오기 (대전시 전체)
 @app.get('/api/stations')
 async def nearby_stations(
+    request: Request,
     chargerTypes: Optional[str] = Query(None),
     minOutput: Optional[int] = Query(None),
-    parkingFree: Optional[str] = Query(None)
+    parkingFree: Optional[str] = Query(None),
+    bbox: Optional[str] = Query(None),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius: Optional[float] = Query(None, gt=0, le=100000),
+    k: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_LIMIT)
 ):
     try:
-        # 현재 시간 기준으로 30분 전의 시간 계산
-        thirty_min_ago = datetime.now(timezone.utc) - timedelta(minutes=30)
+        # 위치 조건 검증: 영역(bbox), 중심 좌표(lat/lng) + 반경(radius, m) 또는 최근접 개수(k)
+        try:
+            area = parse_bbox(bbox)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if (lat is None) != (lng is None):
+            raise HTTPException(status_code=400, detail="lat과 lng는 함께 지정해야 합니다")
+        if (radius is not None or k is not None) and lat is None and area is None:
+            raise HTTPException(status_code=400, detail="radius, k는 lat/lng 또는 bbox와 함께 지정해야 합니다")
+        paged = cursor is not None or limit is not None
+        if paged and (lat is not None or area is not None):
+            raise HTTPException(status_code=400, detail="cursor, limit는 위치 조건과 함께 사용할 수 없습니다")
+        # Accept: application/x-ndjson 이면 한 줄에 충전소 하나씩 스트리밍
+        accept = request.headers.get('accept', '')
+        ndjson = NDJSON_MEDIA_TYPE in accept
+        # 열 단위 JSON / MessagePack 요청이면 압축까지 미리 해 둔 본문으로 응답
+        wire_format = negotiate_format(accept) if not ndjson and not paged else None
+        content_encoding = negotiate_encoding(request.headers.get('accept-encoding', '')) if wire_format else None
+        variant = ('ndjson',) if ndjson else (wire_format, content_encoding) if wire_format else ()
+        
+        # 데이터 버전이 바뀔 때만 DB에서 다시 읽는 스냅샷에서 필터링
+        snapshot = await station_cache.get()
+        if snapshot is None:
+            raise HTTPException(status_code=500, detail="Database query failed")
         
-        # 필터 쿼리 처리
-        where_conditions = []
-        params = []
+        now = datetime.now(timezone.utc)
         
-        # 충전기 타입 필터링
-        if chargerTypes:
-            request_types = chargerTypes.split(',')
-            target_types = []
-            
-            for type_code in request_types:
-                if type_code == '01':  # DC차데모
-                    target_types.extend(['01', '03', '05', '06'])
-                elif type_code == '02':  # AC완속
-                    target_types.extend(['02'])
-                elif type_code == '04':  # DC콤보
-                    target_types.extend(['04', '05', '06', '08'])
-                elif type_code == '07':  # AC3상
-                    target_types.extend(['03', '06', '07'])
-            
-            if target_types:
-                # PostgreSQL text[] 배열에서 타입 검색
-                type_conditions = []
-                for target_type in target_types:
-                    type_conditions.append("%s = ANY(charger_types)")
-                    params.append(target_type)
-                
-                where_conditions.append(f"({' OR '.join(type_conditions)})")
+        # 마지막 응답 이후 바뀐 것이 없으면 필터링/직렬화 없이 304 응답
+        etag, last_modified = snapshot.validators(now, request.url.query, *variant)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        headers = validator_headers(etag, last_modified)
+        headers["Vary"] = "Accept, Accept-Encoding"
         
-        # 최소속도 필터링
-        if minOutput:
-            where_conditions.append("CAST(max_output AS INTEGER) >= %s")
-            params.append(minOutput)
+        if wire_format:
+            body, applied_encoding = cached_station_list(
+                snapshot, etag,
+                lambda: snapshot.search(chargerTypes, minOutput, parkingFree, area, lat, lng, radius, k),
+                now, wire_format, content_encoding
+            )
+            if applied_encoding:
+                headers["Content-Encoding"] = applied_encoding
+            return Response(content=body, media_type=wire_format, headers=headers)
         
-        # 무료주차여부 필터링
-        if parkingFree:
-            where_conditions.append("parking_free = %s")
-            params.append(parkingFree)
+        if paged:
+            # 충전소명 순 목록을 cursor(이전 페이지 마지막 statId) 다음부터 limit개씩
+            try:
+                stations, next_cursor = snapshot.page(
+                    chargerTypes, minOutput, parkingFree, cursor, limit or DEFAULT_PAGE_LIMIT
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if next_cursor is not None:
+                headers["X-Next-Cursor"] = next_cursor
+        else:
+            # 위치 조건이 있으면 가까운 순, 없으면 충전소명 순
+            stations = snapshot.search(chargerTypes, minOutput, parkingFree, area, lat, lng, radius, k)
         
-        # WHERE 절 구성
-        where_clause = ""
-        if where_conditions:
-            where_clause = "WHERE " + " AND ".join(where_conditions)
+        if ndjson:
+            return StreamingResponse(stream_ndjson(stations, now), media_type=NDJSON_MEDIA_TYPE, headers=headers)
         
-        # 주변 충전소 목록 가져오기 (수요예측 정보 포함)
-        query = f"""
-            SELECT 
-                gc.stat_id,
-                gc.stat_nm,
-                CAST(gc.lat AS VARCHAR) as lat,
-                CAST(gc.lng AS VARCHAR) as lng,
-                gc.charger_types,
-                gc.parking_free,
-                gc.total_chargers,
-                gc.usable_chargers,
-                gc.using_chargers,
-                CAST(gc.max_output AS VARCHAR) as max_output,
-                gc.use_time,
-                gc.last_update_time,
-                COALESCE(di.view_num, 0) as view_num,
-                COALESCE(di.departs_in_30m, ARRAY[]::TIMESTAMP[]) as departs_in_30m,
-                COALESCE(di.hourly_visit_num, ARRAY[]::INTEGER[]) as hourly_visit_num
-            FROM grouped_chargers gc
-            LEFT JOIN demand_info di ON gc.stat_id = di.stat_id
-            {where_clause}
-            ORDER BY gc.stat_nm
-        """
+        # 충전소별로 미리 인코딩해 둔 JSON 조각을 이어 붙여 응답
+        body = join_array(station.to_json(now) for station in stations)
+        if paged:
+            body = with_field(b'{"stations":' + body, "nextCursor", next_cursor)
+        return Response(content=body, media_type="application/json", headers=headers)
         
-        stations = execute_query(query, params)
-        if stations is None:
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in nearby_stations: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# 마지막으로 받은 버전 이후 변경된 충전소만 가져오기
+@app.get('/api/stations/changes')
+async def station_changes(since: Optional[int] = Query(None)):
+    try:
+        snapshot = await station_cache.get()
+        if snapshot is None:
             raise HTTPException(status_code=500, detail="Database query failed")
         
-        # 응답 형식을 프론트엔드 타입에 맞게 변환
-        formatted_stations = []
-        for station in stations:
-            # 30분 내 출발 데이터에서 오래된 것 필터링
-            departs_list = []
-            if station['departs_in_30m']:
-                current_time = datetime.now(timezone.utc)
-                thirty_min_ago = current_time - timedelta(minutes=30)
-                
-                # timezone naive datetime을 timezone aware로 변환하여 비교
-                departs_list = []
-                for dep in station['departs_in_30m']:
-                    # dep가 timezone naive인 경우 UTC로 간주하여 timezone aware로 변환
-                    if dep.tzinfo is None:
-                        dep_aware = dep.replace(tzinfo=timezone.utc)
-                    else:
-                        dep_aware = dep
-                    
-                    if dep_aware >= thirty_min_ago:
-                        departs_list.append(dep_aware.isoformat())
-            
-            formatted_station = {
-                "statId": station['stat_id'],
-                "info": {
-                    "statNm": station['stat_nm'],
-                    "lat": station['lat'],
-                    "lng": station['lng'],
-                    "chargerTypes": station['charger_types'] if station['charger_types'] else [],
-                    "parkingFree": station['parking_free'],
-                    "totalChargers": station['total_chargers'],
-                    "usableChargers": station['usable_chargers'],
-                    "usingChargers": station['using_chargers'],
-                    "maxOutput": station['max_output'],
-                    "useTime": station['use_time']
-                },
-                "lastUpdateTime": station['last_update_time'].isoformat() if station['last_update_time'] else None,
-                "demandInfo": {
-                    "viewNum": station['view_num'],
-                    "departsIn30m": departs_list,
-                    "hourlyVisitNum": station['hourly_visit_num'] if station['hourly_visit_num'] else []
-                } 
+        now = datetime.now(timezone.utc)
+        
+        # 버전이 없거나 변경 이력이 이미 정리된 구간이면 전체 목록으로 다시 동기화
+        if since is None or since < snapshot.min_change_seq - 1:
+            return {
+                "version": snapshot.change_seq,
+                "reset": True,
+                "changed": [station.to_summary(now) for station in snapshot.stations],
+                "removed": []
             }
-            formatted_stations.append(formatted_station)
         
-        return formatted_stations
+        # 클라이언트가 이 스냅샷보다 앞선 버전을 가지고 있으면 보낼 변경분 없음
+        if since >= snapshot.change_seq:
+            return {"version": since, "reset": False, "changed": [], "removed": []}
         
+        # 같은 구간의 동시 요청은 쿼리 1회의 결과를 함께 사용
+        _, rows = await station_flight.run(('changes', since, snapshot.change_seq), query_limited,
+                                           CHANGED_STATIONS_QUERY, (since, snapshot.change_seq), 'changed_stations',
+                                           snapshot.change_seq)
+        if rows is None:
+            raise HTTPException(status_code=500, detail="Database query failed")
+        
+        # 스냅샷에 있으면 변경, 없으면 삭제된 충전소
+        changed = []
+        removed = []
+        for row in rows:
+            station = snapshot.by_id.get(row['stat_id'])
+            if station is not None:
+                changed.append(station)
+            else:
+                removed.append(row['stat_id'])
+        changed.sort(key=lambda station: station.info['statNm'] or '')
+        
+        return {
+            "version": snapshot.change_seq,
+            "reset": False,
+            "changed": [station.to_summary(now) for station in changed],
+            "removed": sorted(removed)
+        }
+        
+    except HTTPException:
+        raise
+    except OverloadedError as e:
+        raise overloaded(e)
     except Exception as e:
-        print(f"Error in nearby_stations: {e}")
+        print(f"Error in station_changes: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# 줌 레벨별 충전소 클러스터 (축소된 지도용)
+@app.get('/api/stations/clusters')
+async def station_clusters(
+    request: Request,
+    response: Response,
+    zoom: int = Query(..., ge=MIN_ZOOM, le=MAX_ZOOM),
+    bbox: Optional[str] = Query(None)
+):
+    try:
+        try:
+            area = parse_bbox(bbox)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        snapshot = await station_cache.get()
+        if snapshot is None:
+            raise HTTPException(status_code=500, detail="Database query failed")
+        
+        now = datetime.now(timezone.utc)
+        
+        # 예상혼잡도가 시(hour) 단위로 바뀌므로 ETag에 현재 시각(시)을 포함
+        etag, last_modified = snapshot.validators(now, request.url.query, now.astimezone(KST).hour)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        response.headers.update(validator_headers(etag, last_modified))
+        
+        return {
+            "zoom": zoom,
+            "version": snapshot.change_seq,
+            "clusters": get_clusters(snapshot, zoom, now, area)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in station_clusters: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# 충전소 상태 변경 실시간 수신 (Server-Sent Events)
+@app.get('/api/stations/stream')
+async def station_stream(
+    request: Request,
+    bbox: Optional[str] = Query(None),
+    statIds: Optional[str] = Query(None)
+):
+    try:
+        area = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    stat_ids = [stat_id for stat_id in statIds.split(',') if stat_id] if statIds else None
+    subscription = station_hub.subscribe(area, stat_ids)
+    
+    return StreamingResponse(
+        stream_events(request, station_hub, subscription),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # nginx가 이벤트를 버퍼링하지 않도록
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+# 충전소 상세정보 조회 (stat_id 목록으로 한 번에 조회, 충전기 목록은 camelCase JSON으로 묶어서 반환)
+STATION_DETAIL_QUERY = f"""
+    SELECT 
+        gc.stat_id, gc.stat_nm, gc.lat, gc.lng, gc.charger_types, gc.parking_free,
+        gc.total_chargers, gc.usable_chargers, gc.using_chargers, gc.max_output, gc.use_time,
+        gc.addr, gc.location, gc.busi_id, gc.bnm, gc.busi_nm, gc.busi_call, 
+        gc.zcode, gc.zscode, gc.kind, gc.kind_detail, gc.note, gc.limit_yn, 
+        gc.limit_detail, gc.traffic_yn, gc.last_update_time,
+        COALESCE(di.view_num, 0) as view_num,
+        {RECENT_DEPARTS_COLUMN} as departs_in_30m,
+        COALESCE(di.hourly_visit_num, ARRAY[]::INTEGER[]) as hourly_visit_num,
+        COALESCE((
+            SELECT json_agg(json_build_object(
+                'id', c.id, 'statId', c.stat_id, 'chgerId', c.chger_id, 'statNm', c.stat_nm,
+                'addr', c.addr, 'location', c.location, 'useTime', c.use_time, 'lat', c.lat,
+                'lng', c.lng, 'chgerType', c.chger_type, 'stat', c.stat, 'statUpdDt', c.stat_upd_dt,
+                'lastTsdt', c.last_tsdt, 'lastTedt', c.last_tedt, 'nowTsdt', c.now_tsdt, 'output', c.output,
+                'method', c.method, 'delYn', c.del_yn, 'delDetail', c.del_detail, 'busiId', c.busi_id,
+                'bnm', c.bnm, 'busiNm', c.busi_nm, 'busiCall', c.busi_call, 'zcode', c.zcode,
+                'zscode', c.zscode, 'kind', c.kind, 'kindDetail', c.kind_detail, 'parkingFree', c.parking_free,
+                'note', c.note, 'limitYn', c.limit_yn, 'limitDetail', c.limit_detail, 'trafficYn', c.traffic_yn,
+                'createdAt', c.created_at, 'updatedAt', c.updated_at
+            ) ORDER BY c.chger_id)
+            FROM chargers c
+            WHERE c.stat_id = gc.stat_id
+        ), '[]'::json) as chargers
+    FROM grouped_chargers gc
+    LEFT JOIN demand_info di ON gc.stat_id = di.stat_id
+    WHERE gc.stat_id = ANY(%s)
+"""
+
+# 충전소 간략정보 조회 (stat_id 목록으로 한 번에 조회)
+STATION_BRIEF_QUERY = f"""
+    SELECT 
+        gc.stat_id, gc.stat_nm, gc.lat, gc.lng, gc.charger_types, gc.parking_free,
+        gc.total_chargers, gc.usable_chargers, gc.using_chargers, 
+        gc.max_output, gc.use_time, gc.last_update_time,
+        COALESCE(di.view_num, 0) as view_num,
+        {RECENT_DEPARTS_COLUMN} as departs_in_30m,
+        COALESCE(di.hourly_visit_num, ARRAY[]::INTEGER[]) as hourly_visit_num
+    FROM grouped_chargers gc
+    LEFT JOIN demand_info di ON gc.stat_id = di.stat_id
+    WHERE gc.stat_id = ANY(%s)
+"""
+
+def format_station_detail(station, read_started):
+    """충전소 상세정보 응답 형식 구성 - StationDetailed 타입에 맞춤"""
+    # 30분 내 출발 데이터 (DB에서 이미 걸러서 정렬된 상태)
+    departs_list = [to_utc(dep).isoformat() for dep in station['departs_in_30m']]
+    
+    return {
+        "statId": station['stat_id'],
+        "info": {
+            "totalChargers": station['total_chargers'],
+            "usableChargers": station['usable_chargers'],
+            "usingChargers": station['using_chargers'],
+            "chargerTypes": station['charger_types'] if station['charger_types'] else [],
+            "maxOutput": str(station['max_output']) if station['max_output'] else "0",
+            "statNm": station['stat_nm'],
+            "addr": station.get('addr', ''),
+            "location": station.get('location', ''),
+            "useTime": station['use_time'],
+            "lat": str(station['lat']) if station['lat'] else "0",
+            "lng": str(station['lng']) if station['lng'] else "0",
+            "busiId": station.get('busi_id', ''),
+            "bnm": station.get('bnm', ''),
+            "busiNm": station.get('busi_nm', ''),
+            "busiCall": station.get('busi_call', ''),
+            "zcode": station.get('zcode', ''),
+            "zscode": station.get('zscode', ''),
+            "kind": station.get('kind', ''),
+            "kindDetail": station.get('kind_detail', ''),
+            "parkingFree": station['parking_free'],
+            "note": station.get('note', ''),
+            "limitYn": station.get('limit_yn', ''),
+            "limitDetail": station.get('limit_detail', ''),
+            "trafficYn": station.get('traffic_yn', '')
+        },
+        "chargers": station['chargers'] or [],
+        "lastUpdateTime": station['last_update_time'].isoformat() if station['last_update_time'] else None,
+        "demandInfo": {
+            "viewNum": pending_view_num(station['stat_id'], station['view_num'], read_started),
+            "departsIn30m": departs_list,
+            "hourlyVisitNum": station['hourly_visit_num'] if station['hourly_visit_num'] else []
+        } 
+    }
+
+def format_station_brief(station, read_started):
+    """충전소 간략정보 응답 형식 구성"""
+    # 30분 내 출발 데이터 (DB에서 이미 걸러서 정렬된 상태)
+    departs_list = [to_utc(dep).isoformat() for dep in station['departs_in_30m']]
+    
+    return {
+        "statId": station['stat_id'],
+        "info": {
+            "statNm": station['stat_nm'],
+            "lat": str(station['lat']) if station['lat'] else "0",
+            "lng": str(station['lng']) if station['lng'] else "0",
+            "chargerTypes": station['charger_types'] if station['charger_types'] else [],
+            "parkingFree": station['parking_free'],
+            "totalChargers": station['total_chargers'],
+            "usableChargers": station['usable_chargers'],
+            "usingChargers": station['using_chargers'],
+            "maxOutput": str(station['max_output']) if station['max_output'] else "0",
+            "useTime": station['use_time']
+        },
+        "lastUpdateTime": station['last_update_time'].isoformat() if station['last_update_time'] else None,
+        "demandInfo": {
+            "viewNum": pending_view_num(station['stat_id'], station['view_num'], read_started),
+            "departsIn30m": departs_list,
+            "hourlyVisitNum": station['hourly_visit_num'] if station['hourly_visit_num'] else []
+        } if station['view_num'] >= 0 or departs_list or station['hourly_visit_num'] else None
+    }
+
+def overloaded(error):
+    """과부하로 거절한 요청의 503 응답"""
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(error.retry_after)})
+
+async def query_limited(query, params, name, read_seq):
+    """동시 실행 제한 안에서 읽기 쿼리를 실행해 (조회 시작 시각, 결과) 반환 (슬롯을 얻지 못하면 OverloadedError)"""
+    async with station_admission.slot():
+        read_started = time.monotonic()
+        return read_started, await run_query(query, params, name=name, read_seq=read_seq)
+
+async def fetch_stations(stat_ids, detailed, etags=None):
+    """여러 충전소 정보를 stat_id별 JSON bytes로 조회 (충전소 수와 관계없이 쿼리 1회)
+
+    상세정보는 스냅샷의 last_update_time이 같은 동안 캐시의 JSON 조각으로 응답하고,
+    수요 정보만 스냅샷 값으로 채운다. etags에 dict를 넘기면 실제로 만든 응답 기준의
+    ETag(station_etag)도 stat_id별로 채운다.
+    """
+    found = {}
+    snapshot = station_cache.snapshot
+    if detailed and snapshot is not None:
+        now = datetime.now(timezone.utc)
+        for stat_id in stat_ids:
+            cached = snapshot.by_id.get(stat_id)
+            fragment = detail_cache.get(stat_id, cached.last_update_time) if cached else None
+            if fragment is not None:
+                demand_info = cached.demand_info(now)
+                found[stat_id] = with_field(fragment, "demandInfo", demand_info)
+                if etags is not None:
+                    etags[stat_id] = station_etag(stat_id, cached.last_update_time, demand_info, detailed)
+        stat_ids = [stat_id for stat_id in stat_ids if stat_id not in found]
+        if not stat_ids:
+            return found
+    
+    # 레플리카에서 읽을 때는 현재 스냅샷 버전 이상을 반영한 경우만 사용
+    read_seq = snapshot.change_seq if snapshot is not None else 0
+    # 같은 충전소 목록의 동시 조회는 쿼리 1회의 결과를 함께 사용
+    key = ('detail' if detailed else 'brief', tuple(sorted(stat_ids)), read_seq)
+    read_started, rows = await station_flight.run(key, query_limited,
+                                                  STATION_DETAIL_QUERY if detailed else STATION_BRIEF_QUERY,
+                                                  (list(stat_ids),),
+                                                  'station_detail' if detailed else 'station_brief', read_seq)
+    if rows is None:
+        raise RuntimeError("충전소 정보 조회 실패")
+    
+    for row in rows:
+        if not detailed:
+            brief = format_station_brief(row, read_started)
+            found[row['stat_id']] = dumps(brief)
+            if etags is not None:
+                etags[row['stat_id']] = station_etag(row['stat_id'], brief["lastUpdateTime"], brief["demandInfo"], detailed)
+            continue
+        detail = format_station_detail(row, read_started)
+        demand_info = detail.pop("demandInfo")
+        fragment = dumps(detail)[:-1]
+        detail_cache.put(row['stat_id'], detail["lastUpdateTime"], fragment)
+        found[row['stat_id']] = with_field(fragment, "demandInfo", demand_info)
+        if etags is not None:
+            etags[row['stat_id']] = station_etag(row['stat_id'], detail["lastUpdateTime"], demand_info, detailed)
+    return found
+
+# 여러 충전소의 정보를 한 번에 조회
+@app.post('/api/stations/batch')
+async def station_batch(request: StationBatchRequest):
+    try:
+        # 순서는 유지하고 중복은 제거
+        stat_ids = list(dict.fromkeys(stat_id for stat_id in request.statIds if stat_id))
+        if len(stat_ids) > MAX_BATCH_STATIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"statIds는 최대 {MAX_BATCH_STATIONS}개까지 요청할 수 있습니다"
+            )
+        if not stat_ids:
+            return {"stations": [], "notFound": []}
+        
+        found = await fetch_stations(stat_ids, detailed=not request.brief)
+        stations = join_array(found[stat_id] for stat_id in stat_ids if stat_id in found)
+        not_found = [stat_id for stat_id in stat_ids if stat_id not in found]
+        return Response(content=with_field(b'{"stations":' + stations, "notFound", not_found),
+                        media_type="application/json")
+        
+    except HTTPException:
+        raise
+    except OverloadedError as e:
+        raise overloaded(e)
+    except Exception as e:
+        print(f"Error in station_batch: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # 특정 충전소의 정보
 @app.get('/api/stations/{stat_id}')
-async def station_info(stat_id: str, brief: Optional[str] = Query(None)):
+async def station_info(request: Request, stat_id: str, brief: Optional[str] = Query(None)):
     try:
-        if brief == 'no':
-            # 상세정보 요청 - 모든 필드 포함
-            query = """
-                SELECT 
-                    gc.stat_id, gc.stat_nm, gc.lat, gc.lng, gc.charger_types, gc.parking_free,
-                    gc.total_chargers, gc.usable_chargers, gc.using_chargers, gc.max_output, gc.use_time,
-                    gc.addr, gc.location, gc.busi_id, gc.bnm, gc.busi_nm, gc.busi_call, 
-                    gc.zcode, gc.zscode, gc.kind, gc.kind_detail, gc.note, gc.limit_yn, 
-                    gc.limit_detail, gc.traffic_yn, gc.last_update_time,
-                    COALESCE(di.view_num, 0) as view_num,
-                    COALESCE(di.departs_in_30m, ARRAY[]::TIMESTAMP[]) as departs_in_30m,
-                    COALESCE(di.hourly_visit_num, ARRAY[]::INTEGER[]) as hourly_visit_num
-                FROM grouped_chargers gc
-                LEFT JOIN demand_info di ON gc.stat_id = di.stat_id
-                WHERE gc.stat_id = %s
-            """
-            
-            result = execute_query(query, (stat_id,))
-            if not result:
-                raise HTTPException(status_code=404, detail="Station not found")
-            
-            station = result[0]
-            
-            # 개별 충전기 정보 가져오기
-            chargers_query = """
-                SELECT * FROM chargers 
-                WHERE stat_id = %s 
-                ORDER BY chger_id
-            """
-            chargers = execute_query(chargers_query, (stat_id,))
-            
-            # 30분 내 출발 데이터에서 오래된 것 필터링
-            departs_list = []
-            if station['departs_in_30m']:
-                current_time = datetime.now(timezone.utc)
-                thirty_min_ago = current_time - timedelta(minutes=30)
-                
-                for dep in station['departs_in_30m']:
-                    # dep가 timezone naive인 경우 UTC로 간주하여 timezone aware로 변환
-                    if dep.tzinfo is None:
-                        dep_aware = dep.replace(tzinfo=timezone.utc)
-                    else:
-                        dep_aware = dep
-                    
-                    if dep_aware >= thirty_min_ago:
-                        departs_list.append(dep_aware.isoformat())
-            
-            # 응답 형식 구성 - StationDetailed 타입에 맞춤
-            response = {
-                "statId": station['stat_id'],
-                "info": {
-                    "totalChargers": station['total_chargers'],
-                    "usableChargers": station['usable_chargers'],
-                    "usingChargers": station['using_chargers'],
-                    "chargerTypes": station['charger_types'] if station['charger_types'] else [],
-                    "maxOutput": str(station['max_output']) if station['max_output'] else "0",
-                    "statNm": station['stat_nm'],
-                    "addr": station.get('addr', ''),
-                    "location": station.get('location', ''),
-                    "useTime": station['use_time'],
-                    "lat": str(station['lat']) if station['lat'] else "0",
-                    "lng": str(station['lng']) if station['lng'] else "0",
-                    "busiId": station.get('busi_id', ''),
-                    "bnm": station.get('bnm', ''),
-                    "busiNm": station.get('busi_nm', ''),
-                    "busiCall": station.get('busi_call', ''),
-                    "zcode": station.get('zcode', ''),
-                    "zscode": station.get('zscode', ''),
-                    "kind": station.get('kind', ''),
-                    "kindDetail": station.get('kind_detail', ''),
-                    "parkingFree": station['parking_free'],
-                    "note": station.get('note', ''),
-                    "limitYn": station.get('limit_yn', ''),
-                    "limitDetail": station.get('limit_detail', ''),
-                    "trafficYn": station.get('traffic_yn', '')
-                },
-                "chargers": [convert_charger_to_camel_case(dict(charger)) for charger in chargers] if chargers else [],
-                "lastUpdateTime": station['last_update_time'].isoformat() if station['last_update_time'] else None,
-                "demandInfo": {
-                    "viewNum": station['view_num'],
-                    "departsIn30m": departs_list,
-                    "hourlyVisitNum": station['hourly_visit_num'] if station['hourly_visit_num'] else []
-                } 
-            }
-            
-        else:
-            # 간략정보 요청
-            query = """
-                SELECT 
-                    gc.stat_id, gc.stat_nm, gc.lat, gc.lng, gc.charger_types, gc.parking_free,
-                    gc.total_chargers, gc.usable_chargers, gc.using_chargers, 
-                    gc.max_output, gc.use_time, gc.last_update_time,
-                    COALESCE(di.view_num, 0) as view_num,
-                    COALESCE(di.departs_in_30m, ARRAY[]::TIMESTAMP[]) as departs_in_30m,
-                    COALESCE(di.hourly_visit_num, ARRAY[]::INTEGER[]) as hourly_visit_num
-                FROM grouped_chargers gc
-                LEFT JOIN demand_info di ON gc.stat_id = di.stat_id
-                WHERE gc.stat_id = %s
-            """
-            
-            result = execute_query(query, (stat_id,))
-            if not result:
-                raise HTTPException(status_code=404, detail="Station not found")
-            
-            station = result[0]
-            
-            # 30분 내 출발 데이터에서 오래된 것 필터링
-            departs_list = []
-            if station['departs_in_30m']:
-                current_time = datetime.now(timezone.utc)
-                thirty_min_ago = current_time - timedelta(minutes=30)
-                
-                for dep in station['departs_in_30m']:
-                    # dep가 timezone naive인 경우 UTC로 간주하여 timezone aware로 변환
-                    if dep.tzinfo is None:
-                        dep_aware = dep.replace(tzinfo=timezone.utc)
-                    else:
-                        dep_aware = dep
-                    
-                    if dep_aware >= thirty_min_ago:
-                        departs_list.append(dep_aware.isoformat())
-            
-            response = {
-                "statId": station['stat_id'],
-                "info": {
-                    "statNm": station['stat_nm'],
-                    "lat": str(station['lat']) if station['lat'] else "0",
-                    "lng": str(station['lng']) if station['lng'] else "0",
-                    "chargerTypes": station['charger_types'] if station['charger_types'] else [],
-                    "parkingFree": station['parking_free'],
-                    "totalChargers": station['total_chargers'],
-                    "usableChargers": station['usable_chargers'],
-                    "usingChargers": station['using_chargers'],
-                    "maxOutput": str(station['max_output']) if station['max_output'] else "0",
-                    "useTime": station['use_time']
-                },
-                "lastUpdateTime": station['last_update_time'].isoformat() if station['last_update_time'] else None,
-                "demandInfo": {
-                    "viewNum": station['view_num'],
-                    "departsIn30m": departs_list,
-                    "hourlyVisitNum": station['hourly_visit_num'] if station['hourly_visit_num'] else []
-                } if station['view_num'] >= 0 or departs_list or station['hourly_visit_num'] else None
-            }
+        # 스냅샷 값 기준으로 바뀐 것이 없으면 DB 조회 없이 304 응답
+        snapshot = await station_cache.get()
+        cached = snapshot.by_id.get(stat_id) if snapshot else None
+        snapshot_etag = last_modified = None
+        if cached is not None:
+            snapshot_etag, last_modified = cached.validators(datetime.now(timezone.utc), brief == 'no')
+            if is_not_modified(request, snapshot_etag, last_modified):
+                return not_modified_response(snapshot_etag, last_modified)
+        
+        etags = {}
+        found = await fetch_stations([stat_id], detailed=brief == 'no', etags=etags)
+        if stat_id not in found:
+            raise HTTPException(status_code=404, detail="Station not found")
+        
+        # 검증자는 실제로 보내는 본문 기준 (DB 값이 스냅샷과 다르면 스냅샷의 Last-Modified는 쓰지 않음)
+        etag = etags[stat_id]
+        if etag != snapshot_etag:
+            last_modified = None
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
         
-        return response
+        return Response(content=found[stat_id], media_type="application/json",
+                        headers=validator_headers(etag, last_modified))
         
     except HTTPException:
         raise
+    except OverloadedError as e:
+        raise overloaded(e)
     except Exception as e:
         print(f"Error in station_info: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -463,23 +583,10 @@ async def station_info(stat_id: str, brief: Optional[str] = Query(None)):
 @app.put('/api/stations/{stat_id}/view-num/up')
 async def increase_view_num(stat_id: str):
     try:
-        # 조회수 증가 (UPSERT 방식)
-        query = """
-            INSERT INTO demand_info (stat_id, view_num)
-            VALUES (%s, 1)
-            ON CONFLICT (stat_id)
-            DO UPDATE SET view_num = demand_info.view_num + 1
-        """
-        
-        result = execute_query(query, (stat_id,), fetch=False)
-        
-        if result is not None and result >= 0:
-            return {"message": "success"}
-        else:
-            raise HTTPException(status_code=404, detail="Station not found")
+        # 조회수 증가는 모아서 한 번에 반영 (조회 응답에는 바로 반영됨)
+        view_counter.add(stat_id, 1)
+        return {"message": "success"}
             
-    except HTTPException:
-        raise
     except Exception as e:
         print(f"Error in increase_view_num: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -488,19 +595,15 @@ async def increase_view_num(stat_id: str):
 @app.put('/api/stations/{stat_id}/view-num/down')
 async def decrease_view_num(stat_id: str):
     try:
-        # 조회수 감소 (0 이하로는 내려가지 않도록)
-        query = """
-            UPDATE demand_info 
-            SET view_num = GREATEST(view_num - 1, 0)
-            WHERE stat_id = %s
-        """
-        
-        result = execute_query(query, (stat_id,), fetch=False)
-        
-        if result is not None and result > 0:
-            return {"message": "success"}
-        else:
+        # 모르는 충전소이고 반영 대기 중인 증가분도 없으면 404
+        snapshot = await station_cache.get()
+        known = snapshot is not None and stat_id in snapshot.by_id
+        if not known and view_counter.delta_for(stat_id, snapshot.loaded_at if snapshot else 0.0) <= 0:
             raise HTTPException(status_code=404, detail="Station not found")
+        
+        # 조회수 감소는 모아서 한 번에 반영 (0 이하로는 내려가지 않도록)
+        view_counter.add(stat_id, -1)
+        return {"message": "success"}
             
     except HTTPException:
         raise
@@ -518,20 +621,44 @@ async def add_depart_time(stat_id: str, request: DepartTimeRequest):
             raise HTTPException(status_code=400, detail="depart_time is required")
         
         depart_time = datetime.fromisoformat(depart_time_str.replace('Z', '+00:00'))
+        # DB에는 UTC 기준 timezone naive 값으로 저장
+        if depart_time.tzinfo is not None:
+            depart_time = depart_time.astimezone(timezone.utc).replace(tzinfo=None)
         
-        # 기존 출발 시간 배열에 새로운 시간 추가
+        # 새로운 시간을 추가하면서 30분이 지난 시간은 버리고 최근 것만 최대 개수까지 유지
         query = """
-            INSERT INTO demand_info (stat_id, view_num, departs_in_30m)
-            VALUES (%s, 0, ARRAY[%s])
-            ON CONFLICT (stat_id)
-            DO UPDATE SET 
-                departs_in_30m = array_append(COALESCE(demand_info.departs_in_30m, ARRAY[]::TIMESTAMP[]), %s),
-                updated_at = CURRENT_TIMESTAMP
+            WITH updated AS (
+                INSERT INTO demand_info (stat_id, view_num, departs_in_30m)
+                VALUES (%(stat_id)s, 0, ARRAY[%(depart_time)s::TIMESTAMP])
+                ON CONFLICT (stat_id)
+                DO UPDATE SET 
+                    departs_in_30m = ARRAY(
+                        SELECT dep FROM (
+                            SELECT dep
+                            FROM unnest(array_append(
+                                COALESCE(demand_info.departs_in_30m, ARRAY[]::TIMESTAMP[]),
+                                %(depart_time)s::TIMESTAMP
+                            )) AS dep
+                            WHERE dep >= (NOW() AT TIME ZONE 'UTC') - INTERVAL '30 minutes'
+                            ORDER BY dep DESC
+                            LIMIT %(max_departs)s
+                        ) recent
+                        ORDER BY dep
+                    ),
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING stat_id
+            )
+            INSERT INTO station_changes (stat_id, change_type)
+            SELECT stat_id, 'demand' FROM updated
+            RETURNING stat_id
         """
         
-        result = execute_query(query, (stat_id, depart_time, depart_time), fetch=False)
+        params = {'stat_id': stat_id, 'depart_time': depart_time, 'max_departs': MAX_DEPARTS_PER_STATION}
+        result = await run_query(query, params, name='add_depart_time')
         
-        if result is not None and result >= 0:
+        if result is not None:
+            await get_pool().run(note_write_seq, result)
+            station_cache.mark_stale()
             return {"message": "success"}
         else:
             raise HTTPException(status_code=404, detail="Station not found")
@@ -542,33 +669,120 @@ async def add_depart_time(stat_id: str, request: DepartTimeRequest):
         print(f"Error in add_depart_time: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# 헬스체크의 마지막 DB 확인 결과
+_db_health = {'checkedAt': None, 'database': None, 'error': None}
+
 # 헬스체크 엔드포인트
 @app.get('/api/health')
 async def health_check():
-    """API 서버와 데이터베이스 연결 상태 확인"""
-    try:
-        conn = get_db_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.close()
-            conn.close()
-            return {
-                'status': 'healthy',
-                'database': 'connected',
-                'timestamp': datetime.now().isoformat()
-            }
+    """프로세스 생존 확인 (트래픽을 받을 준비가 되었는지는 /api/ready)
+
+    DB는 풀에 보관된 연결로 HEALTH_DB_CHECK_INTERVAL마다 한 번만 확인하고,
+    그 사이의 요청은 마지막 결과를 그대로 돌려준다.
+    """
+    pool = get_pool()
+    router = get_replica_router()
+    now = time.monotonic()
+    if _db_health['checkedAt'] is None or now - _db_health['checkedAt'] >= HEALTH_DB_CHECK_INTERVAL:
+        _db_health['checkedAt'] = now
+        stats = pool.stats()
+        if stats['waiting'] > 0 or stats['inUse'] >= stats['maxSize']:
+            # 연결이 모두 사용 중이면 기다리지 않음 (바쁜 것이지 죽은 것은 아님)
+            _db_health.update(database='busy', error=None)
         else:
-            return {
-                'status': 'unhealthy',
-                'database': 'disconnected',
-                'timestamp': datetime.now().isoformat()
-            }
+            try:
+                await pool.run(ping)
+                _db_health.update(database='connected', error=None)
+            except PoolTimeoutError:
+                _db_health.update(database='busy', error=None)
+            except Exception as e:
+                _db_health.update(database='error', error=str(e))
+
+    result = {
+        'status': 'unhealthy' if _db_health['database'] == 'error' else 'healthy',
+        'ready': readiness.ready,
+        'database': _db_health['database'],
+        'pool': pool.stats(),
+        'replica': dict(router.replica.stats(), **router.stats()) if router is not None else None,
+        'detailCache': detail_cache.stats(),
+        'admission': station_admission.stats(),
+        'changeListener': change_listener.stats() if change_listener is not None else None,
+        'timestamp': datetime.now().isoformat()
+    }
+    if _db_health['error']:
+        result['error'] = _db_health['error']
+    return result
+
+# 엣지 캐시(nginx)가 캐시 키에 넣는 데이터 버전 (수집 직후 바뀌어 이전 캐시 항목을 더 쓰지 않음)
+# nginx는 이 응답이 2xx가 아니면 요청 자체를 500으로 막으므로 항상 200으로 응답하고,
+# 스냅샷이 아직 없거나 오류가 나면 X-Data-Version 없이 보내 nginx가 캐시를 거치지 않게 한다.
+@app.get('/api/data-version')
+async def data_version():
+    version = None
+    try:
+        # 스냅샷 적재를 기다리지 않음 (적재 중에도 요청은 캐시 없이 백엔드로)
+        if station_cache.snapshot is not None:
+            snapshot = await station_cache.get()
+            version = snapshot.ingest_tag
     except Exception as e:
-        return {
-            'status': 'unhealthy',
-            'database': 'error',
-            'error': str(e),
-            'timestamp': datetime.now().isoformat()
-        }
+        print(f"Error in data_version: {e}")
+    headers = {"Cache-Control": "no-cache"}
+    if version is not None:
+        headers["X-Data-Version"] = version
+    return Response(content=dumps({"version": version}), media_type="application/json", headers=headers)
+
+# 서버 준비 완료 여부 (배포 스크립트가 nginx 전환 전에 확인, ALB 헬스체크도 nginx를 거쳐 이 경로 사용)
+@app.get('/api/ready')
+async def ready_check():
+    """커넥션 예열과 충전소 스냅샷/캐시 생성이 끝났으면 200, 아니면 503"""
+    status = readiness.status()
+    if not readiness.ready:
+        return JSONResponse(status_code=503, content=status, headers={"Retry-After": "2"})
+    return status
+
+# Prometheus 지표 (관리자 엔드포인트와 같이 X-Admin-Token 필요)
+# ALB/도커 브리지를 거친 요청은 모두 사설 IP로 보여 출발지 주소로는 외부 요청을 가릴 수 없음
+@app.get('/metrics')
+async def metrics(request: Request):
+    require_admin(request)
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+def require_admin(request: Request):
+    """X-Admin-Token 헤더로 관리자 확인"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(request.headers.get('x-admin-token', ''), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+# 쿼리별 실행 통계와 느린 쿼리 실행 계획 (총 실행 시간 순)
+@app.get('/api/admin/queries')
+async def admin_queries(request: Request):
+    require_admin(request)
+    return {
+        "slowMs": query_profiler.slow_ms,
+        "queries": query_profiler.snapshot()
+    }
+
+# 쿼리 실행 통계 초기화
+@app.delete('/api/admin/queries')
+async def reset_admin_queries(request: Request):
+    require_admin(request)
+    query_profiler.reset()
+    return {"message": "success"}
+
+# 요청 프로파일러 상태와 최근 저장된 프로파일 목록
+@app.get('/api/admin/profiler')
+async def admin_profiler(request: Request):
+    require_admin(request)
+    # 저장된 프로파일 파일 읽기는 이벤트 루프 밖에서
+    profiles = await asyncio.to_thread(request_profiler.recent)
+    return dict(request_profiler.state(), profiles=profiles)
 
+# 요청 샘플링 비율 변경 (0이면 X-Profile 헤더 요청만 프로파일링)
+@app.put('/api/admin/profiler')
+async def update_admin_profiler(request: Request, settings: ProfilerSettingsRequest):
+    require_admin(request)
+    if not 0 <= settings.sampleRate <= 1:
+        raise HTTPException(status_code=400, detail="sampleRate must be between 0 and 1")
+    request_profiler.sample_rate = settings.sampleRate
+    return request_profiler.state()
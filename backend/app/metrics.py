@@ -0,0 +1,213 @@
+import threading
+import time
+from bisect import bisect_left
+
+# 응답 시간 / DB 쿼리 시간 / 응답 크기 히스토그램 구간
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """라벨 값 조합별로 값을 보관하는 지표 (스레드 안전)"""
+
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_items(items))
+        return lines
+
+    def _render_items(self, items):
+        return [f'{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}'
+                for labels, value in items]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [구간별 개수..., +Inf 개수, 합계]
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[bisect_left(self.buckets, value)] += 1
+            state[-1] += value
+
+    def _render_items(self, items):
+        lines = []
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                bucket_labels = _format_labels(self.label_names, labels, f'le="{_format_value(float(bound))}"')
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(state[-1])}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class Registry:
+    """지표 목록과, 노출 시점에 값을 읽어 오는 수집 함수들"""
+
+    def __init__(self):
+        self._metrics = []
+        # () -> [(이름, 종류, 설명, {라벨: 값} 또는 값)]
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        """Prometheus 텍스트 형식으로 출력"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                print(f"지표 수집 오류: {e}")
+                continue
+            for name, kind, help_text, value in samples:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                if isinstance(value, dict):
+                    for labels, sample in sorted(value.items()):
+                        label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels)
+                        lines.append(f'{name}{{{label_text}}} {_format_value(sample)}')
+                else:
+                    lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests_total = registry.register(Counter(
+    'http_requests_total', 'HTTP 요청 수', ('method', 'route', 'status')))
+http_request_duration = registry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP 요청 처리 시간 (초)', ('method', 'route')))
+http_response_size = registry.register(Histogram(
+    'http_response_size_bytes', 'HTTP 응답 본문 크기 (바이트)', ('method', 'route'), SIZE_BUCKETS))
+http_requests_in_flight = registry.register(Gauge(
+    'http_requests_in_flight', '처리 중인 HTTP 요청 수'))
+
+db_query_duration = registry.register(Histogram(
+    'db_query_duration_seconds', 'DB 쿼리 실행 시간 (초, 연결 대기 제외)', ('statement', 'pool'), DB_BUCKETS))
+db_query_errors_total = registry.register(Counter(
+    'db_query_errors_total', 'DB 쿼리 실패 수', ('statement', 'pool')))
+db_pool_acquire_duration = registry.register(Histogram(
+    'db_pool_acquire_seconds', '커넥션 풀에서 연결을 얻기까지 걸린 시간 (초)', ('pool',), DB_BUCKETS))
+
+
+# 앱별 엔드포인트 -> 경로 템플릿
+_route_paths = {}
+
+
+def route_path(scope):
+    """요청을 처리한 엔드포인트의 경로 템플릿 (/api/stations/{stat_id})"""
+    endpoint = scope.get('endpoint')
+    app = scope.get('app')
+    if endpoint is None or app is None:
+        return 'unmatched'
+    paths = _route_paths.get(id(app))
+    if paths is None:
+        paths = _route_paths[id(app)] = {getattr(route, 'endpoint', None): route.path for route in app.routes}
+    return paths.get(endpoint, 'unmatched')
+
+
+class MetricsMiddleware:
+    """라우트별 요청 수/처리 시간/응답 크기/처리 중 요청 수를 기록하는 ASGI 미들웨어
+
+    라우트는 경로 템플릿(/api/stations/{stat_id})으로 묶고, 스트리밍 응답도
+    마지막 본문 조각을 보낼 때까지를 처리 시간으로 본다.
+    """
+
+    def __init__(self, app, skip_paths=('/metrics',)):
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        started = time.perf_counter()
+        state = {'status': 500, 'size': 0}
+        http_requests_in_flight.inc()
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                state['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                state['size'] += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            route = route_path(scope)
+            http_requests_total.inc(method, route, str(state['status']))
+            http_request_duration.observe(method, route, value=time.perf_counter() - started)
+            http_response_size.observe(method, route, value=state['size'])
@@ -0,0 +1,328 @@
+"""DB 스키마 마이그레이션
+
+API 서버와 수집 Lambda가 쓰는 테이블/인덱스를 버전별로 관리한다.
+적용된 버전은 schema_migrations 테이블에 기록하고, 서버와 Lambda는 시작할 때
+DDL을 실행하지 않고 SCHEMA_VERSION까지 적용되었는지만 확인한다 (Lambda는 버전 번호 대신
+마이그레이션 4의 notify_station_data 함수가 있는지 확인).
+
+    cd backend && python -m app.migrations          # 남은 마이그레이션 적용
+    cd backend && python -m app.migrations --status # 적용 상태만 출력
+"""
+import argparse
+from collections import namedtuple
+
+import psycopg2
+
+from app.db import execute_query, load_postgres_config
+
+# transactional=False인 마이그레이션은 CREATE INDEX CONCURRENTLY처럼 트랜잭션 안에서
+# 실행할 수 없는 문장을 하나씩 autocommit으로 실행한다 (재실행해도 안전하게 IF NOT EXISTS 사용).
+# 중간에 실패하면 INVALID 상태의 인덱스가 남을 수 있으므로, 그 인덱스를 지운 뒤 다시 실행해야 한다.
+Migration = namedtuple('Migration', ['version', 'description', 'statements', 'transactional'])
+
+# station_changes에 쓴 트랜잭션이 커밋할 때 seq를 하나씩 발급받게 하는 advisory lock 키 (마이그레이션 3)
+STATION_CHANGES_LOCK_ID = 7301191
+
+# 데이터 변경 알림 채널 (마이그레이션 4의 notify_station_data 함수가 보내고 app.notify가 LISTEN)
+STATION_DATA_CHANNEL = 'station_data'
+
+MIGRATIONS = [
+    Migration(1, '기본 테이블 (기존 서버/Lambda 시작 시 생성하던 스키마)', [
+        """
+        CREATE TABLE IF NOT EXISTS chargers (
+            id SERIAL PRIMARY KEY,
+            stat_id VARCHAR(50) NOT NULL,
+            chger_id VARCHAR(50) NOT NULL,
+            stat_nm VARCHAR(200),
+            addr TEXT,
+            location TEXT,
+            use_time TEXT,
+            lat DECIMAL(10, 8),
+            lng DECIMAL(11, 8),
+            chger_type VARCHAR(10),
+            stat VARCHAR(2),
+            stat_upd_dt VARCHAR(20),
+            last_tsdt VARCHAR(20),
+            last_tedt VARCHAR(20),
+            now_tsdt VARCHAR(20),
+            output INT,
+            method VARCHAR(10),
+            del_yn VARCHAR(1),
+            del_detail VARCHAR(200),
+            busi_id VARCHAR(50),
+            bnm VARCHAR(200),
+            busi_nm VARCHAR(200),
+            busi_call VARCHAR(20),
+            zcode VARCHAR(10),
+            zscode VARCHAR(10),
+            kind VARCHAR(50),
+            kind_detail VARCHAR(100),
+            parking_free VARCHAR(1),
+            note TEXT,
+            limit_yn VARCHAR(1),
+            limit_detail TEXT,
+            traffic_yn VARCHAR(1),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(stat_id, chger_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS grouped_chargers (
+            stat_id VARCHAR(50) PRIMARY KEY,
+            stat_nm VARCHAR(200),
+            addr TEXT,
+            location TEXT,
+            use_time TEXT,
+            lat DECIMAL(10, 8),
+            lng DECIMAL(11, 8),
+            total_chargers INTEGER DEFAULT 0,
+            usable_chargers INTEGER DEFAULT 0,
+            using_chargers INTEGER DEFAULT 0,
+            charger_types TEXT[],
+            max_output INTEGER DEFAULT 0,
+            busi_id VARCHAR(50),
+            bnm VARCHAR(200),
+            busi_nm VARCHAR(200),
+            busi_call VARCHAR(20),
+            zcode VARCHAR(10),
+            zscode VARCHAR(10),
+            kind VARCHAR(50),
+            kind_detail VARCHAR(100),
+            parking_free VARCHAR(1),
+            note TEXT,
+            limit_yn VARCHAR(1),
+            limit_detail TEXT,
+            traffic_yn VARCHAR(1),
+            last_update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS demand_info (
+            id SERIAL PRIMARY KEY,
+            stat_id VARCHAR(50) UNIQUE NOT NULL,
+            view_num INTEGER DEFAULT 0,
+            departs_in_30m TIMESTAMP[],
+            hourly_visit_num INTEGER[],
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "ALTER TABLE demand_info ADD COLUMN IF NOT EXISTS departs_in_30m TIMESTAMP[]",
+        "ALTER TABLE demand_info ADD COLUMN IF NOT EXISTS hourly_visit_num INTEGER[]",
+        """
+        CREATE TABLE IF NOT EXISTS station_changes (
+            seq BIGSERIAL PRIMARY KEY,
+            stat_id VARCHAR(50) NOT NULL,
+            change_type VARCHAR(10) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_station_changes_created ON station_changes(created_at)",
+        """
+        CREATE TABLE IF NOT EXISTS history_chargers (
+            id SERIAL PRIMARY KEY,
+            stat_id VARCHAR(50) NOT NULL,
+            chger_id VARCHAR(50) NOT NULL,
+            visit_num INTEGER DEFAULT 0,
+            cur_stat VARCHAR(2),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (stat_id, chger_id, updated_at)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS history_stations (
+            id SERIAL PRIMARY KEY,
+            stat_id VARCHAR(50),
+            charger_count INTEGER DEFAULT 0,
+            visit_num INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (stat_id, updated_at)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_history_chargers_stat_chger ON history_chargers(stat_id, chger_id)",
+        "CREATE INDEX IF NOT EXISTS idx_history_stations_stat ON history_stations(stat_id)",
+    ], True),
+    Migration(2, '방문자 이력 조회/정리용 인덱스', [
+        # 충전기별 가장 최근 이력 (WHERE stat_id = ? AND chger_id = ? ORDER BY updated_at DESC LIMIT 1)
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_history_chargers_latest
+            ON history_chargers (stat_id, chger_id, updated_at DESC)
+        """,
+        # 위 인덱스의 앞부분과 같아 더 이상 필요 없음
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_history_chargers_stat_chger",
+        # 최근 30분 이력 집계와 30일 지난 이력 삭제
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_history_chargers_updated ON history_chargers (updated_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_history_stations_updated ON history_stations (updated_at)",
+    ], False),
+    Migration(3, '변경 이력 seq를 커밋할 때 발급 (seq 순서와 커밋 순서를 일치시킴)', [
+        # BIGSERIAL 기본값은 INSERT 때 발급되므로, 수집 Lambda의 긴 트랜잭션이 받은 seq보다 큰 seq를
+        # 조회수/출발 시각 쓰기가 먼저 커밋하면 MAX(seq)가 아직 보이지 않는 행을 건너뛴다.
+        # INSERT 때는 임시 음수 seq를 넣고, 커밋 직전(지연 트리거)에 잠금을 잡은 뒤 진짜 seq로 바꾼다.
+        # 잠금은 커밋이 끝나면 풀리므로 쓰기 트랜잭션끼리는 커밋하는 순간만 줄을 서고, 보이는 seq는 항상
+        # 빈틈없는 앞부분이 되어 MAX(seq)를 변경분 조회/레플리카 확인 기준으로 쓸 수 있다.
+        # 음수 seq는 커밋 전에만 있으므로 다른 트랜잭션에는 보이지 않는다 (RETURNING seq는 임시 번호).
+        "CREATE SEQUENCE IF NOT EXISTS station_changes_pending_seq",
+        "ALTER TABLE station_changes ALTER COLUMN seq SET DEFAULT -nextval('station_changes_pending_seq')",
+        f"""
+        CREATE OR REPLACE FUNCTION station_changes_assign_seq() RETURNS void AS $$
+        BEGIN
+            -- 다른 트랜잭션의 커밋 전 행은 보이지 않으므로 seq < 0인 행은 이 트랜잭션이 쓴 행뿐
+            IF EXISTS (SELECT 1 FROM station_changes WHERE seq < 0) THEN
+                PERFORM pg_advisory_xact_lock({STATION_CHANGES_LOCK_ID});
+                UPDATE station_changes SET seq = nextval('station_changes_seq_seq') WHERE seq < 0;
+            END IF;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION station_changes_assign_seq_at_commit() RETURNS trigger AS $$
+        BEGIN
+            -- 첫 행의 트리거가 트랜잭션의 행을 모두 바꾸므로 나머지는 인덱스 확인만 하고 끝남
+            PERFORM station_changes_assign_seq();
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS station_changes_assign_seq ON station_changes",
+        """
+        CREATE CONSTRAINT TRIGGER station_changes_assign_seq
+            AFTER INSERT ON station_changes
+            DEFERRABLE INITIALLY DEFERRED
+            FOR EACH ROW EXECUTE FUNCTION station_changes_assign_seq_at_commit()
+        """,
+    ], True),
+    Migration(4, '데이터 변경 알림 함수 (Lambda가 채널 이름을 따로 갖지 않도록)', [
+        # 수집/수요 Lambda가 커밋 직전에 호출 (트랜잭션이 커밋될 때만 알림이 전달됨)
+        # 알림의 seq에 이 트랜잭션의 변경 이력이 들어가도록 커밋 전에 seq를 미리 발급받는다.
+        f"""
+        CREATE OR REPLACE FUNCTION notify_station_data(source text) RETURNS void AS $$
+        BEGIN
+            PERFORM station_changes_assign_seq();
+            PERFORM pg_notify('{STATION_DATA_CHANNEL}', json_build_object(
+                'source', source,
+                'seq', (SELECT COALESCE(MAX(seq), 0) FROM station_changes)
+            )::text);
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+    ], True),
+]
+
+# 서버와 Lambda가 요구하는 스키마 버전
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+# 서버 여러 대가 동시에 마이그레이션하지 않도록 잡는 advisory lock 키
+MIGRATION_LOCK_ID = 7301190
+
+SCHEMA_VERSION_QUERY = """
+    SELECT COALESCE(MAX(version), 0) as version
+    FROM schema_migrations
+"""
+
+CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+class SchemaVersionError(Exception):
+    """DB 스키마가 SCHEMA_VERSION보다 오래된 경우"""
+
+
+def check_schema_version():
+    """적용된 스키마 버전 확인 (마이그레이션 전이면 SchemaVersionError)"""
+    try:
+        version = execute_query(SCHEMA_VERSION_QUERY, name='schema_version')[0]['version']
+    except Exception as e:
+        raise SchemaVersionError(f"schema_migrations 조회 실패: {e}") from e
+    if version < SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"DB 스키마 버전 {version} < {SCHEMA_VERSION}: 'python -m app.migrations'를 먼저 실행하세요")
+    return version
+
+
+def applied_versions(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            return []
+        cursor.execute("SELECT version FROM schema_migrations ORDER BY version")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def apply_migration(conn, migration):
+    """마이그레이션 하나 적용 후 버전 기록 (conn은 autocommit)"""
+    with conn.cursor() as cursor:
+        if migration.transactional:
+            cursor.execute("BEGIN")
+            try:
+                for statement in migration.statements:
+                    cursor.execute(statement)
+                cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                               (migration.version, migration.description))
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        else:
+            for statement in migration.statements:
+                cursor.execute(statement)
+            cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                           (migration.version, migration.description))
+
+
+def migrate(conn, target=None):
+    """target 버전(기본: 마지막)까지 남은 마이그레이션 적용, 적용한 버전 목록 반환"""
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(CREATE_MIGRATIONS_TABLE)
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    try:
+        applied = set(applied_versions(conn))
+        done = []
+        for migration in MIGRATIONS:
+            if migration.version in applied or (target is not None and migration.version > target):
+                continue
+            print(f"마이그레이션 {migration.version} 적용 중: {migration.description}")
+            apply_migration(conn, migration)
+            done.append(migration.version)
+        return done
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='DB 스키마 마이그레이션')
+    parser.add_argument('--status', action='store_true', help='적용 상태만 출력')
+    parser.add_argument('--target', type=int, default=None, help='이 버전까지만 적용')
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**load_postgres_config())
+    try:
+        if args.status:
+            applied = set(applied_versions(conn))
+            for migration in MIGRATIONS:
+                mark = '✅' if migration.version in applied else '⏳'
+                print(f"{mark} {migration.version}: {migration.description}")
+            return
+        done = migrate(conn, args.target)
+        if done:
+            print(f"마이그레이션 완료: {', '.join(map(str, done))}")
+        else:
+            print(f"적용할 마이그레이션 없음 (버전 {SCHEMA_VERSION})")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
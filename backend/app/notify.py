@@ -0,0 +1,167 @@
+import asyncio
+import json
+import os
+
+import psycopg2
+from psycopg2 import extensions
+
+from app.db import load_postgres_config
+from app.metrics import registry
+from app.migrations import STATION_DATA_CHANNEL
+from app.snapshot import station_cache
+
+
+class DataChangeListener:
+    """수집/수요 Lambda의 데이터 변경 알림(LISTEN/NOTIFY)을 받아 스냅샷을 바로 다시 확인
+
+    알림은 Lambda 트랜잭션이 커밋될 때만 전달되므로, 받은 시점에는 새 데이터를 읽을 수 있다.
+    짧은 시간에 여러 알림이 오면 확인 한 번으로 묶는다. 연결이 끊기면 재접속 후 놓친 알림이
+    있을 수 있으므로 한 번 다시 확인한다. 알림을 못 받는 동안에도 기존 검증 주기(ttl)는 그대로 동작한다.
+    """
+
+    def __init__(self, config, channel=STATION_DATA_CHANNEL, retry_interval=5.0, max_retry_interval=60.0):
+        self.config = dict(config)
+        self.channel = channel
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self._conn = None
+        self._task = None
+        self._refresh_task = None
+        self._wake = None
+        self._closed = None
+        # 마지막으로 받은 알림 (출처, 커밋 시점의 변경 이력 번호)
+        self.last_source = None
+        self.last_seq = None
+        # 지표용 (출처별 받은 알림 수, 알림으로 실행한 확인 수, 재접속 수)
+        self.received = {}
+        self.refreshes = 0
+        self.reconnects = 0
+
+    @property
+    def connected(self):
+        return self._conn is not None
+
+    def start(self):
+        """백그라운드 수신 작업 시작"""
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    def _connect(self):
+        """알림 수신 전용 연결 (블로킹, 스레드에서 실행)"""
+        conn = psycopg2.connect(
+            **self.config,
+            connect_timeout=5,
+            # 네트워크가 조용히 끊긴 경우도 감지하도록 TCP keepalive 사용
+            keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3,
+        )
+        conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.channel}")
+        return conn
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        delay = self.retry_interval
+        while True:
+            try:
+                conn = await asyncio.to_thread(self._connect)
+            except Exception as e:
+                print(f"데이터 변경 알림 연결 실패, {delay:.0f}초 후 재시도: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_interval)
+                continue
+
+            delay = self.retry_interval
+            self._conn = conn
+            self._closed = loop.create_future()
+            loop.add_reader(conn.fileno(), self._on_readable)
+            print(f"데이터 변경 알림 수신 시작 (채널 {self.channel})")
+            # 연결되지 않은 동안 커밋된 변경이 있을 수 있음
+            self._wake.set()
+            try:
+                await self._closed
+            finally:
+                loop.remove_reader(conn.fileno())
+                self._conn = None
+                conn.close()
+            self.reconnects += 1
+            await asyncio.sleep(self.retry_interval)
+
+    def _on_readable(self):
+        """수신 연결에 읽을 데이터가 있을 때 (이벤트 루프에서 호출)"""
+        conn = self._conn
+        try:
+            conn.poll()
+        except Exception as e:
+            print(f"데이터 변경 알림 연결 끊김 (재접속): {e}")
+            if not self._closed.done():
+                self._closed.set_result(None)
+            return
+        while conn.notifies:
+            self._on_notify(conn.notifies.pop(0).payload)
+
+    def _on_notify(self, payload):
+        """알림 내용 기록 후 확인 예약 (payload: {"source": 작업 이름, "seq": 커밋 시점의 변경 이력 번호})"""
+        try:
+            data = json.loads(payload) if payload else {}
+        except ValueError:
+            data = {}
+        source = str(data.get('source', 'unknown'))
+        self.received[source] = self.received.get(source, 0) + 1
+        self.last_source = source
+        self.last_seq = data.get('seq')
+        self._wake.set()
+
+    async def _refresh_loop(self):
+        """알림을 받으면 스냅샷 버전 확인 (확인 중에 온 알림은 끝난 뒤 한 번 더 확인)
+
+        수집 Lambda는 변경 이력이 없어도 모든 충전소의 last_update_time을 새로 쓰므로 알림의
+        변경 이력 번호로 건너뛰지 않는다. 데이터 버전이 그대로면 확인 쿼리 한 번으로 끝난다.
+        """
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            # 아직 스냅샷이 없으면 첫 적재가 최신 데이터를 읽음
+            if station_cache.snapshot is None:
+                continue
+            self.refreshes += 1
+            await station_cache.refresh()
+
+    async def close(self):
+        """수신 중지 (작업이 끝날 때까지 기다려 _run의 finally에서 reader 해제와 연결 종료가 끝나게 함)"""
+        tasks = [task for task in (self._task, self._refresh_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = self._refresh_task = None
+
+    def metrics(self):
+        """데이터 변경 알림 지표"""
+        return [
+            ('data_change_listener_connected', 'gauge', '데이터 변경 알림 수신 연결 여부 (1이면 연결됨)',
+             1 if self.connected else 0),
+            ('data_change_notifications_total', 'counter', '받은 데이터 변경 알림 수 (출처별)',
+             {(('source', source),): count for source, count in self.received.items()}),
+            ('data_change_refreshes_total', 'counter', '알림을 받아 실행한 스냅샷 버전 확인 수', self.refreshes),
+            ('data_change_listener_reconnects_total', 'counter', '알림 수신 연결 재접속 수', self.reconnects),
+        ]
+
+    def stats(self):
+        return {
+            "connected": self.connected,
+            "channel": self.channel,
+            "received": dict(self.received),
+            "refreshes": self.refreshes,
+            "reconnects": self.reconnects,
+            "lastSource": self.last_source,
+            "lastSeq": self.last_seq
+        }
+
+
+# STATION_DATA_NOTIFY=0이면 알림을 받지 않고 검증 주기만 사용
+change_listener = (DataChangeListener(load_postgres_config())
+                   if os.getenv('STATION_DATA_NOTIFY', '1') != '0' else None)
+if change_listener is not None:
+    registry.add_collector(change_listener.metrics)
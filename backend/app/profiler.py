@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_statement(text):
+    """쿼리에서 리터럴을 ?로 바꾸고 공백을 정리한 문자열 (같은 모양의 쿼리는 같은 결과)"""
+    text = _STRING_LITERAL.sub('?', text)
+    text = _NUMBER_LITERAL.sub('?', text)
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+@lru_cache(maxsize=256)
+def fingerprint(text):
+    """정규화한 쿼리의 짧은 해시
+
+    쿼리 문자열은 파라미터가 빠진 형태라 종류가 많지 않으므로, 실행할 때마다 정규식 치환과
+    해시를 반복하지 않도록 문자열당 한 번만 계산한다 (prepare_statement와 같은 방식).
+    """
+    return hashlib.sha1(normalize_statement(text).encode('utf-8')).hexdigest()[:12]
+
+
+class QueryProfiler:
+    """쿼리 모양(fingerprint)별 실행 횟수/총 시간/최대 시간 집계와 느린 쿼리 실행 계획 보관
+
+    slow_ms 이상 걸린 SELECT는 fingerprint당 explain_interval초에 한 번
+    EXPLAIN (ANALYZE, BUFFERS) 결과를 남긴다. log_path가 있으면 JSON Lines로도 기록한다.
+    """
+
+    def __init__(self, slow_ms=500.0, explain_interval=300.0, log_path=None, enabled=True):
+        self.slow_ms = slow_ms
+        self.explain_interval = explain_interval
+        self.log_path = log_path
+        self.enabled = enabled
+        self._stats = {}
+        # fingerprint -> 실행 계획을 마지막으로 요청한 시각 (monotonic)
+        self._explained_at = {}
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+
+    def record(self, text, name, duration, is_select):
+        """쿼리 실행 시간 기록 후, 실행 계획을 남겨야 하면 fingerprint 반환"""
+        if not self.enabled:
+            return None
+        key = fingerprint(text)
+        elapsed_ms = duration * 1000
+        slow = elapsed_ms >= self.slow_ms
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None:
+                stat = self._stats[key] = {
+                    'fingerprint': key,
+                    'name': name,
+                    'statement': normalize_statement(text)[:500],
+                    'count': 0,
+                    'totalMs': 0.0,
+                    'maxMs': 0.0,
+                    'slowCount': 0,
+                    'explain': None
+                }
+            stat['count'] += 1
+            stat['totalMs'] += elapsed_ms
+            stat['maxMs'] = max(stat['maxMs'], elapsed_ms)
+            if not slow:
+                return None
+            stat['slowCount'] += 1
+            # 데이터를 바꾸는 쿼리는 EXPLAIN ANALYZE로 다시 실행하면 안 되므로 SELECT만
+            if not is_select:
+                return None
+            now = time.monotonic()
+            last = self._explained_at.get(key)
+            if last is not None and now - last < self.explain_interval:
+                return None
+            self._explained_at[key] = now
+        return key
+
+    def save_explain(self, key, duration, plan):
+        """느린 쿼리의 실행 계획 저장"""
+        captured_at = datetime.now(timezone.utc).isoformat()
+        explain = {'capturedAt': captured_at, 'durationMs': round(duration * 1000, 3), 'plan': plan}
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is not None:
+                stat['explain'] = explain
+                name, statement = stat['name'], stat['statement']
+            else:
+                name, statement = None, None
+        print(f"느린 쿼리 실행 계획 저장: {name or key} ({explain['durationMs']}ms)")
+        if self.log_path:
+            entry = dict(explain, fingerprint=key, name=name, statement=statement)
+            try:
+                with self._log_lock, open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            except OSError as e:
+                print(f"느린 쿼리 로그 기록 실패: {e}")
+
+    def snapshot(self):
+        """총 실행 시간 순 집계 목록"""
+        with self._lock:
+            stats = [dict(stat) for stat in self._stats.values()]
+        for stat in stats:
+            stat['avgMs'] = round(stat['totalMs'] / stat['count'], 3) if stat['count'] else 0.0
+            stat['totalMs'] = round(stat['totalMs'], 3)
+            stat['maxMs'] = round(stat['maxMs'], 3)
+        stats.sort(key=lambda stat: stat['totalMs'], reverse=True)
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._explained_at.clear()
+
+
+query_profiler = QueryProfiler(
+    slow_ms=float(os.getenv('SLOW_QUERY_MS', '500')),
+    explain_interval=float(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', '300')),
+    log_path=os.getenv('SLOW_QUERY_LOG') or None,
+    enabled=os.getenv('QUERY_PROFILER_ENABLED', 'true').lower() != 'false',
+)
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+
+from app.snapshot import diff_snapshots, station_cache
+from app.spatial import in_bbox
+
+
+class Subscription:
+    """스트림 구독자 한 명 (관심 영역 또는 충전소 ID 목록)"""
+
+    def __init__(self, bbox=None, stat_ids=None, queue_size=16):
+        self.bbox = bbox
+        self.stat_ids = frozenset(stat_ids) if stat_ids else None
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        # 큐가 넘쳐 이벤트를 놓친 경우 (클라이언트가 전체 목록을 다시 받아야 함)
+        self.overflowed = False
+
+    def wants(self, station):
+        """이 구독자가 받아야 하는 충전소인지 확인"""
+        if self.stat_ids is not None and station.stat_id not in self.stat_ids:
+            return False
+        if self.bbox is not None and not in_bbox(station, self.bbox):
+            return False
+        return True
+
+
+class StationEventHub:
+    """스냅샷이 교체될 때 충전소 변경분을 구독자들에게 전달
+
+    구독자가 있는 동안에만 주기적으로 데이터 버전을 확인한다.
+    """
+
+    def __init__(self, poll_interval=5.0):
+        self.poll_interval = poll_interval
+        self._subscribers = set()
+        self._watch_task = None
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self, bbox=None, stat_ids=None):
+        """구독 등록 후 버전 감시 시작"""
+        subscription = Subscription(bbox, stat_ids)
+        self._subscribers.add(subscription)
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self._watch())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """구독 해제"""
+        self._subscribers.discard(subscription)
+
+    async def _watch(self):
+        """구독자가 있는 동안 데이터 버전을 주기적으로 확인"""
+        while self._subscribers:
+            await asyncio.sleep(self.poll_interval)
+            # TTL 재검증이나 알림으로 시작된 확인과 겹치면 적재를 두 번 하지 않도록 같은 작업을 기다림
+            await station_cache.check()
+
+    def on_snapshot(self, previous, current):
+        """스냅샷 교체 콜백: 구독자별로 관심 있는 변경분만 전달"""
+        if previous is None or not self._subscribers:
+            return
+        changed, removed = diff_snapshots(previous, current)
+        if not changed and not removed:
+            return
+
+        now = datetime.now(timezone.utc)
+        for subscription in list(self._subscribers):
+            station_changed = [station for station in changed if subscription.wants(station)]
+            # 삭제된 충전소는 이전 스냅샷 기준으로 관심 여부 판단
+            station_removed = [stat_id for stat_id in removed if subscription.wants(previous.by_id[stat_id])]
+            if not station_changed and not station_removed:
+                continue
+            event = {
+                "version": current.change_seq,
+                "changed": [station.to_summary(now) for station in station_changed],
+                "removed": station_removed
+            }
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # 느린 클라이언트는 끊고 재접속 시 전체 목록을 다시 받게 함
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+
+    async def close(self):
+        """모든 구독 종료"""
+        for subscription in list(self._subscribers):
+            self.unsubscribe(subscription)
+            try:
+                subscription.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+
+def format_sse(event, data, event_id=None):
+    """Server-Sent Events 메시지 형식으로 변환"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+async def stream_events(request, hub, subscription, heartbeat=15.0):
+    """구독자에게 변경분 이벤트를 SSE로 전송"""
+    try:
+        snapshot = station_cache.snapshot
+        yield format_sse("ready", {"version": snapshot.change_seq if snapshot else 0})
+
+        while True:
+            if await request.is_disconnected():
+                break
+            if subscription.overflowed:
+                yield format_sse("reset", {"reason": "overflow"})
+                break
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # 프록시가 유휴 연결을 끊지 않도록 주석 라인 전송
+                yield ": ping\n\n"
+                continue
+            if event is None:
+                break
+            yield format_sse("stations", event, event_id=event["version"])
+    finally:
+        hub.unsubscribe(subscription)
+
+
+station_hub = StationEventHub(poll_interval=float(os.getenv('STATION_PUSH_POLL_INTERVAL', '5')))
+station_cache.add_listener(station_hub.on_snapshot)
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from app.db import get_pool
+from app.migrations import check_schema_version
+from app.snapshot import station_cache
+
+
+class Readiness:
+    """시작 준비 단계 진행 상황
+
+    커넥션 풀 예열, 스키마 버전 확인, 충전소 스냅샷 적재, 파생 인덱스/JSON 조각 생성이
+    모두 끝나야 준비 완료로 본다. 배포 스크립트는 준비 완료 후에 nginx를 새 컨테이너로 전환한다.
+    """
+
+    STEPS = ('pool', 'schema', 'snapshot', 'caches')
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.completed = {}
+        self.ready_after = None
+        self.attempts = 0
+        self.last_error = None
+
+    @property
+    def ready(self):
+        return self.ready_after is not None
+
+    def complete(self, step):
+        self.completed[step] = round(time.monotonic() - self.started_at, 3)
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "steps": {step: step in self.completed for step in self.STEPS},
+            "completedAfter": self.completed,
+            "readyAfter": self.ready_after,
+            "attempts": self.attempts,
+            "lastError": self.last_error
+        }
+
+    async def _run_steps(self, prewarm):
+        pool = get_pool()
+        if 'pool' not in self.completed:
+            opened = await pool.run(pool.prewarm, prewarm)
+            print(f"DB 커넥션 {opened}개 예열 완료")
+            self.complete('pool')
+        if 'schema' not in self.completed:
+            version = await pool.run(check_schema_version)
+            print(f"DB 스키마 버전 확인 완료 ({version})")
+            self.complete('schema')
+        snapshot = station_cache.snapshot
+        if snapshot is None:
+            snapshot = await station_cache.revalidate(force=True)
+            if snapshot is None:
+                raise RuntimeError("충전소 스냅샷을 적재하지 못했습니다")
+        self.complete('snapshot')
+        await asyncio.to_thread(snapshot.warm, datetime.now(timezone.utc))
+        self.complete('caches')
+
+    async def warm_up(self, prewarm=4, retry_interval=2.0, max_retry_interval=30.0):
+        """준비 단계를 끝날 때까지 재시도 (실패한 단계부터 다시 실행)"""
+        delay = retry_interval
+        while not self.ready:
+            self.attempts += 1
+            try:
+                await self._run_steps(prewarm)
+                self.ready_after = round(time.monotonic() - self.started_at, 3)
+                self.last_error = None
+                print(f"✅ 서버 준비 완료 ({self.ready_after}초)")
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️ 서버 준비 실패, {delay:.0f}초 후 재시도: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_retry_interval)
+
+
+readiness = Readiness()
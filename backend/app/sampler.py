@@ -0,0 +1,225 @@
+import asyncio
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from starlette.routing import Match
+
+from app.metrics import route_path
+
+# 이 디렉터리 아래 코드가 스택에 있는 DB 스레드 샘플만 남김 (쉬고 있는 스레드 제외)
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def route_template(scope):
+    """라우팅 전에 요청이 매칭될 경로 템플릿 (라우터와 같이 등록 순서대로 첫 FULL 매칭)"""
+    for route in getattr(scope.get('app'), 'routes', ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+
+def _frame_label(frame):
+    """스택 프레임 하나의 표시 이름 (파일명:함수명)"""
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler:
+    """이벤트 루프 스레드와 DB 스레드의 호출 스택을 일정 간격으로 수집
+
+    결과는 'event-loop;main.py:nearby_stations;snapshot.py:to_json 12' 같은
+    folded stack 형식이라 flamegraph.pl, speedscope 등에서 바로 열 수 있다.
+    """
+
+    def __init__(self, loop_thread_id, interval=0.005, db_thread_prefix='db', max_duration=30.0):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.db_thread_prefix = db_thread_prefix
+        # 요청 하나를 이 시간(초)보다 오래 샘플링하지 않음
+        self.max_duration = max_duration
+        self.samples = Counter()
+        self.ticks = 0
+        self.truncated = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """샘플링 중지 요청 (기다리지 않음)"""
+        self._stop.set()
+
+    def join(self):
+        """샘플링 스레드가 끝날 때까지 대기 (블로킹)"""
+        self._thread.join()
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_duration
+        while not self._stop.wait(self.interval):
+            if time.monotonic() >= deadline:
+                self.truncated = True
+                return
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            self.ticks += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.loop_thread_id:
+                    root = 'event-loop'
+                elif names.get(thread_id, '').startswith(self.db_thread_prefix):
+                    root = 'db'
+                else:
+                    continue
+                stack = []
+                in_app = False
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    in_app = in_app or frame.f_code.co_filename.startswith(APP_DIR)
+                    frame = frame.f_back
+                if root == 'db' and not in_app:
+                    continue
+                stack.append(root)
+                self.samples[';'.join(reversed(stack))] += 1
+
+
+class RequestProfiler:
+    """라이브 요청 샘플링 프로파일링 설정과 결과 저장
+
+    X-Profile: 1 헤더와 관리자 토큰이 있는 요청, 또는 sample_rate 비율의 요청을
+    프로파일링한다. 대상은 paths의 경로 템플릿과 정확히 매칭되는 요청만이다 (스트림/변경분처럼
+    같은 접두사를 가진 다른 라우트는 제외). 동시에 한 요청만 기록하며 (같은 시간에 처리된 다른
+    요청의 스택도 함께 잡힐 수 있음), 한 요청은 max_duration초까지만 샘플링한다.
+    결과는 output_dir에 folded stack 파일과 라우트/처리 시간 JSON으로 남긴다.
+    """
+
+    def __init__(self, output_dir, sample_rate=0.0, paths=('/api/stations', '/api/stations/{stat_id}'),
+                 interval=0.005, max_duration=30.0):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.paths = tuple(paths)
+        self.interval = interval
+        self.max_duration = max_duration
+        self.captured = 0
+        self._busy = threading.Lock()
+
+    def wants(self, scope, admin_token):
+        """프로파일링할 요청인지 확인 (라우트 매칭은 헤더/샘플링 조건을 통과한 요청만)"""
+        headers = dict(scope['headers'])
+        if headers.get(b'x-profile') == b'1' and admin_token:
+            token = headers.get(b'x-admin-token', b'').decode('latin-1')
+            wanted = hmac.compare_digest(token, admin_token)
+        else:
+            wanted = self.sample_rate > 0 and random.random() < self.sample_rate
+        return wanted and route_template(scope) in self.paths
+
+    def save(self, scope, status, elapsed, sampler):
+        """folded stack 파일과 메타데이터 파일 저장"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        route = route_path(scope)
+        now = datetime.now(timezone.utc)
+        name = f"{now.strftime('%Y%m%dT%H%M%S%f')}_{re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_')}"
+        base = os.path.join(self.output_dir, name)
+        with open(base + '.folded', 'w', encoding='utf-8') as f:
+            for stack, count in sampler.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump({
+                "route": route,
+                "method": scope['method'],
+                "path": scope['path'],
+                "query": scope.get('query_string', b'').decode('latin-1'),
+                "status": status,
+                "durationMs": round(elapsed * 1000, 3),
+                "intervalMs": sampler.interval * 1000,
+                "ticks": sampler.ticks,
+                "truncated": sampler.truncated,
+                "capturedAt": now.isoformat()
+            }, f, ensure_ascii=False, indent=2)
+        self.captured += 1
+        print(f"요청 프로파일 저장: {base}.folded ({route}, {elapsed * 1000:.1f}ms)")
+
+    def recent(self, limit=50):
+        """저장된 프로파일 메타데이터 (최근 순)"""
+        if not os.path.isdir(self.output_dir):
+            return []
+        names = sorted((name for name in os.listdir(self.output_dir) if name.endswith('.json')), reverse=True)
+        profiles = []
+        for name in names[:limit]:
+            try:
+                with open(os.path.join(self.output_dir, name), encoding='utf-8') as f:
+                    profile = json.load(f)
+            except (OSError, ValueError):
+                continue
+            profile["file"] = name[:-len('.json')] + '.folded'
+            profiles.append(profile)
+        return profiles
+
+    def state(self):
+        return {
+            "sampleRate": self.sample_rate,
+            "paths": list(self.paths),
+            "intervalMs": self.interval * 1000,
+            "maxDurationS": self.max_duration,
+            "outputDir": self.output_dir,
+            "captured": self.captured,
+            "active": self._busy.locked()
+        }
+
+
+class ProfilerMiddleware:
+    """RequestProfiler가 고른 요청을 처리하는 동안 스택을 샘플링하는 ASGI 미들웨어"""
+
+    def __init__(self, app, profiler, admin_token=None):
+        self.app = app
+        self.profiler = profiler
+        self.admin_token = admin_token
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.profiler.wants(scope, self.admin_token) \
+                or not self.profiler._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        state = {'status': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                state['status'] = message['status']
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), self.profiler.interval,
+                               max_duration=self.profiler.max_duration)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            sampler.stop()
+            # 샘플링 스레드 종료 대기와 파일 저장은 이벤트 루프를 막지 않도록 별도 스레드에서
+            try:
+                await asyncio.to_thread(sampler.join)
+                await asyncio.to_thread(self.profiler.save, scope, state['status'], elapsed, sampler)
+            except OSError as e:
+                print(f"요청 프로파일 저장 실패: {e}")
+            finally:
+                self.profiler._busy.release()
+
+
+request_profiler = RequestProfiler(
+    output_dir=os.getenv('PROFILE_DIR', '/tmp/evolution-profiles'),
+    sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+    # 경로 템플릿 목록 (예: /api/stations,/api/stations/{stat_id})
+    paths=tuple(path.strip() for path in os.getenv('PROFILE_PATHS', '/api/stations,/api/stations/{stat_id}').split(',')
+                if path.strip()),
+    interval=float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000,
+    max_duration=float(os.getenv('PROFILE_MAX_DURATION_S', '30')),
+)
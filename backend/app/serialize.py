@@ -0,0 +1,34 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json 모듈로 인코딩
+    orjson = None
+
+
+def _default(value):
+    """orjson이 직접 인코딩하지 못하는 값 변환 (FastAPI 기본 인코더와 같은 결과)"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value):
+    """값을 UTF-8 JSON bytes로 인코딩"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def join_array(fragments):
+    """인코딩된 JSON 조각들을 JSON 배열로 연결"""
+    return b'[' + b','.join(fragments) + b']'
+
+
+def with_field(object_fragment, key, value):
+    """닫는 괄호를 뺀 JSON 객체 조각 뒤에 필드 하나를 붙여 완성"""
+    return object_fragment + b',"' + key.encode('utf-8') + b'":' + dumps(value) + b'}'
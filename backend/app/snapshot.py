@@ -0,0 +1,885 @@
+import asyncio
+import hashlib
+import math
+import os
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+
+from app.concurrency import SingleFlight
+from app.conditional import make_etag
+from app.db import get_read_pool, iter_query, run_query
+from app.filters import StationFilterIndex
+from app.metrics import registry
+from app.serialize import dumps
+from app.snapshot_file import SnapshotFile, SnapshotFileError, StringTable, WriterLock, file_id, write_snapshot_file
+from app.spatial import GridIndex, haversine_m, in_bbox
+
+DEPARTS_WINDOW = timedelta(minutes=30)
+
+# 30분 이내 출발 시각만 DB에서 걸러 정렬해 가져오는 컬럼 식 (TIMESTAMP는 UTC 기준으로 저장)
+RECENT_DEPARTS_COLUMN = """ARRAY(
+            SELECT dep FROM unnest(di.departs_in_30m) AS dep
+            WHERE dep >= (NOW() AT TIME ZONE 'UTC') - INTERVAL '30 minutes'
+            ORDER BY dep
+        )"""
+
+# 전체 충전소 목록 (수요예측 정보 포함)
+STATION_LIST_QUERY = f"""
+    SELECT
+        gc.stat_id,
+        gc.stat_nm,
+        CAST(gc.lat AS VARCHAR) as lat,
+        CAST(gc.lng AS VARCHAR) as lng,
+        gc.charger_types,
+        gc.parking_free,
+        gc.total_chargers,
+        gc.usable_chargers,
+        gc.using_chargers,
+        CAST(gc.max_output AS VARCHAR) as max_output,
+        gc.use_time,
+        gc.last_update_time,
+        di.updated_at as demand_updated_at,
+        COALESCE(di.view_num, 0) as view_num,
+        {RECENT_DEPARTS_COLUMN} as departs_in_30m,
+        COALESCE(di.hourly_visit_num, ARRAY[]::INTEGER[]) as hourly_visit_num
+    FROM grouped_chargers gc
+    LEFT JOIN demand_info di ON gc.stat_id = di.stat_id
+    ORDER BY gc.stat_nm, gc.stat_id
+"""
+
+# 데이터 버전 확인용 쿼리 (수집 Lambda 실행 시각 + demand_info 갱신 세대)
+# station_changes의 seq는 커밋할 때 순서대로 발급되므로(마이그레이션 3) MAX(seq) 이하의 행은 모두 커밋되어 보인다.
+DATA_VERSION_QUERY = """
+    SELECT
+        (SELECT MAX(last_update_time) FROM grouped_chargers) as ingest_time,
+        (SELECT COUNT(*) FROM grouped_chargers) as station_count,
+        (SELECT MAX(updated_at) FROM demand_info) as demand_time,
+        (SELECT COUNT(*) FROM demand_info) as demand_count,
+        (SELECT COALESCE(MAX(seq), 0) FROM station_changes) as change_seq,
+        (SELECT COALESCE(MIN(seq), 0) FROM station_changes) as min_change_seq
+"""
+
+# 변경 이력에서 구간 내 변경된 충전소 ID
+CHANGED_STATIONS_QUERY = """
+    SELECT DISTINCT stat_id
+    FROM station_changes
+    WHERE seq > %s AND seq <= %s
+"""
+
+
+# 아직 DB에 반영되지 않은 조회수 증감을 알려주는 객체 (counters 모듈에서 등록)
+_view_num_source = None
+
+
+def set_view_num_source(source):
+    """조회수 증감 제공 객체 등록 (delta_for(stat_id, read_started_at), deltas_for(read_started_at) 필요)"""
+    global _view_num_source
+    _view_num_source = source
+
+
+def pending_view_num(stat_id, view_num, read_started_at):
+    """DB에서 읽은 조회수에 아직 반영되지 않은 증감을 더한 값"""
+    if _view_num_source is None:
+        return view_num
+    return max(view_num + _view_num_source.delta_for(stat_id, read_started_at), 0)
+
+
+def pending_view_tag(read_started_at):
+    """아직 반영되지 않은 조회수 증감의 요약 (목록 ETag/캐시 키용)
+
+    워커마다 다른 카운터가 아니라 응답에 실제로 더해지는 충전소별 증감으로 만들므로,
+    같은 버전의 스냅샷에 같은 증감이 더해진 응답이면 어느 워커에서든, 재시작 후에도 같은 값이다.
+    """
+    deltas = _view_num_source.deltas_for(read_started_at) if _view_num_source is not None else None
+    return make_etag(*sorted(deltas.items())).strip('"') if deltas else ''
+
+
+def to_utc(dt):
+    """timezone naive datetime은 UTC로 간주하여 timezone aware로 변환"""
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# 공유 스냅샷 파일의 정수 컬럼에서 None을 나타내는 값
+NULL_INT = -2 ** 63
+
+
+def to_micros(dt):
+    """UTC datetime을 1970년부터의 마이크로초로 변환"""
+    return (dt - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(value):
+    """마이크로초를 UTC datetime으로 변환"""
+    return EPOCH + timedelta(microseconds=value)
+
+
+def _nullable(value):
+    return NULL_INT if value is None else value
+
+
+def _from_nullable(value):
+    return None if value == NULL_INT else value
+
+
+def station_etag(stat_id, last_update_time, demand_info, *variant):
+    """충전소 한 곳 응답의 ETag (응답에 담긴 갱신 시각과 수요 정보로 계산)
+
+    수집 Lambda가 충전소 정보를 바꿀 때마다 last_update_time도 갱신하므로, 나머지 필드는
+    갱신 시각이 같으면 같다 (상세정보 캐시와 같은 전제).
+    """
+    demand_info = demand_info or {}
+    return make_etag(stat_id, last_update_time, demand_info.get('viewNum'), demand_info.get('departsIn30m'),
+                     demand_info.get('hourlyVisitNum'), *variant)
+
+
+def _last_modified(modified_at, departs, expired):
+    """데이터 변경 시각과 마지막으로 30분이 지난 출발 시각 중 늦은 쪽"""
+    if expired:
+        expired_at = departs[expired - 1] + DEPARTS_WINDOW
+        if modified_at is None or expired_at > modified_at:
+            return expired_at
+    return modified_at
+
+
+class StationBase:
+    """SnapshotStation과 MappedStation의 공통 응답 변환"""
+
+    __slots__ = ()
+
+    @property
+    def current_view_num(self):
+        """아직 DB에 반영되지 않은 증감까지 더한 조회수"""
+        return pending_view_num(self.stat_id, self.view_num, self.loaded_at)
+
+    def validators(self, now, *variant):
+        """이 충전소 응답의 (ETag, Last-Modified)
+
+        ETag는 DB에서 읽은 응답과 같은 방식(station_etag)으로 계산하므로, 스냅샷 값과 DB 값이
+        같을 때만 같은 ETag가 된다.
+        """
+        expired = self.expired_departs(now)
+        etag = station_etag(self.stat_id, self.last_update_time, self.demand_info(now), *variant)
+        return etag, _last_modified(self.modified_at, self.departs, expired)
+
+    def demand_info(self, now):
+        """수요 정보 (조회수, 30분 이내 출발 시각, 시간대별 방문자 수)"""
+        return {
+            "viewNum": self.current_view_num,
+            "departsIn30m": self.recent_departs(now),
+            "hourlyVisitNum": self.hourly_visit_num
+        }
+
+    def to_summary(self, now):
+        """프론트엔드 StationSummarized 형식으로 변환"""
+        return {
+            "statId": self.stat_id,
+            "info": self.info,
+            "lastUpdateTime": self.last_update_time,
+            "demandInfo": self.demand_info(now)
+        }
+
+
+class SnapshotStation(StationBase):
+    """스냅샷에 담긴 충전소 한 곳의 데이터"""
+
+    __slots__ = ('index', 'stat_id', 'charger_types', 'max_output', 'parking_free', 'lat', 'lng',
+                 'info', 'last_update_time', 'view_num', 'departs', 'departs_iso',
+                 'hourly_visit_num', 'modified_at', 'loaded_at', '_json')
+
+    def __init__(self, row, loaded_at, index=0):
+        # 스냅샷 목록에서의 위치 (필터 비트셋의 비트 번호)
+        self.index = index
+        self.stat_id = row['stat_id']
+        # 이 데이터를 읽기 시작한 시각 (반영되지 않은 조회수 증감 계산용)
+        self.loaded_at = loaded_at
+        self.charger_types = frozenset(row['charger_types'] or [])
+        self.max_output = int(row['max_output']) if row['max_output'] else 0
+        self.parking_free = row['parking_free']
+        self.lat = float(row['lat']) if row['lat'] else None
+        self.lng = float(row['lng']) if row['lng'] else None
+        self.info = {
+            "statNm": row['stat_nm'],
+            "lat": row['lat'],
+            "lng": row['lng'],
+            "chargerTypes": row['charger_types'] if row['charger_types'] else [],
+            "parkingFree": row['parking_free'],
+            "totalChargers": row['total_chargers'],
+            "usableChargers": row['usable_chargers'],
+            "usingChargers": row['using_chargers'],
+            "maxOutput": row['max_output'],
+            "useTime": row['use_time']
+        }
+        self.last_update_time = row['last_update_time'].isoformat() if row['last_update_time'] else None
+        self.view_num = row['view_num']
+        # 출발 시각은 정렬해 두고 요청 시점에 30분 이내 구간만 잘라서 사용
+        self.departs = sorted(to_utc(dep) for dep in (row['departs_in_30m'] or []))
+        self.departs_iso = [dep.isoformat() for dep in self.departs]
+        self.hourly_visit_num = row['hourly_visit_num'] if row['hourly_visit_num'] else []
+        changed = [to_utc(dt) for dt in (row['last_update_time'], row.get('demand_updated_at')) if dt]
+        self.modified_at = max(changed) if changed else None
+        # to_json에서 재사용하는 미리 인코딩한 JSON 조각 (head, tail, 출발 시각별 조각), 처음 사용할 때 생성
+        self._json = None
+
+    def same_as(self, other):
+        """다른 스냅샷의 같은 충전소와 응답 내용이 같은지 비교"""
+        return (self.info == other.info
+                and self.last_update_time == other.last_update_time
+                and self.view_num == other.view_num
+                and self.departs == other.departs
+                and self.hourly_visit_num == other.hourly_visit_num)
+
+    def expired_departs(self, now):
+        """now 기준 30분이 지난 출발 시각 개수"""
+        return bisect_left(self.departs, now - DEPARTS_WINDOW)
+
+    def recent_departs(self, now):
+        """now 기준 30분 이내 출발 시각 목록"""
+        return self.departs_iso[self.expired_departs(now):]
+
+    def json_fragments(self):
+        """조회수/출발 시각 앞뒤의 미리 인코딩한 JSON 조각과 출발 시각별 조각 (처음 사용할 때 생성)
+
+        준비 작업 스레드가 만드는 동안 요청도 같은 충전소를 읽을 수 있으므로, 세 조각을 모두 만든 뒤
+        튜플 하나로 한 번에 저장한다 (먼저 저장된 일부만 보는 경우가 없도록).
+        """
+        fragments = self._json
+        if fragments is None:
+            head = dumps({"statId": self.stat_id, "info": self.info, "lastUpdateTime": self.last_update_time})
+            fragments = self._json = (
+                head[:-1] + b',"demandInfo":{"viewNum":',
+                b',"hourlyVisitNum":' + dumps(self.hourly_visit_num) + b'}}',
+                [dumps(dep) for dep in self.departs_iso],
+            )
+        return fragments
+
+    def to_json(self, now):
+        """to_summary와 같은 내용의 JSON bytes
+
+        조회수와 30분 이내 출발 시각만 요청마다 붙이고, 나머지는 미리 인코딩한 조각을 재사용한다.
+        """
+        head, tail, departs_json = self.json_fragments()
+        departs = departs_json[self.expired_departs(now):] if departs_json else ()
+        return (head + str(self.current_view_num).encode() + b',"departsIn30m":['
+                + b','.join(departs) + b']' + tail)
+
+
+class DepartTimes:
+    """공유 스냅샷 파일의 마이크로초 배열을 정렬된 datetime 목록처럼 읽는 시퀀스"""
+
+    __slots__ = ('micros',)
+
+    def __init__(self, micros):
+        self.micros = micros
+
+    def __len__(self):
+        return len(self.micros)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [from_micros(value) for value in self.micros[i]]
+        return from_micros(self.micros[i])
+
+    def __iter__(self):
+        return (from_micros(value) for value in self.micros)
+
+    def expired(self, now):
+        """now 기준 30분이 지난 출발 시각 개수"""
+        return bisect_left(self.micros, to_micros(now - DEPARTS_WINDOW))
+
+
+class MappedStation(StationBase):
+    """공유 스냅샷 파일에 담긴 충전소 한 곳
+
+    SnapshotStation과 같은 속성을 제공하지만 값을 객체에 담아 두지 않고,
+    사용할 때마다 매핑된 파일의 컬럼에서 읽는다.
+    """
+
+    __slots__ = ('index', 'stat_id', 'loaded_at', '_file')
+
+    def __init__(self, snapshot_file, index, loaded_at):
+        self._file = snapshot_file
+        self.index = index
+        self.loaded_at = loaded_at
+        self.stat_id = snapshot_file.string(snapshot_file.column('stat_id')[index])
+
+    def _string(self, name):
+        return self._file.string(self._file.column(name)[self.index])
+
+    def _ragged(self, name):
+        offsets = self._file.column(f'{name}_offsets')
+        return self._file.column(name)[offsets[self.index]:offsets[self.index + 1]]
+
+    @property
+    def charger_types(self):
+        mask = self._file.column('charger_type_mask')[self.index]
+        codes = self._file.header['chargerTypeCodes']
+        return frozenset(code for bit, code in enumerate(codes) if mask >> bit & 1)
+
+    @property
+    def max_output(self):
+        return self._file.column('max_output')[self.index]
+
+    @property
+    def parking_free(self):
+        return self._string('parking_free')
+
+    @property
+    def lat(self):
+        lat = self._file.column('lat')[self.index]
+        return None if math.isnan(lat) else lat
+
+    @property
+    def lng(self):
+        lng = self._file.column('lng')[self.index]
+        return None if math.isnan(lng) else lng
+
+    @property
+    def info(self):
+        charger_types = self._string('charger_types')
+        return {
+            "statNm": self._string('stat_nm'),
+            "lat": self._string('lat_text'),
+            "lng": self._string('lng_text'),
+            "chargerTypes": charger_types.split(',') if charger_types else [],
+            "parkingFree": self.parking_free,
+            "totalChargers": _from_nullable(self._file.column('total_chargers')[self.index]),
+            "usableChargers": _from_nullable(self._file.column('usable_chargers')[self.index]),
+            "usingChargers": _from_nullable(self._file.column('using_chargers')[self.index]),
+            "maxOutput": self._string('max_output_text'),
+            "useTime": self._string('use_time')
+        }
+
+    @property
+    def last_update_time(self):
+        return self._string('last_update_time')
+
+    @property
+    def view_num(self):
+        return self._file.column('view_num')[self.index]
+
+    @property
+    def departs(self):
+        return DepartTimes(self._ragged('departs'))
+
+    @property
+    def departs_iso(self):
+        return [dep.isoformat() for dep in self.departs]
+
+    @property
+    def hourly_visit_num(self):
+        return self._ragged('hourly_visit_num').tolist()
+
+    @property
+    def modified_at(self):
+        modified_at = _from_nullable(self._file.column('modified_at')[self.index])
+        return None if modified_at is None else from_micros(modified_at)
+
+    def same_as(self, other):
+        """다른 스냅샷의 같은 충전소와 응답 내용이 같은지 비교 (저장할 때 계산한 요약값으로)"""
+        return isinstance(other, MappedStation) and self.digest == other.digest
+
+    @property
+    def digest(self):
+        return self._file.blob('digest', self.index * 16, self.index * 16 + 16)
+
+    def _recent_range(self, now):
+        """출발 시각 컬럼에서 (30분 이내 구간 시작, 이 충전소 구간 시작, 끝) 위치"""
+        offsets = self._file.column('departs_offsets')
+        start, end = offsets[self.index], offsets[self.index + 1]
+        if start == end:
+            return start, start, end
+        cut = bisect_left(self._file.column('departs'), to_micros(now - DEPARTS_WINDOW), start, end)
+        return cut, start, end
+
+    def expired_departs(self, now):
+        """now 기준 30분이 지난 출발 시각 개수"""
+        cut, start, _ = self._recent_range(now)
+        return cut - start
+
+    def recent_departs(self, now):
+        """now 기준 30분 이내 출발 시각 목록"""
+        cut, _, end = self._recent_range(now)
+        if cut == end:
+            return []
+        return [from_micros(value).isoformat() for value in self._file.column('departs')[cut:end]]
+
+    def to_json(self, now):
+        """to_summary와 같은 내용의 JSON bytes (파일에 저장된 조각 사이에 조회수/출발 시각만 채움)"""
+        snapshot_file = self._file
+        i = self.index * 2
+        offsets = snapshot_file.column('json_offsets')
+        start, middle, end = offsets[i], offsets[i + 1] - offsets[i], offsets[i + 2]
+        fragment = snapshot_file.column('json')[start:end]
+        cut, _, end = self._recent_range(now)
+        departs = b''
+        if cut < end:
+            departs_offsets = snapshot_file.column('departs_json_offsets')
+            departs = snapshot_file.column('departs_json')[departs_offsets[cut]:departs_offsets[end] - 1]
+        return b''.join((fragment[:middle], str(self.current_view_num).encode(), b',"departsIn30m":[',
+                         departs, b']', fragment[middle:]))
+
+
+def diff_snapshots(previous, current):
+    """두 스냅샷 사이에 바뀐 충전소 목록과 삭제된 충전소 ID 목록"""
+    if previous is None:
+        return list(current.stations), []
+    changed = []
+    for station in current.stations:
+        old = previous.by_id.get(station.stat_id)
+        if old is None or not station.same_as(old):
+            changed.append(station)
+    removed = [stat_id for stat_id in previous.by_id if stat_id not in current.by_id]
+    return changed, removed
+
+
+class StationSnapshot:
+    """특정 데이터 버전의 전체 충전소 목록 (stat_nm, stat_id 순)"""
+
+    def __init__(self, version, rows, change_seq=0, min_change_seq=0, loaded_at=None):
+        self.version = version
+        # 목록 조회를 시작한 시각
+        self.loaded_at = loaded_at if loaded_at is not None else time.monotonic()
+        # 이 스냅샷에 반영된 변경 이력의 마지막 번호 (변경분 조회의 버전 토큰)
+        self.change_seq = change_seq
+        self.min_change_seq = min_change_seq
+        self.stations = [SnapshotStation(row, self.loaded_at, i) for i, row in enumerate(rows)]
+        self.version_tag = make_etag(*version).strip('"')
+        # 전체 목록의 ETag 계산용 (모든 충전소의 출발 시각)
+        self.departs = sorted(dep for station in self.stations for dep in station.departs)
+        changed = [station.modified_at for station in self.stations if station.modified_at]
+        self.modified_at = max(changed) if changed else None
+        self._init_indexes()
+
+    def _init_indexes(self):
+        self.by_id = {station.stat_id: station for station in self.stations}
+        self._spatial = None
+        self._filters = None
+        # 스냅샷에서 파생된 계산 결과 캐시 (스냅샷이 교체되면 함께 버려짐)
+        self.derived = {}
+
+    @property
+    def spatial(self):
+        """좌표 기반 공간 인덱스 (처음 사용할 때 생성)"""
+        if self._spatial is None:
+            self._spatial = GridIndex(self.stations)
+        return self._spatial
+
+    @property
+    def filters(self):
+        """충전기 타입/최고속도/무료주차 컬럼 인덱스 (처음 사용할 때 생성)"""
+        if self._filters is None:
+            self._filters = StationFilterIndex(self.stations)
+        return self._filters
+
+    def warm(self, now):
+        """첫 요청이 느리지 않도록 공간/필터 인덱스와 충전소별 JSON 조각을 미리 생성"""
+        self.spatial
+        self.filters
+        for station in self.stations:
+            station.to_json(now)
+
+    def expired_departs(self, now):
+        """now 기준 30분이 지난 출발 시각 개수 (전체 충전소)"""
+        return bisect_left(self.departs, now - DEPARTS_WINDOW)
+
+    def write_file(self, path):
+        """여러 워커가 함께 읽는 공유 스냅샷 파일로 저장 (MappedStationSnapshot으로 다시 읽음)
+
+        좌표/충전기 수/최고속도/조회수/타입 비트마스크는 고정 길이 배열로, 출발 시각과
+        시간대별 이용객 수는 오프셋 배열과 값 배열로, 문자열은 문자열 테이블 번호로 저장한다.
+        충전소별 JSON 조각과 변경 비교용 요약값도 함께 저장한다.
+        """
+        type_codes = sorted({code for station in self.stations for code in station.charger_types})
+        if len(type_codes) > 64:
+            raise ValueError(f"충전기 타입 코드가 너무 많습니다: {len(type_codes)}개")
+        type_bits = {code: 1 << bit for bit, code in enumerate(type_codes)}
+
+        strings = StringTable()
+        columns = {name: array(typecode) for name, typecode in (
+            ('lat', 'd'), ('lng', 'd'),
+            ('total_chargers', 'q'), ('usable_chargers', 'q'), ('using_chargers', 'q'),
+            ('max_output', 'q'), ('view_num', 'q'), ('modified_at', 'q'), ('charger_type_mask', 'Q'),
+            ('stat_id', 'I'), ('stat_nm', 'I'), ('lat_text', 'I'), ('lng_text', 'I'), ('charger_types', 'I'),
+            ('parking_free', 'I'), ('max_output_text', 'I'), ('use_time', 'I'), ('last_update_time', 'I'),
+            ('departs_offsets', 'I'), ('departs', 'q'),
+            ('hourly_visit_num_offsets', 'I'), ('hourly_visit_num', 'q'),
+            ('json_offsets', 'Q'), ('departs_json_offsets', 'Q'), ('all_departs', 'q'),
+        )}
+        columns['departs_offsets'].append(0)
+        columns['departs_json_offsets'].append(0)
+        columns['hourly_visit_num_offsets'].append(0)
+        columns['json_offsets'].append(0)
+        json_fragments = []
+        departs_json = []
+        digests = []
+        json_size = 0
+        departs_json_size = 0
+        for station in self.stations:
+            info = station.info
+            columns['lat'].append(math.nan if station.lat is None else station.lat)
+            columns['lng'].append(math.nan if station.lng is None else station.lng)
+            columns['total_chargers'].append(_nullable(info['totalChargers']))
+            columns['usable_chargers'].append(_nullable(info['usableChargers']))
+            columns['using_chargers'].append(_nullable(info['usingChargers']))
+            columns['max_output'].append(station.max_output)
+            columns['view_num'].append(station.view_num)
+            columns['modified_at'].append(_nullable(station.modified_at and to_micros(station.modified_at)))
+            mask = 0
+            for code in station.charger_types:
+                mask |= type_bits[code]
+            columns['charger_type_mask'].append(mask)
+            columns['stat_id'].append(strings.add(station.stat_id))
+            columns['stat_nm'].append(strings.add(info['statNm']))
+            columns['lat_text'].append(strings.add(info['lat']))
+            columns['lng_text'].append(strings.add(info['lng']))
+            columns['charger_types'].append(strings.add(','.join(info['chargerTypes'])))
+            columns['parking_free'].append(strings.add(station.parking_free))
+            columns['max_output_text'].append(strings.add(info['maxOutput']))
+            columns['use_time'].append(strings.add(info['useTime']))
+            columns['last_update_time'].append(strings.add(station.last_update_time))
+
+            departs = array('q', (to_micros(dep) for dep in station.departs))
+            columns['departs'].extend(departs)
+            columns['departs_offsets'].append(len(columns['departs']))
+            columns['hourly_visit_num'].extend(station.hourly_visit_num)
+            columns['hourly_visit_num_offsets'].append(len(columns['hourly_visit_num']))
+
+            head, tail, station_departs_json = station.json_fragments()
+            # 출발 시각 JSON 조각은 뒤에 쉼표를 붙여 저장 (30분 이내 구간을 한 번에 잘라 씀)
+            for fragment in station_departs_json:
+                departs_json.append(fragment + b',')
+                departs_json_size += len(fragment) + 1
+                columns['departs_json_offsets'].append(departs_json_size)
+            json_fragments += [head, tail]
+            json_size += len(head)
+            columns['json_offsets'].append(json_size)
+            json_size += len(tail)
+            columns['json_offsets'].append(json_size)
+            digests.append(hashlib.blake2b(
+                head + tail + str(station.view_num).encode() + departs.tobytes(), digest_size=16
+            ).digest())
+        columns['all_departs'].extend(to_micros(dep) for dep in self.departs)
+        string_offsets, string_blob = strings.columns()
+        columns['string_offsets'] = array('Q', string_offsets)
+        columns['string_blob'] = string_blob
+        columns['json'] = b''.join(json_fragments)
+        columns['departs_json'] = b''.join(departs_json)
+        columns['digest'] = b''.join(digests)
+
+        header = {
+            "count": len(self.stations),
+            "version": [str(part) for part in self.version],
+            "versionTag": self.version_tag,
+            "changeSeq": self.change_seq,
+            "minChangeSeq": self.min_change_seq,
+            # time.monotonic()은 시스템 전체에서 같은 시계라 다른 워커의 조회수 증감 계산에도 그대로 쓸 수 있음
+            "loadedAt": self.loaded_at,
+            "modifiedAt": self.modified_at and to_micros(self.modified_at),
+            "chargerTypeCodes": type_codes,
+            "writtenBy": os.getpid(),
+        }
+        write_snapshot_file(path, header, columns)
+
+    @property
+    def ingest_tag(self):
+        """수집 Lambda가 충전소를 새로 쓸 때만 바뀌는 버전 (조회수/출발 시각 변경과는 무관, nginx 캐시 키용)"""
+        return make_etag(*self.version[:2]).strip('"')
+
+    def view_num_tag(self):
+        """이 스냅샷 응답에 더해지는 조회수 증감의 요약"""
+        return pending_view_tag(self.loaded_at)
+
+    def validators(self, now, *variant):
+        """전체 목록 응답의 (ETag, Last-Modified)"""
+        expired = self.expired_departs(now)
+        etag = make_etag(self.version_tag, expired, self.view_num_tag(), *variant)
+        return etag, _last_modified(self.modified_at, self.departs, expired)
+
+    def filter(self, charger_types=None, min_output=None, parking_free=None):
+        """충전기 타입/최소속도/무료주차 조건에 맞는 충전소 목록 (stat_nm 순)"""
+        filters = self.filters
+        return filters.select(filters.mask(charger_types, min_output, parking_free))
+
+    def page(self, charger_types=None, min_output=None, parking_free=None, cursor=None, limit=100):
+        """필터 조건에 맞는 충전소를 cursor 다음부터 limit개 (stat_nm 순)
+
+        cursor는 이전 페이지 마지막 충전소의 stat_id이고, (다음 페이지 목록, 다음 cursor)를
+        반환한다. 목록 순서가 스냅샷 사이에도 유지되므로 스냅샷이 바뀌어도 이어서 조회할 수 있다.
+        """
+        filters = self.filters
+        mask = filters.mask(charger_types, min_output, parking_free)
+        if cursor is not None:
+            last = self.by_id.get(cursor)
+            if last is None:
+                raise ValueError("cursor가 유효하지 않습니다. 처음부터 다시 조회해 주세요")
+            # cursor 이전 위치의 비트를 지워서 그 다음부터 선택
+            mask = mask >> (last.index + 1) << (last.index + 1)
+        stations = filters.select(mask, limit + 1)
+        if len(stations) > limit:
+            return stations[:limit], stations[limit - 1].stat_id
+        return stations, None
+
+    def search(self, charger_types=None, min_output=None, parking_free=None,
+               bbox=None, lat=None, lng=None, radius=None, k=None):
+        """필터 조건과 위치 조건(영역/반경/최근접 k개)에 맞는 충전소 목록
+
+        위치 조건이 없으면 stat_nm 순, 있으면 중심(lat/lng 또는 영역의 중심)에서 가까운 순.
+        """
+        filters = self.filters
+        mask = filters.mask(charger_types, min_output, parking_free)
+        if bbox is None and lat is None:
+            return filters.select(mask)
+
+        predicate = filters.predicate(mask)
+        if bbox is not None:
+            inner = predicate
+            predicate = lambda station: in_bbox(station, bbox) and (inner is None or inner(station))
+        if lat is None:
+            lat = (bbox[1] + bbox[3]) / 2
+            lng = (bbox[0] + bbox[2]) / 2
+
+        if radius is not None:
+            found = self.spatial.within_radius(lat, lng, radius, predicate)
+            if k is not None:
+                found = found[:k]
+        elif k is not None:
+            found = self.spatial.nearest(lat, lng, k, predicate)
+        else:
+            candidates = self.spatial.within_bbox(bbox, predicate) if bbox is not None else filters.select(mask)
+            found = [(haversine_m(lat, lng, station.lat, station.lng), station)
+                     for station in candidates if station.lat is not None and station.lng is not None]
+            found.sort(key=lambda item: item[0])
+        return [station for _, station in found]
+
+
+class MappedStationSnapshot(StationSnapshot):
+    """공유 스냅샷 파일을 매핑해 읽는 스냅샷
+
+    충전소 데이터는 파일 페이지에 그대로 두고, 프로세스에는 충전소별 핸들과
+    공간/필터 인덱스만 만든다.
+    """
+
+    def __init__(self, snapshot_file):
+        header = snapshot_file.header
+        self.file = snapshot_file
+        self.version = tuple(header['version'])
+        self.version_tag = header['versionTag']
+        self.loaded_at = header['loadedAt']
+        self.change_seq = header['changeSeq']
+        self.min_change_seq = header['minChangeSeq']
+        self.stations = [MappedStation(snapshot_file, i, self.loaded_at) for i in range(header['count'])]
+        self.departs = DepartTimes(snapshot_file.column('all_departs'))
+        self.modified_at = from_micros(header['modifiedAt']) if header['modifiedAt'] is not None else None
+        self._init_indexes()
+
+    def expired_departs(self, now):
+        """now 기준 30분이 지난 출발 시각 개수 (전체 충전소)"""
+        return self.departs.expired(now)
+
+    def warm(self, now):
+        """공간/필터 인덱스 미리 생성 (JSON 조각은 파일에 있음)"""
+        self.spatial
+        self.filters
+
+
+class StationSnapshotCache:
+    """프로세스 내 충전소 스냅샷 캐시
+
+    데이터 버전이 바뀌었을 때만 전체 목록을 다시 읽는다. 검증 주기(ttl)가 지나면
+    요청은 기존 스냅샷으로 바로 응답하고, 버전 확인과 재적재는 백그라운드에서 수행한다.
+
+    shared_path를 주면 같은 호스트의 워커들이 공유 스냅샷 파일 하나를 매핑해 함께 읽는다.
+    파일이 확인한 버전(변경 이력 번호)보다 오래됐을 때만, 잠금을 얻은 한 워커가 DB에서
+    목록을 읽어 파일을 새로 쓰고 나머지 워커는 그 파일을 기다렸다가 매핑한다.
+    """
+
+    def __init__(self, ttl=5.0, max_age=300.0, shared_path=None, shared_wait=30.0):
+        self.ttl = ttl
+        # 버전이 그대로여도 이 시간이 지나면 다시 적재 (버전에 잡히지 않는 변경 대비)
+        self.max_age = max_age
+        self.shared_path = shared_path
+        # 다른 워커가 공유 파일을 쓰는 동안 기다리는 최대 시간 (초)
+        self.shared_wait = shared_wait
+        self._writer_lock = WriterLock(shared_path) if shared_path else None
+        self._snapshot = None
+        self._checked_at = 0.0
+        # 스냅샷이 없을 때 동시에 들어온 요청들은 적재 한 번의 결과를 함께 기다림
+        self._load_flight = SingleFlight('station_snapshot')
+        self._refresh_task = None
+        # 스냅샷이 교체될 때 (이전, 새) 스냅샷으로 호출되는 콜백들
+        self._listeners = []
+        # 지표용 (데이터 버전 확인 수, 스냅샷 재적재 수)
+        self.checks = 0
+        self.reloads = 0
+        # 이 프로세스가 공유 스냅샷 파일을 새로 쓴 수
+        self.file_writes = 0
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    async def get(self):
+        """현재 스냅샷 (없으면 적재할 때까지 대기, 오래됐으면 백그라운드 재검증)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return await self._load_flight.run('load', self.revalidate)
+
+        if time.monotonic() - self._checked_at >= self.ttl:
+            self._schedule_revalidate()
+        return snapshot
+
+    def add_listener(self, callback):
+        """스냅샷 교체 시 호출할 콜백 등록"""
+        self._listeners.append(callback)
+
+    def mark_stale(self):
+        """다음 요청에서 버전을 다시 확인하도록 표시"""
+        self._checked_at = 0.0
+
+    def _schedule_revalidate(self):
+        """백그라운드 버전 확인 시작 (진행 중이면 그 작업) 후 작업 반환"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.revalidate())
+        return self._refresh_task
+
+    async def check(self):
+        """주기적인 버전 확인 (진행 중인 확인이 있으면 새로 시작하지 않고 그 결과를 함께 기다림)"""
+        return await asyncio.shield(self._schedule_revalidate())
+
+    async def refresh(self):
+        """데이터가 바뀌었다는 알림을 받았을 때 바로 버전 확인
+
+        진행 중인 확인은 알림 전에 버전을 읽었을 수 있으므로 끝나기를 기다렸다가 다시 확인한다.
+        """
+        while self._refresh_task is not None and not self._refresh_task.done():
+            await asyncio.shield(self._refresh_task)
+        self._refresh_task = asyncio.create_task(self.revalidate())
+        return await asyncio.shield(self._refresh_task)
+
+    async def revalidate(self, force=False):
+        """데이터 버전을 확인하고 바뀌었으면 스냅샷을 새로 적재"""
+        self._checked_at = time.monotonic()
+        self.checks += 1
+        # 목록이 레플리카에서 읽히면 버전 확인 시점까지의 쓰기만 반영이 보장되므로 그 전 시각을 기준으로 함
+        started_at = time.monotonic()
+        try:
+            version_rows = await run_query(DATA_VERSION_QUERY, name='data_version')
+            if not version_rows:
+                return self._snapshot
+            row = version_rows[0]
+            version = (row['ingest_time'], row['station_count'], row['demand_time'], row['demand_count'],
+                       row['change_seq'])
+
+            current = self._snapshot
+            if self.shared_path is not None:
+                # 공유 파일 모드에서는 force와 관계없이 이 버전까지 반영한 파일이 있으면 그대로 사용
+                snapshot = await self._load_shared(version, row, started_at)
+                if snapshot is current:
+                    return current
+            else:
+                if (not force and current is not None and current.version == version
+                        and time.monotonic() - current.loaded_at < self.max_age):
+                    return current
+                snapshot = await get_read_pool().run(self._load, version, row, started_at)
+
+            self._snapshot = snapshot
+            self.reloads += 1
+            print(f"충전소 스냅샷 갱신: {len(snapshot.stations)}개 (버전 {snapshot.version})")
+            for callback in self._listeners:
+                try:
+                    callback(current, self._snapshot)
+                except Exception as e:
+                    print(f"스냅샷 교체 콜백 오류: {e}")
+            return self._snapshot
+        except Exception as e:
+            print(f"충전소 스냅샷 갱신 실패 (기존 스냅샷 유지): {e}")
+            return self._snapshot
+
+    @staticmethod
+    def _load(version, row, started_at):
+        """DB에서 전체 목록을 읽어 스냅샷 생성 (블로킹, DB 전용 스레드에서 실행)
+
+        버전을 먼저 읽고 목록을 읽으므로, 그 사이 변경이 있으면 다음 검증에서 다시 적재된다.
+        목록은 서버 측 커서로 나눠 받으면서 바로 스냅샷 객체로 변환한다.
+        데이터 버전은 주 DB에서 읽고, 목록은 그 버전의 변경 이력까지 반영한 레플리카가 있으면 레플리카에서 읽는다.
+        """
+        rows = iter_query(STATION_LIST_QUERY, name='station_list', read_seq=row['change_seq'])
+        return StationSnapshot(version, rows, row['change_seq'], row['min_change_seq'], started_at)
+
+    def _write_shared(self, version, row, started_at):
+        """DB에서 목록을 읽어 공유 스냅샷 파일을 새로 쓰고 매핑 (블로킹, DB 전용 스레드에서 실행)"""
+        self._load(version, row, started_at).write_file(self.shared_path)
+        return MappedStationSnapshot(SnapshotFile(self.shared_path))
+
+    def _map_shared(self, version_tag, change_seq):
+        """공유 파일이 확인한 버전이거나 그 뒤의 변경까지 반영했고 max_age 안에 쓴 것이면
+        매핑한 스냅샷 (아니면 None)
+
+        다른 워커가 조금 늦게 버전을 확인해 더 새 파일을 썼을 수 있으므로 변경 이력 번호가
+        더 크면 받아들인다. 현재 스냅샷이 같은 파일이면 다시 매핑하지 않고 그대로 반환한다.
+        """
+        current = self._snapshot
+        if isinstance(current, MappedStationSnapshot) and current.file.id == file_id(self.shared_path):
+            snapshot = current
+        else:
+            try:
+                snapshot = MappedStationSnapshot(SnapshotFile(self.shared_path))
+            except FileNotFoundError:
+                return None
+            except (SnapshotFileError, KeyError, ValueError) as e:
+                print(f"공유 스냅샷 파일을 읽지 못했습니다 (새로 저장): {e}")
+                return None
+        if snapshot.version_tag != version_tag and snapshot.change_seq <= change_seq:
+            return None
+        if time.monotonic() - snapshot.loaded_at >= self.max_age:
+            return None
+        return snapshot
+
+    async def _load_shared(self, version, row, started_at):
+        """공유 스냅샷 파일에서 적재 (파일이 오래됐으면 잠금을 얻은 한 워커만 DB에서 읽어 새로 씀)"""
+        version_tag = make_etag(*version).strip('"')
+        deadline = time.monotonic() + self.shared_wait
+        while True:
+            snapshot = self._map_shared(version_tag, row['change_seq'])
+            if snapshot is not None:
+                return snapshot
+            if self._writer_lock.try_acquire():
+                try:
+                    # 잠금을 얻기 직전에 다른 워커가 새 파일을 썼을 수 있음
+                    snapshot = self._map_shared(version_tag, row['change_seq'])
+                    if snapshot is None:
+                        snapshot = await get_read_pool().run(self._write_shared, version, row, started_at)
+                        self.file_writes += 1
+                    return snapshot
+                finally:
+                    self._writer_lock.release()
+            if time.monotonic() >= deadline:
+                print("공유 스냅샷 파일 갱신 대기 시간 초과 (기존 스냅샷 유지)")
+                return self._snapshot
+            await asyncio.sleep(0.05)
+
+    def metrics(self):
+        """스냅샷 캐시 지표"""
+        snapshot = self._snapshot
+        return [
+            ('station_snapshot_stations', 'gauge', '현재 스냅샷의 충전소 수',
+             len(snapshot.stations) if snapshot else 0),
+            ('station_snapshot_age_seconds', 'gauge', '현재 스냅샷을 읽은 뒤 지난 시간 (초)',
+             round(time.monotonic() - snapshot.loaded_at, 3) if snapshot else 0),
+            ('station_snapshot_checks_total', 'counter', '데이터 버전 확인 수', self.checks),
+            ('station_snapshot_reloads_total', 'counter', '스냅샷 재적재 수', self.reloads),
+            ('station_snapshot_file_writes_total', 'counter', '이 프로세스가 공유 스냅샷 파일을 새로 쓴 수',
+             self.file_writes),
+        ]
+
+station_cache = StationSnapshotCache(
+    ttl=float(os.getenv('STATION_SNAPSHOT_TTL', '5')),
+    max_age=float(os.getenv('STATION_SNAPSHOT_MAX_AGE', '300')),
+    shared_path=os.getenv('STATION_SNAPSHOT_FILE') or None,
+)
+
+registry.add_collector(station_cache.metrics)
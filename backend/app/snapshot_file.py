@@ -0,0 +1,153 @@
+import fcntl
+import json
+import mmap
+import os
+import struct
+
+# 공유 스냅샷 파일 형식
+#   [매직 8바이트][헤더 위치 8바이트][헤더 길이 8바이트][컬럼 ...][헤더 JSON]
+# 컬럼은 8바이트 경계에 맞춘 고정 길이 배열이고, 헤더에 (위치, 타입 코드, 길이)를 기록한다.
+MAGIC = b'EVSNAP01'
+PREFIX = struct.Struct('<8sQQ')
+ALIGN = 8
+
+
+class SnapshotFileError(Exception):
+    """공유 스냅샷 파일을 읽을 수 없음 (형식이 다르거나 손상됨)"""
+
+
+class StringTable:
+    """문자열 테이블 (같은 문자열은 한 번만 저장, 0번은 None)"""
+
+    def __init__(self):
+        self._indexes = {}
+        self._values = []
+
+    def add(self, value):
+        """문자열의 번호 (None이면 0)"""
+        if value is None:
+            return 0
+        index = self._indexes.get(value)
+        if index is None:
+            self._values.append(value.encode('utf-8'))
+            index = self._indexes[value] = len(self._values)
+        return index
+
+    def columns(self):
+        """(오프셋 배열 값, UTF-8 바이트) - i번 문자열은 blob[offsets[i - 1]:offsets[i]]"""
+        offsets = [0]
+        for value in self._values:
+            offsets.append(offsets[-1] + len(value))
+        return offsets, b''.join(self._values)
+
+
+def write_snapshot_file(path, header, columns):
+    """컬럼들을 공유 스냅샷 파일로 저장
+
+    columns는 {이름: array.array 또는 bytes}. 같은 디렉토리의 임시 파일에 모두 쓴 뒤
+    os.replace로 교체하므로, 읽는 쪽은 항상 완성된 이전 파일이나 새 파일 중 하나만 본다.
+    이미 파일을 매핑한 프로세스는 교체 후에도 이전 파일을 계속 읽을 수 있다.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    layout = {}
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(b'\0' * PREFIX.size)
+            offset = PREFIX.size
+            for name, values in columns.items():
+                data = values.tobytes() if hasattr(values, 'tobytes') else bytes(values)
+                typecode = getattr(values, 'typecode', 'B')
+                padding = -offset % ALIGN
+                f.write(b'\0' * padding)
+                offset += padding
+                layout[name] = [offset, typecode, len(data) // struct.calcsize(typecode)]
+                f.write(data)
+                offset += len(data)
+            body = json.dumps(dict(header, columns=layout), ensure_ascii=False).encode('utf-8')
+            f.write(body)
+            f.seek(0)
+            f.write(PREFIX.pack(MAGIC, offset, len(body)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def file_id(path):
+    """파일이 교체됐는지 확인하는 값 (없으면 None)"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class SnapshotFile:
+    """읽기 전용으로 매핑한 공유 스냅샷 파일
+
+    컬럼은 파일 페이지를 그대로 가리키는 memoryview라서 값을 복사하지 않고 읽는다.
+    같은 파일을 매핑한 프로세스들은 페이지 캐시를 함께 쓰므로 워커 수가 늘어도
+    충전소 데이터가 차지하는 메모리는 그대로다.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        if len(view) < PREFIX.size:
+            raise SnapshotFileError(f"공유 스냅샷 파일이 너무 짧습니다: {path}")
+        magic, header_offset, header_length = PREFIX.unpack_from(view)
+        if magic != MAGIC:
+            raise SnapshotFileError(f"공유 스냅샷 파일 형식이 다릅니다: {path}")
+        self.header = json.loads(bytes(view[header_offset:header_offset + header_length]))
+        self._columns = {}
+        for name, (offset, typecode, length) in self.header['columns'].items():
+            size = struct.calcsize(typecode)
+            self._columns[name] = view[offset:offset + length * size].cast(typecode)
+        self._string_offsets = self._columns['string_offsets']
+        self._string_blob = self._columns['string_blob']
+
+    def column(self, name):
+        return self._columns[name]
+
+    def string(self, index):
+        """문자열 테이블의 index번 문자열 (0이면 None)"""
+        if index == 0:
+            return None
+        return str(self._string_blob[self._string_offsets[index - 1]:self._string_offsets[index]], 'utf-8')
+
+    def blob(self, name, start, end):
+        """바이트 컬럼의 [start, end) 구간"""
+        return self._columns[name][start:end].tobytes()
+
+
+class WriterLock:
+    """공유 스냅샷 파일을 새로 쓸 프로세스 선출용 잠금 (flock, 프로세스가 죽으면 자동 해제)"""
+
+    def __init__(self, path):
+        self.path = f"{path}.lock"
+        self._fd = None
+
+    def try_acquire(self):
+        """잠금을 바로 얻으면 True (다른 프로세스가 쓰는 중이면 False)"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,149 @@
+import math
+from collections import defaultdict
+
+EARTH_RADIUS_M = 6371008.8
+
+# 위도 1도의 거리 (미터)
+METERS_PER_DEG_LAT = 111320.0
+
+
+def parse_bbox(bbox):
+    """'minLng,minLat,maxLng,maxLat' 형식의 영역 문자열을 튜플로 변환"""
+    if not bbox:
+        return None
+    parts = bbox.split(',')
+    if len(parts) != 4:
+        raise ValueError("bbox는 minLng,minLat,maxLng,maxLat 형식이어야 합니다")
+    min_lng, min_lat, max_lng, max_lat = (float(part) for part in parts)
+    if min_lng > max_lng or min_lat > max_lat:
+        raise ValueError("bbox의 최솟값이 최댓값보다 큽니다")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def bbox_contains(bbox, lat, lng):
+    """좌표가 영역 안에 있는지 확인"""
+    min_lng, min_lat, max_lng, max_lat = bbox
+    return min_lng <= lng <= max_lng and min_lat <= lat <= max_lat
+
+
+def in_bbox(station, bbox):
+    """충전소가 영역 안에 있는지 확인"""
+    if station.lat is None or station.lng is None:
+        return False
+    return bbox_contains(bbox, station.lat, station.lng)
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """두 좌표 사이의 거리 (미터)"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _ring_cells(center_row, center_col, ring):
+    """중심 칸에서 ring 겹 떨어진 테두리 칸들"""
+    if ring == 0:
+        yield center_row, center_col
+        return
+    for col in range(center_col - ring, center_col + ring + 1):
+        yield center_row - ring, col
+        yield center_row + ring, col
+    for row in range(center_row - ring + 1, center_row + ring):
+        yield row, center_col - ring
+        yield row, center_col + ring
+
+
+class GridIndex:
+    """위경도 격자 기반 공간 인덱스
+
+    충전소를 cell_deg 크기의 격자 칸에 나눠 담아, 영역/반경/최근접 검색 시
+    필요한 칸만 확인한다.
+    """
+
+    def __init__(self, stations, cell_deg=0.01):
+        self.cell_deg = cell_deg
+        self.cells = defaultdict(list)
+        for station in stations:
+            if station.lat is None or station.lng is None:
+                continue
+            self.cells[self._cell(station.lat, station.lng)].append(station)
+        if self.cells:
+            rows = [cell[0] for cell in self.cells]
+            cols = [cell[1] for cell in self.cells]
+            self.row_range = (min(rows), max(rows))
+            self.col_range = (min(cols), max(cols))
+        else:
+            self.row_range = self.col_range = (0, -1)
+
+    def _cell(self, lat, lng):
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def _cells_in(self, min_row, max_row, min_col, max_col):
+        """범위 안의 비어 있지 않은 칸들의 충전소"""
+        min_row = max(min_row, self.row_range[0])
+        max_row = min(max_row, self.row_range[1])
+        min_col = max(min_col, self.col_range[0])
+        max_col = min(max_col, self.col_range[1])
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                stations = self.cells.get((row, col))
+                if stations:
+                    yield from stations
+
+    def within_bbox(self, bbox, predicate=None):
+        """영역 안의 충전소 목록"""
+        min_lng, min_lat, max_lng, max_lat = bbox
+        min_row, min_col = self._cell(min_lat, min_lng)
+        max_row, max_col = self._cell(max_lat, max_lng)
+        return [
+            station for station in self._cells_in(min_row, max_row, min_col, max_col)
+            if in_bbox(station, bbox) and (predicate is None or predicate(station))
+        ]
+
+    def within_radius(self, lat, lng, radius_m, predicate=None):
+        """중심에서 반경 안의 (거리, 충전소) 목록 (가까운 순)"""
+        d_lat = radius_m / METERS_PER_DEG_LAT
+        d_lng = radius_m / (METERS_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        min_row, min_col = self._cell(lat - d_lat, lng - d_lng)
+        max_row, max_col = self._cell(lat + d_lat, lng + d_lng)
+        result = []
+        for station in self._cells_in(min_row, max_row, min_col, max_col):
+            if predicate is not None and not predicate(station):
+                continue
+            distance = haversine_m(lat, lng, station.lat, station.lng)
+            if distance <= radius_m:
+                result.append((distance, station))
+        result.sort(key=lambda item: item[0])
+        return result
+
+    def nearest(self, lat, lng, k, predicate=None):
+        """중심에서 가까운 k개의 (거리, 충전소) 목록
+
+        중심 칸에서 한 겹씩 넓혀 가며 검색하고, 아직 보지 않은 칸까지의 최소 거리가
+        k번째 후보의 거리보다 멀어지면 멈춘다.
+        """
+        if not self.cells or k <= 0:
+            return []
+        center_row, center_col = self._cell(lat, lng)
+        # 격자 한 칸의 최소 변 길이 (미터)
+        cell_m = self.cell_deg * METERS_PER_DEG_LAT * min(1.0, max(math.cos(math.radians(lat)), 1e-6))
+        max_ring = max(
+            abs(center_row - self.row_range[0]), abs(center_row - self.row_range[1]),
+            abs(center_col - self.col_range[0]), abs(center_col - self.col_range[1]),
+        )
+
+        candidates = []
+        for ring in range(max_ring + 1):
+            for cell in _ring_cells(center_row, center_col, ring):
+                for station in self.cells.get(cell, ()):
+                    if predicate is None or predicate(station):
+                        candidates.append((haversine_m(lat, lng, station.lat, station.lng), station))
+            if len(candidates) >= k:
+                candidates.sort(key=lambda item: item[0])
+                if candidates[k - 1][0] <= ring * cell_m:
+                    break
+        candidates.sort(key=lambda item: item[0])
+        return candidates[:k]
@@ -0,0 +1,154 @@
+"""nginx 마이크로 캐시 부하 테스트 (백엔드 직접 호출 대비 백엔드 요청 수 비교)
+
+docker-compose로 nginx + fastapi-blue/green을 띄운 뒤, 같은 요청 패턴(목록 필터 조합 + 상세)을
+백엔드에 직접 보낼 때와 nginx를 거칠 때 백엔드가 실제로 처리한 요청 수를 비교한다.
+백엔드 요청 수는 각 백엔드의 /metrics(http_requests_total)로 세므로 WEB_CONCURRENCY=1로 띄워야
+정확하다 (워커가 여럿이면 /metrics가 워커 하나의 값만 보여줌). /metrics 조회에는 관리자 토큰이 필요하다
+(--admin-token 또는 ADMIN_TOKEN 환경변수).
+측정 중에 수집 Lambda를 실행하면 데이터 버전이 바뀌어 잠깐 MISS가 늘었다가 다시 HIT로 돌아온다.
+
+    cd backend && WEB_CONCURRENCY=1 docker-compose up -d
+    python -m benchmarks.edge_cache --edge http://localhost --backend http://localhost:8000 \\
+        --backend http://localhost:8001 --duration 20 --concurrency 32
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# 목록 필터 조합 (파라미터 순서를 섞어 보내도 nginx에서는 같은 캐시 키)
+LIST_QUERIES = [
+    {},
+    {'chargerTypes': '04'},
+    {'chargerTypes': '04,07', 'minOutput': '100'},
+    {'parkingFree': 'Y'},
+    {'minOutput': '50', 'parkingFree': 'Y'},
+    {'lat': '36.3504', 'lng': '127.3845', 'radius': '3000'},
+    {'lat': '36.3504', 'lng': '127.3845', 'k': '20'},
+    {'limit': '100'},
+]
+
+BACKEND_ROUTES = ('/api/stations', '/api/stations/{stat_id}', '/api/data-version')
+
+
+def get(url, timeout=10, headers=None):
+    """(상태 코드, 헤더, 본문)"""
+    request = urllib.request.Request(url, headers={'Accept-Encoding': 'gzip', **(headers or {})})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def backend_requests(backends, admin_token):
+    """백엔드들이 처리한 충전소 목록/상세/데이터 버전 요청 수 합계 (route별)"""
+    counts = Counter()
+    for backend in backends:
+        try:
+            status, _, body = get(f"{backend}/metrics", headers={'X-Admin-Token': admin_token})
+        except OSError as e:
+            print(f"  {backend}/metrics 조회 실패: {e}")
+            continue
+        if status != 200:
+            print(f"  {backend}/metrics 조회 실패: HTTP {status} (관리자 토큰 확인)")
+            continue
+        for line in body.decode('utf-8').splitlines():
+            if not line.startswith('http_requests_total{'):
+                continue
+            labels, value = line.rsplit(' ', 1)
+            for route in BACKEND_ROUTES:
+                if f'route="{route}"' in labels and 'method="GET"' in labels:
+                    counts[route] += float(value)
+    return counts
+
+
+def make_paths(base, stat_ids, count, seed):
+    """요청 경로 목록 (목록 70%, 상세 30%, 상세는 일부 인기 충전소에 몰리게)"""
+    rng = random.Random(seed)
+    hot = stat_ids[:50] or ['UNKNOWN']
+    paths = []
+    for _ in range(count):
+        if rng.random() < 0.7:
+            params = list(rng.choice(LIST_QUERIES).items())
+            rng.shuffle(params)
+            # 캐시 무력화용 파라미터가 붙어도 nginx는 정규화한 조건만 키로 씀
+            if rng.random() < 0.2:
+                params.append(('_', str(rng.randrange(10 ** 6))))
+            query = '&'.join(f"{key}={value}" for key, value in params)
+            paths.append(f"{base}/api/stations" + (f"?{query}" if query else ''))
+        else:
+            brief = '' if rng.random() < 0.5 else '?brief=no'
+            paths.append(f"{base}/api/stations/{rng.choice(hot)}{brief}")
+    return paths
+
+
+def run(base, backends, admin_token, stat_ids, duration, concurrency, seed):
+    """duration초 동안 concurrency개 스레드로 요청 후 결과 출력"""
+    before = backend_requests(backends, admin_token)
+    paths = make_paths(base, stat_ids, 100000, seed)
+    statuses = Counter()
+    cache_statuses = Counter()
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(offset):
+        sent = 0
+        index = offset
+        while time.monotonic() < deadline:
+            status, headers, _ = get(paths[index % len(paths)])
+            with lock:
+                statuses[status] += 1
+                cache_statuses[headers.get('X-Cache-Status', '-')] += 1
+            index += concurrency
+            sent += 1
+        return sent
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        sent = sum(executor.map(worker, range(concurrency)))
+    elapsed = time.monotonic() - started
+    after = backend_requests(backends, admin_token)
+
+    handled = {route: after[route] - before[route] for route in BACKEND_ROUTES}
+    total = sum(handled.values())
+    print(f"  클라이언트 {sent}건 ({sent / elapsed:8.1f} req/s), 상태 코드 {dict(statuses)}")
+    print(f"  백엔드 {total:.0f}건 ({total / elapsed:8.1f} req/s): "
+          + ', '.join(f"{route} {count:.0f}" for route, count in handled.items()))
+    if any(status != '-' for status in cache_statuses):
+        print(f"  X-Cache-Status {dict(cache_statuses)}")
+    return sent / elapsed, total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--edge', default='http://localhost', help='nginx 주소')
+    parser.add_argument('--backend', action='append', help='백엔드 주소 (여러 번 지정 가능)')
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--admin-token', default=os.getenv('ADMIN_TOKEN', ''), help='/metrics 조회용 관리자 토큰')
+    args = parser.parse_args()
+    backends = args.backend or ['http://localhost:8000', 'http://localhost:8001']
+
+    _, _, body = get(f"{backends[0]}/api/stations?limit=200")
+    stat_ids = [station['statId'] for station in json.loads(body)['stations']]
+    print(f"상세 조회 대상 충전소 {len(stat_ids[:50])}개")
+
+    print(f"백엔드 직접 호출 ({backends[0]})")
+    _, direct_backend_rate = run(backends[0], backends, args.admin_token, stat_ids, args.duration, args.concurrency, args.seed)
+    print(f"nginx 경유 ({args.edge})")
+    edge_rate, edge_backend_rate = run(args.edge, backends, args.admin_token, stat_ids, args.duration, args.concurrency, args.seed)
+    if edge_backend_rate:
+        print(f"백엔드 요청률 {direct_backend_rate:.1f} → {edge_backend_rate:.1f} req/s "
+              f"(nginx 경유 시 클라이언트 요청 {edge_rate / edge_backend_rate:.1f}건당 백엔드 1건)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""마이그레이션 인덱스 적용 전/후 쿼리 실행 계획 비교와 목록 필터 경로 비교
+
+1. 이력 인덱스 (마이그레이션 2)
+   app.migrations가 적용된 DB에서 대표 쿼리를 EXPLAIN (ANALYZE, BUFFERS)로 실행하고, 같은 트랜잭션의
+   SAVEPOINT 안에서 인덱스를 지운 상태로도 실행한 뒤 되돌린다. 한쪽만 캐시가 데워진 상태에서 재지 않도록
+   회차마다 적용 전/후 순서를 번갈아 실행하고 중앙값을 비교한다.
+2. 목록 필터 (충전기 타입/최소 출력/무료 주차)
+   기존 /api/stations가 실행하던 필터 쿼리(ANY(charger_types) OR, CAST(max_output AS INTEGER))와,
+   지금 쓰는 스냅샷 메모리 비트셋 인덱스(app.filters)로 같은 조건을 거르는 시간을 비교한다.
+   필터는 DB를 거치지 않으므로 grouped_chargers에는 필터용 인덱스를 두지 않는다.
+
+트랜잭션은 항상 ROLLBACK하므로 DB에는 아무것도 남지 않지만, 측정 중에는 인덱스를 지운
+테이블에 잠금이 걸리므로 운영 DB가 아닌 개발 DB에서 실행한다.
+--synthetic N을 주면 같은 트랜잭션 안에 가상 충전소 N개와 --days일치 이력을 넣고 측정한다.
+
+    cd backend && python -m benchmarks.query_plans --synthetic 3000
+"""
+import argparse
+import json
+import statistics
+import time
+
+import psycopg2
+from dotenv import load_dotenv
+from psycopg2.extras import RealDictCursor
+
+from app.db import load_postgres_config
+from app.filters import CHARGER_TYPE_COMPAT
+from app.snapshot import STATION_LIST_QUERY, StationSnapshot
+
+# 마이그레이션 2에서 추가한 인덱스 (적용 전 상태를 만들 때 삭제)
+MIGRATION_INDEXES = [
+    'idx_history_chargers_latest',
+    'idx_history_chargers_updated',
+    'idx_history_stations_updated',
+]
+
+# (이름, 쿼리, 파라미터) - 파라미터의 None은 샘플 충전기로 채움
+QUERIES = [
+    ('충전기별 최근 이력', """
+        SELECT visit_num, cur_stat, updated_at
+        FROM history_chargers
+        WHERE stat_id = %s AND chger_id = %s
+        ORDER BY updated_at DESC
+        LIMIT 1
+    """, (None, None)),
+    ('최근 이력 집계', """
+        SELECT stat_id, COUNT(*), SUM(visit_num)
+        FROM history_chargers
+        WHERE updated_at >= CURRENT_TIMESTAMP - INTERVAL '1 minutes'
+        GROUP BY stat_id
+    """, ()),
+    ('30일 지난 이력', """
+        SELECT COUNT(*) FROM history_stations WHERE updated_at < CURRENT_TIMESTAMP - INTERVAL '30 days'
+    """, ()),
+]
+
+# (이름, chargerTypes, minOutput, parkingFree) - 목록 필터 조건
+FILTER_CASES = [
+    ('충전기 타입 DC콤보', '04', None, None),
+    ('출력 100 이상', None, 100, None),
+    ('무료 주차 + 출력 50 이상', None, 50, 'Y'),
+    ('DC차데모/AC3상 + 출력 100 이상 + 무료 주차', '01,07', 100, 'Y'),
+]
+
+# 기존 /api/stations의 목록 쿼리 (필터 조건은 legacy_filter_query에서 채움)
+LEGACY_LIST_QUERY = """
+    SELECT
+        gc.stat_id, gc.stat_nm, CAST(gc.lat AS VARCHAR) as lat, CAST(gc.lng AS VARCHAR) as lng,
+        gc.charger_types, gc.parking_free, gc.total_chargers, gc.usable_chargers, gc.using_chargers,
+        CAST(gc.max_output AS VARCHAR) as max_output, gc.use_time, gc.last_update_time,
+        COALESCE(di.view_num, 0) as view_num,
+        COALESCE(di.departs_in_30m, ARRAY[]::TIMESTAMP[]) as departs_in_30m,
+        COALESCE(di.hourly_visit_num, ARRAY[]::INTEGER[]) as hourly_visit_num
+    FROM grouped_chargers gc
+    LEFT JOIN demand_info di ON gc.stat_id = di.stat_id
+    {where_clause}
+    ORDER BY gc.stat_nm
+"""
+
+SYNTHETIC_STATIONS = """
+    INSERT INTO grouped_chargers (stat_id, stat_nm, lat, lng, total_chargers, charger_types, max_output, parking_free)
+    SELECT 'BENCH' || i, '벤치마크 ' || i, 36.3, 127.4, 4,
+           ARRAY[lpad((1 + i % 7)::text, 2, '0')],
+           (ARRAY[7, 50, 100, 200])[1 + i % 4],
+           CASE WHEN i % 3 = 0 THEN 'Y' ELSE 'N' END
+    FROM generate_series(1, %(stations)s) AS i
+"""
+
+SYNTHETIC_HISTORY = """
+    INSERT INTO history_chargers (stat_id, chger_id, visit_num, cur_stat, updated_at)
+    SELECT 'BENCH' || s, lpad(c::text, 2, '0'), (s + c + t) % 3, '2',
+           date_trunc('minute', CURRENT_TIMESTAMP) - t * INTERVAL '30 minutes'
+    FROM generate_series(1, %(stations)s) AS s, generate_series(1, 4) AS c, generate_series(0, %(slots)s) AS t
+"""
+
+SYNTHETIC_STATION_HISTORY = """
+    INSERT INTO history_stations (stat_id, charger_count, visit_num, updated_at)
+    SELECT stat_id, COUNT(*), SUM(visit_num), updated_at
+    FROM history_chargers
+    WHERE stat_id LIKE 'BENCH%'
+    GROUP BY stat_id, updated_at
+"""
+
+
+def explain(cursor, query, params):
+    """실행 계획 최상위 노드와 실행 시간/버퍼 사용량 (1회 실행)"""
+    cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query, params)
+    result = cursor.fetchone()[0]
+    result = json.loads(result) if isinstance(result, str) else result
+    plan = result[0]
+    root = plan['Plan']
+    return {
+        'nodes': describe(root),
+        'ms': plan['Execution Time'],
+        'buffers': root.get('Shared Hit Blocks', 0) + root.get('Shared Read Blocks', 0)
+    }
+
+
+def summarize(runs):
+    """회차별 측정값을 실행 시간 중앙값으로 요약 (실행 계획/버퍼는 마지막 회차)"""
+    return dict(runs[-1], ms=statistics.median(run['ms'] for run in runs))
+
+
+def describe(node):
+    """실행 계획에서 스캔 노드 이름만 모아 한 줄로 (예: Limit > Index Scan idx_...)"""
+    label = node['Node Type']
+    if node.get('Index Name'):
+        label += f" {node['Index Name']}"
+    children = [describe(child) for child in node.get('Plans', [])]
+    return label + (f" > {', '.join(children)}" if children else '')
+
+
+def sample_charger(cursor):
+    cursor.execute("SELECT stat_id, chger_id FROM history_chargers ORDER BY updated_at DESC LIMIT 1")
+    return cursor.fetchone() or ('', '')
+
+
+def run_once(cursor, charger, results):
+    """대표 쿼리를 한 번씩 실행해 results[이름]에 추가"""
+    for name, query, params in QUERIES:
+        if None in params:
+            params = charger
+        results.setdefault(name, []).append(explain(cursor, query, params))
+
+
+def compare_indexes(cursor, repeat):
+    """인덱스 적용 후/전 측정 (회차마다 순서를 바꿔 캐시 영향이 한쪽에 몰리지 않게)"""
+    charger = sample_charger(cursor)
+    after, before = {}, {}
+    for i in range(repeat):
+        for dropped in ((False, True) if i % 2 == 0 else (True, False)):
+            if not dropped:
+                run_once(cursor, charger, after)
+                continue
+            cursor.execute("SAVEPOINT without_indexes")
+            for index in MIGRATION_INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {index}")
+            run_once(cursor, charger, before)
+            cursor.execute("ROLLBACK TO SAVEPOINT without_indexes")
+    return ({name: summarize(runs) for name, runs in before.items()},
+            {name: summarize(runs) for name, runs in after.items()})
+
+
+def legacy_filter_query(charger_types, min_output, parking_free):
+    """기존 /api/stations와 같은 방식으로 만든 필터 쿼리와 파라미터"""
+    conditions, params = [], []
+    if charger_types:
+        target_types = [code for requested in charger_types.split(',') for code in CHARGER_TYPE_COMPAT.get(requested, [])]
+        if target_types:
+            conditions.append('(' + ' OR '.join(['%s = ANY(charger_types)'] * len(target_types)) + ')')
+            params.extend(target_types)
+    if min_output:
+        conditions.append("CAST(max_output AS INTEGER) >= %s")
+        params.append(min_output)
+    if parking_free:
+        conditions.append("parking_free = %s")
+        params.append(parking_free)
+    where_clause = "WHERE " + " AND ".join(conditions) if conditions else ""
+    return LEGACY_LIST_QUERY.format(where_clause=where_clause), params
+
+
+def compare_filters(conn, repeat):
+    """목록 필터: 기존 DB 쿼리와 스냅샷 메모리 인덱스 비교"""
+    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(STATION_LIST_QUERY)
+        snapshot = StationSnapshot(('benchmark',), cursor.fetchall())
+    started = time.perf_counter()
+    snapshot.filters
+    build_ms = (time.perf_counter() - started) * 1000
+
+    results = {}
+    with conn.cursor() as cursor:
+        for name, charger_types, min_output, parking_free in FILTER_CASES:
+            query, params = legacy_filter_query(charger_types, min_output, parking_free)
+            db_runs, memory_ms = [], []
+            for _ in range(repeat):
+                db_runs.append(explain(cursor, query, params))
+                started = time.perf_counter()
+                stations = snapshot.filter(charger_types, min_output, parking_free)
+                memory_ms.append((time.perf_counter() - started) * 1000)
+            results[name] = (summarize(db_runs), statistics.median(memory_ms), len(stations))
+    return len(snapshot.stations), build_ms, results
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', type=int, default=0, help='가상 충전소 수 (0이면 기존 데이터로 측정)')
+    parser.add_argument('--days', type=int, default=7, help='가상 이력 일수')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**load_postgres_config())
+    try:
+        with conn.cursor() as cursor:
+            if args.synthetic:
+                params = {'stations': args.synthetic, 'slots': args.days * 48}
+                print(f"가상 데이터 생성 중: 충전소 {args.synthetic}개, 이력 {args.days}일")
+                cursor.execute(SYNTHETIC_STATIONS, params)
+                cursor.execute(SYNTHETIC_HISTORY, params)
+                cursor.execute(SYNTHETIC_STATION_HISTORY)
+            for table in ('grouped_chargers', 'history_chargers', 'history_stations'):
+                cursor.execute(f"ANALYZE {table}")
+
+            before, after = compare_indexes(cursor, args.repeat)
+        station_count, build_ms, filters = compare_filters(conn, args.repeat)
+    finally:
+        conn.rollback()
+        conn.close()
+
+    print("[이력 인덱스 (마이그레이션 2)]")
+    for name, _, _ in QUERIES:
+        old, new = before[name], after[name]
+        print(f"\n{name}")
+        print(f"  적용 전 {old['ms']:9.3f} ms  버퍼 {old['buffers']:7d}  {old['nodes']}")
+        print(f"  적용 후 {new['ms']:9.3f} ms  버퍼 {new['buffers']:7d}  {new['nodes']}")
+        if new['ms'] > 0:
+            print(f"  개선   {old['ms'] / new['ms']:9.1f} x")
+
+    print(f"\n[목록 필터] 충전소 {station_count}개, 메모리 인덱스 생성 {build_ms:.3f} ms (스냅샷마다 1회)")
+    for name, _, _, _ in FILTER_CASES:
+        db, memory_ms, count = filters[name]
+        print(f"\n{name} ({count}개)")
+        print(f"  기존 DB 쿼리 {db['ms']:9.3f} ms  버퍼 {db['buffers']:7d}  {db['nodes']}")
+        print(f"  메모리 필터  {memory_ms:9.3f} ms")
+        if memory_ms > 0:
+            print(f"  개선        {db['ms'] / memory_ms:9.1f} x")
+
+if __name__ == '__main__':
+    main()
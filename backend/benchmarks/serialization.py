@@ -0,0 +1,107 @@
+"""충전소 응답 직렬화 벤치마크 (DB 없이 가상 데이터로 측정)
+
+기존 방식 (요청마다 dict 구성 + FastAPI 기본 인코더)과
+미리 인코딩한 JSON 조각 + orjson 방식의 응답 생성 시간을 비교한다.
+
+    cd backend && python -m benchmarks.serialization --stations 5000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from app.serialize import dumps, join_array, orjson, with_field
+from app.snapshot import StationSnapshot
+
+CHARGER_TYPES = ['01', '02', '03', '04', '05', '06', '07', '08']
+
+
+def fake_rows(count, now):
+    """STATION_LIST_QUERY 결과와 같은 형태의 가상 충전소 행"""
+    rows = []
+    for i in range(count):
+        rows.append({
+            'stat_id': f'ST{i:06d}', 'stat_nm': f'충전소 {i}',
+            'lat': f'{36.2 + random.random() * 0.3:.8f}', 'lng': f'{127.2 + random.random() * 0.3:.8f}',
+            'charger_types': random.sample(CHARGER_TYPES, random.randint(1, 3)),
+            'parking_free': random.choice(['Y', 'N']),
+            'total_chargers': 4, 'usable_chargers': 2, 'using_chargers': 1,
+            'max_output': str(random.choice([7, 50, 100, 200])), 'use_time': '24시간 이용가능',
+            'last_update_time': now, 'demand_updated_at': now, 'view_num': random.randint(0, 5),
+            'departs_in_30m': [now - timedelta(minutes=random.randint(0, 40)) for _ in range(random.randint(0, 3))],
+            'hourly_visit_num': [random.randint(0, 10) for _ in range(24)],
+        })
+    return rows
+
+
+def fake_detail(station):
+    """format_station_detail 결과와 같은 형태의 가상 상세정보"""
+    detail = station.to_summary(datetime.now(timezone.utc))
+    detail["chargers"] = [
+        {"statId": station.stat_id, "chgerId": f'{n:02d}', "chgerType": '04', "stat": '2',
+         "statUpdDt": '20250101120000', "output": 100, "method": '단독', "delYn": 'N'}
+        for n in range(6)
+    ]
+    return detail
+
+
+def fastapi_render(value):
+    """FastAPI 기본 JSONResponse와 같은 방식의 인코딩"""
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(',', ':')).encode('utf-8')
+
+
+def measure(label, func, repeat):
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+    print(f"{label:<40} {elapsed:9.3f} ms")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stations', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    snapshot = StationSnapshot(('bench',), fake_rows(args.stations, now))
+    request_time = datetime.now(timezone.utc)
+    print(f"충전소 {args.stations}개, orjson {'사용' if orjson is not None else '없음 (표준 json)'}")
+
+    # 두 방식의 결과가 같은지 먼저 확인
+    old_list = fastapi_render([s.to_summary(request_time) for s in snapshot.stations])
+    new_list = join_array(s.to_json(request_time) for s in snapshot.stations)
+    assert json.loads(old_list) == json.loads(new_list)
+
+    print("\n/api/stations (전체 목록)")
+    old = measure("dict 구성 + FastAPI 인코더", lambda: fastapi_render(
+        [s.to_summary(request_time) for s in snapshot.stations]), args.repeat)
+    new = measure("JSON 조각 재사용", lambda: join_array(
+        s.to_json(request_time) for s in snapshot.stations), args.repeat)
+    print(f"{'개선':<40} {old / new:9.1f} x")
+
+    station = snapshot.stations[0]
+    detail = fake_detail(station)
+    demand_info = detail.pop("demandInfo")
+    fragment = dumps(detail)[:-1]
+    assert json.loads(with_field(fragment, "demandInfo", demand_info)) == dict(detail, demandInfo=demand_info)
+
+    print("\n/api/stations/{stat_id}?brief=no (캐시 적중)")
+    repeat = args.repeat * 500
+    old = measure("dict 구성 + FastAPI 인코더", lambda: fastapi_render(
+        dict(detail, demandInfo=station.to_summary(request_time)["demandInfo"])), repeat)
+    new = measure("JSON 조각 + 수요 정보만 인코딩", lambda: with_field(
+        fragment, "demandInfo", station.to_summary(request_time)["demandInfo"]), repeat)
+    print(f"{'개선':<40} {old / new:9.1f} x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""워커별 스냅샷과 공유 스냅샷 파일의 메모리/응답 생성 시간 비교 (DB 없이 가상 데이터로 측정)
+
+워커 수만큼 프로세스를 띄워 각자 스냅샷을 만드는 방식과, 공유 파일 하나를 매핑하는 방식의
+프로세스별 PSS(공유 페이지는 나눠 계산한 메모리)를 비교한다. Linux에서만 동작한다.
+
+    cd backend && python -m benchmarks.shared_snapshot --stations 5000 --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from app.snapshot import MappedStationSnapshot, StationSnapshot
+from app.snapshot_file import SnapshotFile
+from benchmarks.serialization import fake_rows
+
+
+def pss_mb():
+    """현재 프로세스의 PSS (MB)"""
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker(mode, path, rows, results):
+    now = datetime.now(timezone.utc)
+    before = pss_mb()
+    if mode == 'process':
+        snapshot = StationSnapshot(('bench',), rows, 1, 1)
+    else:
+        snapshot = MappedStationSnapshot(SnapshotFile(path))
+    snapshot.warm(now)
+    # 전체 목록 응답 한 번으로 공유 파일 페이지를 모두 읽음
+    started = time.perf_counter()
+    body_size = sum(len(station.to_json(now)) for station in snapshot.stations)
+    elapsed = time.perf_counter() - started
+    results.put((pss_mb() - before, elapsed * 1000, body_size))
+
+
+def run(mode, path, rows, workers):
+    # 부모 프로세스의 메모리를 물려받지 않도록 spawn으로 실행
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(mode, path, rows, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    measured = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return measured
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stations', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    rows = fake_rows(args.stations, datetime.now(timezone.utc).replace(tzinfo=None))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'stations.snap')
+        started = time.perf_counter()
+        StationSnapshot(('bench',), rows, 1, 1).write_file(path)
+        print(f"공유 파일 저장 {(time.perf_counter() - started) * 1000:.1f} ms, "
+              f"{os.path.getsize(path) / 1024 / 1024:.2f} MB")
+
+        for mode in ('process', 'shared'):
+            measured = run(mode, path, rows, args.workers)
+            total = sum(pss for pss, _, _ in measured)
+            to_json_ms = sum(ms for _, ms, _ in measured) / len(measured)
+            print(f"{mode:8s} 워커 {args.workers}개 스냅샷 PSS 합계 {total:8.1f} MB "
+                  f"(워커당 {total / args.workers:6.1f} MB), 전체 to_json {to_json_ms:6.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -29,10 +29,10 @@ else
     echo "❌ Blue 컨테이너가 실행되지 않고 있습니다."
 fi
 
-# 헬스체크 함수
+# 준비 상태 확인 함수 (커넥션 예열과 충전소 스냅샷/캐시 생성이 끝나야 /api/ready가 200)
 health_check() {
     local color=$1
-    local attempts=10
+    local attempts=40
     local port
     
     # 색상에 따라 포트 결정
@@ -42,7 +42,7 @@ health_check() {
         port="8001"
     fi
     
-    echo "📊 $color 환경 헬스체크 중... (포트: $port)"
+    echo "📊 $color 환경 준비 상태 확인 중... (포트: $port)"
     
     for i in $(seq 1 $attempts); do
         # 컨테이너가 실행 중인지 확인
@@ -52,76 +52,109 @@ health_check() {
             continue
         fi
         
-        # EC2에서 직접 포트로 헬스체크 시도
-        if curl -f http://localhost:$port/api/health > /dev/null 2>&1; then
-            echo "✅ $color 환경 헬스체크 성공! (포트: $port)"
+        # EC2에서 직접 포트로 준비 상태 확인
+        if curl -f http://localhost:$port/api/ready > /dev/null 2>&1; then
+            echo "✅ $color 환경 준비 완료! (포트: $port)"
             return 0
         fi
-        echo "⏳ $color 헬스체크 시도 $i/$attempts... (포트: $port)"
+        echo "⏳ $color 준비 상태 확인 $i/$attempts... (포트: $port)"
         sleep 3
     done
     
-    echo "❌ $color 환경 헬스체크 실패! (포트: $port)"
+    echo "❌ $color 환경 준비 시간 초과! (포트: $port)"
+    curl -s http://localhost:$port/api/ready || true
+    echo ""
     return 1
 }
 
-# Nginx 설정 업데이트 함수
+# 활성 색상 upstream 파일 (nginx.conf가 include, 저장소 파일이 아니므로 배포 때 덮어써지지 않음)
+UPSTREAM_DIR="$REPOSITORY/nginx/upstream"
+UPSTREAM_CONF="$UPSTREAM_DIR/fastapi.conf"
+
+# Nginx upstream 업데이트 함수 (준비 상태 확인을 통과한 색상 하나만 적음)
 update_nginx_config() {
     local active_color=$1
-    local nginx_config="$REPOSITORY/nginx.conf"
-    local temp_config="$REPOSITORY/nginx.conf.temp"
-    
-    echo "🔧 Nginx 설정을 $active_color 환경으로 업데이트 중..."
+    local temp_config="$UPSTREAM_CONF.temp"
     
-    # 백업 생성
-    cp "$nginx_config" "$nginx_config.backup"
+    echo "🔧 Nginx upstream을 $active_color 환경으로 업데이트 중..."
     
-    # 임시 파일로 복사
-    cp "$nginx_config" "$temp_config"
+    mkdir -p "$UPSTREAM_DIR"
     
-    if [ "$active_color" = "blue" ]; then
-        # Blue 활성화, Green 비활성화
-        sed -i 's/server fastapi-blue:8000.*$/server fastapi-blue:8000 max_fails=3 fail_timeout=30s; # Blue 환경/' "$temp_config"
-        sed -i 's/server fastapi-green:8000.*$/# server fastapi-green:8000 max_fails=3 fail_timeout=30s; # Green 환경 (비활성)/' "$temp_config"
+    # 백업 생성 (첫 배포에는 없음)
+    if [ -f "$UPSTREAM_CONF" ]; then
+        cp "$UPSTREAM_CONF" "$UPSTREAM_CONF.backup"
     else
-        # Green 활성화, Blue 비활성화
-        sed -i 's/server fastapi-blue:8000.*$/# server fastapi-blue:8000 max_fails=3 fail_timeout=30s; # Blue 환경 (비활성)/' "$temp_config"
-        sed -i 's/.*server fastapi-green:8000.*$/server fastapi-green:8000 max_fails=3 fail_timeout=30s; # Green 환경/' "$temp_config"
+        rm -f "$UPSTREAM_CONF.backup"
     fi
     
-    # 편집된 파일을 원래 위치로 복사
-    cp "$temp_config" "$nginx_config"
-    rm -f "$temp_config"
+    # 임시 파일에 쓴 뒤 교체 (nginx가 반쯤 쓴 파일을 읽지 않도록)
+    echo "server fastapi-${active_color}:8000 max_fails=3 fail_timeout=30s; # ${active_color} 환경" > "$temp_config"
+    mv "$temp_config" "$UPSTREAM_CONF"
     
-    echo "✅ Nginx 설정 업데이트 완료 ($active_color 활성)"
+    echo "✅ Nginx upstream 업데이트 완료 ($active_color 활성)"
+}
+
+# Nginx upstream 롤백 함수
+restore_nginx_config() {
+    if [ -f "$UPSTREAM_CONF.backup" ]; then
+        cp "$UPSTREAM_CONF.backup" "$UPSTREAM_CONF"
+    else
+        rm -f "$UPSTREAM_CONF"
+    fi
 }
 
-# Nginx 재시작 함수
-restart_nginx() {
-    echo "🔄 Nginx 재시작 중..."
+# Nginx 설정 적용 함수 (없으면 시작, 있으면 설정 검사 후 무중단 reload)
+reload_nginx() {
+    echo "🔄 Nginx 설정 적용 중..."
     
-    if docker-compose -f docker-compose.yml restart nginx; then
-        echo "✅ Nginx 재시작 성공!"
-        sleep 3  # nginx가 완전히 시작될 때까지 대기
+    # 컨테이너가 없거나 compose 설정이 바뀌었으면 (다시) 생성, 이미 떠 있으면 그대로 둠
+    if ! docker-compose -f docker-compose.yml up -d --no-deps nginx; then
+        echo "❌ Nginx 시작 실패!"
+        return 1
+    fi
+    sleep 2
+    
+    if docker-compose -f docker-compose.yml exec -T nginx nginx -t \
+        && docker-compose -f docker-compose.yml exec -T nginx nginx -s reload; then
+        echo "✅ Nginx 설정 적용 성공!"
+        sleep 1
         return 0
     else
-        echo "❌ Nginx 재시작 실패!"
+        echo "❌ Nginx 설정 적용 실패!"
         return 1
     fi
 }
 
-# Nginx 시작 함수
+# 공유 네트워크와 Nginx 시작 함수
 start_nginx_if_needed() {
     # 공유 네트워크 생성 (이미 있으면 무시됨)
     echo "🌐 공유 네트워크 확인 중..."
     docker network create fastapi-shared-network 2>/dev/null || echo "네트워크가 이미 존재합니다."
     
-    if ! docker ps | grep -q "nginx"; then
-        echo "🌐 Nginx 로드 밸런서 시작..."
+    if docker ps | grep -q "nginx"; then
+        echo "✅ Nginx 로드 밸런서가 이미 실행 중입니다."
+    elif [ -f "$UPSTREAM_CONF" ]; then
+        echo "🌐 Nginx 로드 밸런서 시작 (기존 활성 환경)..."
         # nginx만 단독으로 시작
         docker-compose -f docker-compose.yml up -d nginx --no-deps
     else
-        echo "✅ Nginx 로드 밸런서가 이미 실행 중입니다."
+        # 첫 배포: 준비된 환경이 없으므로 새 환경이 준비된 뒤 전환할 때 시작
+        echo "ℹ️ 활성 환경이 없어 Nginx는 전환 시점에 시작합니다."
+    fi
+}
+
+# DB 마이그레이션 함수 (새 이미지로 일회성 컨테이너를 띄워 실행, 실패하면 기존 환경 유지)
+run_migrations() {
+    local color=$1
+    
+    echo "🗄️ DB 마이그레이션 실행 중... ($color 이미지)"
+    
+    if docker-compose -p ${DOCKER_APP_NAME}-${color} -f docker-compose.yml run --rm --no-deps fastapi-${color} python -m app.migrations; then
+        echo "✅ DB 마이그레이션 완료!"
+        return 0
+    else
+        echo "❌ DB 마이그레이션 실패! 기존 환경을 유지합니다."
+        return 1
     fi
 }
 
@@ -132,6 +165,8 @@ start_nginx_if_needed
 if [ -z "$EXIST_BLUE" ]; then
     echo "🔵 Blue 환경으로 배포합니다..."
     
+    run_migrations blue || exit 1
+    
     # Blue 환경 시작
     docker-compose -p ${DOCKER_APP_NAME}-blue -f docker-compose.yml up -d fastapi-blue
     BEFORE_COMPOSE_COLOR="green"
@@ -139,6 +174,8 @@ if [ -z "$EXIST_BLUE" ]; then
 else
     echo "🟢 Green 환경으로 배포합니다..."
     
+    run_migrations green || exit 1
+    
     # Green 환경 시작
     docker-compose -p ${DOCKER_APP_NAME}-green -f docker-compose.yml up -d fastapi-green
     BEFORE_COMPOSE_COLOR="blue"
@@ -159,13 +196,13 @@ if [ -n "$EXIST_AFTER" ]; then
     if health_check $AFTER_COMPOSE_COLOR; then
         echo "🔄 Nginx 설정을 $AFTER_COMPOSE_COLOR 환경으로 전환..."
         
-        # Nginx 설정 업데이트
-        if update_nginx_config $AFTER_COMPOSE_COLOR && restart_nginx; then
+        # Nginx upstream 업데이트 (준비가 끝난 새 환경만 upstream에 추가)
+        if update_nginx_config $AFTER_COMPOSE_COLOR && reload_nginx; then
             echo "✅ Nginx 설정 전환 완료!"
             
             # 전환 후 최종 헬스체크 (nginx를 통한)
             echo "🔍 Nginx를 통한 최종 헬스체크..."
-            if curl -f http://localhost:80/api/health > /dev/null 2>&1; then
+            if curl -f http://localhost:80/api/ready > /dev/null 2>&1; then
                 echo "✅ Nginx를 통한 헬스체크 성공!"
             else
                 echo "⚠️ Nginx를 통한 헬스체크 실패, 하지만 계속 진행..."
@@ -190,9 +227,9 @@ if [ -n "$EXIST_AFTER" ]; then
             docker-compose -p ${DOCKER_APP_NAME}-${AFTER_COMPOSE_COLOR} -f docker-compose.yml ps
         else
             echo "❌ Nginx 설정 전환 실패! 롤백 중..."
-            # Nginx 설정 롤백
-            cp "$REPOSITORY/nginx.conf.backup" "$REPOSITORY/nginx.conf" 2>/dev/null || true
-            restart_nginx
+            # Nginx upstream 롤백
+            restore_nginx_config
+            reload_nginx || true
             
             # 컨테이너도 롤백
             docker-compose -p ${DOCKER_APP_NAME}-${AFTER_COMPOSE_COLOR} -f docker-compose.yml down 2>/dev/null || true
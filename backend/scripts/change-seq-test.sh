@@ -0,0 +1,115 @@
+#!/bin/bash
+set -e
+
+# 로컬 PostgreSQL에서 변경 이력 seq가 커밋 순서대로 보이는지 확인 (마이그레이션 3)
+#   1. 수집 Lambda처럼 긴 트랜잭션이 변경 이력을 쓰고 커밋하지 않은 상태에서도
+#   2. API의 조회수 반영 쿼리(FLUSH_VIEW_NUM_QUERY)는 기다리지 않고 커밋되며
+#   3. 데이터 버전 쿼리의 change_seq는 커밋된 조회수 반영까지만 가리키고
+#   4. 나중에 커밋한 수집 트랜잭션이 더 큰 seq를 받아, 3의 버전을 저장한 변경분 클라이언트도 수집 변경을 받아야 한다
+#
+#   cd backend && ./scripts/change-seq-test.sh
+
+cd "$(dirname "$0")/.."
+
+COMPOSE="docker-compose -f docker-compose.replica.yml"
+
+echo "🐘 로컬 PostgreSQL 시작..."
+$COMPOSE up -d postgres-primary
+
+export POSTGRES_HOST=127.0.0.1
+export POSTGRES_PORT=55432
+export POSTGRES_DB=evolution
+export POSTGRES_USER=postgres
+export POSTGRES_PASSWORD=evolution
+
+echo "⏳ DB 준비 대기 중..."
+for i in $(seq 1 30); do
+    if $COMPOSE exec -T postgres-primary pg_isready -q; then
+        break
+    fi
+    sleep 2
+done
+
+python -m app.migrations
+
+python - <<'EOF'
+import threading
+
+import psycopg2
+
+from app.counters import FLUSH_VIEW_NUM_QUERY
+from app.db import load_postgres_config
+from app.snapshot import CHANGED_STATIONS_QUERY, DATA_VERSION_QUERY
+
+
+def check(label, ok, detail=''):
+    print(f"{'✅' if ok else '❌'} {label} {detail}")
+    if not ok:
+        raise SystemExit(1)
+
+
+def connect():
+    return psycopg2.connect(**load_postgres_config())
+
+
+def change_seq(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(DATA_VERSION_QUERY)
+        seq = cursor.fetchone()[4]
+    conn.rollback()
+    return seq
+
+
+def changed_since(conn, since, until):
+    with conn.cursor() as cursor:
+        cursor.execute(CHANGED_STATIONS_QUERY, (since, until))
+        stat_ids = {row[0] for row in cursor.fetchall()}
+    conn.rollback()
+    return stat_ids
+
+
+reader = connect()
+version = change_seq(reader)
+
+# 1. 수집 Lambda: 변경 이력을 쓰고 커밋하지 않음 (커밋 전 seq는 임시 음수 번호)
+ingest = connect()
+with ingest.cursor() as cursor:
+    cursor.execute("INSERT INTO station_changes (stat_id, change_type) VALUES ('SEQTEST_INGEST', 'status') RETURNING seq")
+    pending_seq = cursor.fetchone()[0]
+check("커밋 전 seq는 임시 번호", pending_seq < 0, f"({pending_seq})")
+
+
+# 2. API 조회수 반영: 다른 연결에서 실행 (수집 트랜잭션을 기다리지 않아야 함)
+def flush():
+    conn = connect()
+    with conn.cursor() as cursor:
+        cursor.execute(FLUSH_VIEW_NUM_QUERY, (['SEQTEST_VIEW'], [1]))
+    conn.commit()
+    conn.close()
+
+
+writer = threading.Thread(target=flush)
+writer.start()
+writer.join(timeout=5)
+check("수집 트랜잭션 중에도 조회수 반영 커밋", not writer.is_alive())
+
+# 3. 데이터 버전은 커밋된 조회수 반영까지만 움직임
+flushed = change_seq(reader)
+stat_ids = changed_since(reader, version, flushed)
+check("조회수 반영 후 change_seq", flushed > version, f"({version} < {flushed})")
+check("커밋 전 수집 변경은 보이지 않음", stat_ids == {'SEQTEST_VIEW'}, f"({sorted(stat_ids)})")
+
+# 4. 수집 커밋: 커밋 순서대로 더 큰 seq를 받으므로 3의 버전을 가진 클라이언트도 받음
+ingest.commit()
+latest = change_seq(reader)
+stat_ids = changed_since(reader, flushed, latest)
+check("seq 순서 = 커밋 순서", latest > flushed, f"(조회수 {flushed} < 수집 {latest})")
+check("다음 변경분에 수집 변경 포함", stat_ids == {'SEQTEST_INGEST'}, f"({sorted(stat_ids)})")
+
+with reader.cursor() as cursor:
+    cursor.execute("DELETE FROM station_changes WHERE stat_id LIKE 'SEQTEST_%'")
+    cursor.execute("DELETE FROM demand_info WHERE stat_id LIKE 'SEQTEST_%'")
+reader.commit()
+EOF
+
+echo "🎉 변경 이력 seq 순서 확인 완료 (정리: $COMPOSE down -v)"
@@ -0,0 +1,111 @@
+#!/bin/bash
+set -e
+
+# 로컬 주 DB + 레플리카로 읽기 라우팅 확인
+#   1. 레플리카가 따라잡은 상태: 읽기가 레플리카로
+#   2. 레플리카 복제 일시 정지 후 주 DB에 쓰기: 레플리카가 밀렸으므로 주 DB로
+#   3. 레플리카 중지: 주 DB로, 재시작 후 REPLICA_RETRY_INTERVAL이 지나면 다시 레플리카로
+#
+#   cd backend && ./scripts/replica-failover-test.sh
+
+cd "$(dirname "$0")/.."
+
+COMPOSE="docker-compose -f docker-compose.replica.yml"
+
+echo "🐘 로컬 PostgreSQL (주 DB + 레플리카) 시작..."
+$COMPOSE up -d
+
+export POSTGRES_HOST=127.0.0.1
+export POSTGRES_PORT=55432
+export POSTGRES_DB=evolution
+export POSTGRES_USER=postgres
+export POSTGRES_PASSWORD=evolution
+export POSTGRES_REPLICA_HOST=127.0.0.1
+export POSTGRES_REPLICA_PORT=55433
+export REPLICA_LAG_CHECK_INTERVAL=0
+export REPLICA_RETRY_INTERVAL=3
+export DB_POOL_TIMEOUT=2
+export DB_CONNECT_TIMEOUT=2
+
+echo "⏳ DB 준비 대기 중..."
+for i in $(seq 1 30); do
+    if $COMPOSE exec -T postgres-primary pg_isready -q && $COMPOSE exec -T postgres-replica pg_isready -q; then
+        break
+    fi
+    sleep 2
+done
+
+python -m app.migrations
+
+python - <<'EOF'
+import subprocess
+import time
+
+import psycopg2
+
+from app.db import execute_query, get_replica_router, init_pool, load_postgres_config, load_replica_config
+
+COMPOSE = ['docker-compose', '-f', 'docker-compose.replica.yml']
+SEQ_QUERY = "SELECT COALESCE(MAX(seq), 0) as seq FROM station_changes"
+
+
+def control(config, statement):
+    conn = psycopg2.connect(**config)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(statement)
+        row = cursor.fetchone() if cursor.description else None
+    conn.close()
+    return row
+
+
+def write_change():
+    """다른 프로세스(수집 Lambda)의 쓰기처럼 라우터에 알리지 않고 변경 이력 추가 후 커밋된 seq 반환"""
+    control(load_postgres_config(), "INSERT INTO station_changes (stat_id, change_type) VALUES ('TEST', 'status')")
+    return control(load_postgres_config(), SEQ_QUERY)[0]
+
+
+def routed_to(read_seq):
+    router = get_replica_router()
+    before = dict(router.routed)
+    execute_query(SEQ_QUERY, read_seq=read_seq, name='replica_test')
+    return '+'.join(result for result, count in router.routed.items() if count > before[result])
+
+
+def check(label, actual, *expected):
+    mark = '✅' if actual in expected else '❌'
+    print(f"{mark} {label}: {actual} (기대값 {' 또는 '.join(expected)})")
+    if actual not in expected:
+        raise SystemExit(1)
+
+
+init_pool()
+seq = write_change()
+for _ in range(50):
+    if control(load_replica_config(), SEQ_QUERY)[0] >= seq:
+        break
+    time.sleep(0.1)
+check("레플리카가 따라잡은 상태", routed_to(seq), 'replica')
+
+control(load_replica_config(), "SELECT pg_wal_replay_pause()")
+try:
+    seq = write_change()
+    check("레플리카 복제 정지 중 새 버전 요구", routed_to(seq), 'lagging')
+finally:
+    control(load_replica_config(), "SELECT pg_wal_replay_resume()")
+time.sleep(1)
+check("복제 재개 후", routed_to(seq), 'replica')
+
+subprocess.run(COMPOSE + ['stop', 'postgres-replica'], check=True)
+try:
+    # 풀에 남은 연결이 있으면 쿼리 중 끊겨 주 DB에서 다시 실행, 없으면 연결 단계에서 주 DB로
+    check("레플리카 중지 (첫 요청)", routed_to(seq), 'replica+failover', 'unavailable')
+    check("레플리카 중지 (장애 표시 후)", routed_to(seq), 'unavailable')
+finally:
+    subprocess.run(COMPOSE + ['start', 'postgres-replica'], check=True)
+time.sleep(5)
+check("레플리카 재시작 후", routed_to(seq), 'replica')
+print(get_replica_router().stats())
+EOF
+
+echo "🎉 레플리카 라우팅 확인 완료 (정리: $COMPOSE down -v)"
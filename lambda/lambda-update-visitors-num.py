@@ -67,53 +67,26 @@ def parse_datetime(str_datetime):
     except (ValueError, TypeError):
         return None
 
-def create_history_tables_if_not_exists(conn):
+def check_schema_version(conn):
     """
-    방문자수 히스토리 테이블 생성
+    DB 스키마 확인 (테이블/인덱스/알림 함수는 backend의 app.migrations에서 관리)
+    마이그레이션은 순서대로 적용되므로, 이 Lambda가 쓰는 마지막 객체인 알림 함수가 있으면 나머지도 있다.
     """
     cursor = conn.cursor()
-    
-    # 충전기별 30분간격 방문자수 히스토리 테이블
-    create_chargers_history_table = """
-    CREATE TABLE IF NOT EXISTS history_chargers (
-        id SERIAL PRIMARY KEY,
-        stat_id VARCHAR(50) NOT NULL,
-        chger_id VARCHAR(50) NOT NULL,
-        visit_num INTEGER DEFAULT 0,
-        cur_stat VARCHAR(2),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        UNIQUE (stat_id, chger_id, updated_at)
-    );
+    try:
+        cursor.execute("SELECT to_regprocedure('notify_station_data(text)') IS NOT NULL")
+        ready = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    if not ready:
+        raise RuntimeError("DB 스키마가 오래되었습니다 (notify_station_data 함수 없음): backend에서 'python -m app.migrations'를 먼저 실행하세요")
+
+def notify_data_change(cursor, source):
     """
-    
-    # 충전소별 30분간격 방문자수 히스토리 테이블
-    create_stations_history_table = """
-    CREATE TABLE IF NOT EXISTS history_stations (
-        id SERIAL PRIMARY KEY,
-        stat_id VARCHAR(50),
-        charger_count INTEGER DEFAULT 0,
-        visit_num INTEGER DEFAULT 0,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        UNIQUE (stat_id, updated_at)
-    );
+    API 서버에 데이터 변경 알림 (트랜잭션 안에서 호출하면 커밋될 때 전달되고 롤백되면 버려짐)
+    채널 이름과 알림 내용은 DB 함수(backend의 마이그레이션 4)에서 정함
     """
-    
-    # 인덱스 생성
-    create_indexes = [
-        "CREATE INDEX IF NOT EXISTS idx_history_chargers_stat_chger ON history_chargers(stat_id, chger_id);",
-        "CREATE INDEX IF NOT EXISTS idx_history_stations_stat ON history_stations(stat_id);"
-    ]
-    
-    cursor.execute(create_chargers_history_table)
-    cursor.execute(create_stations_history_table)
-    
-    for index_sql in create_indexes:
-        cursor.execute(index_sql)
-    
-    conn.commit()
-    cursor.close()
+    cursor.execute("SELECT notify_station_data(%s)", (source,))
 
 def update_visit_num(conn):
     """
@@ -123,7 +96,7 @@ def update_visit_num(conn):
     timestamp = datetime.now().replace(second=0, microsecond=0)  
     logger.info(f"현재 시각: {timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
     
-    create_history_tables_if_not_exists(conn)
+    check_schema_version(conn)
     
     cursor = conn.cursor()
     
@@ -212,6 +185,7 @@ def update_visit_num(conn):
                 updated_at = CURRENT_TIMESTAMP
         """)
         
+        notify_data_change(cursor, 'visitors')
         conn.commit()
         
         # 결과 확인
@@ -251,9 +225,34 @@ def remove_history_over_30_days(conn):
         cursor.execute("DELETE FROM history_stations WHERE updated_at < %s", (thirty_days_ago,))
         station_deleted = cursor.rowcount
         
+        # 30분이 지난 출발 시각 정리 (새 출발이 등록되지 않는 충전소의 배열이 계속 남지 않도록)
+        # 변경분(/api/stations/changes)을 받는 클라이언트도 알 수 있게 변경 이력에 남김
+        cursor.execute("""
+            WITH pruned AS (
+                UPDATE demand_info
+                SET departs_in_30m = ARRAY(
+                    SELECT dep FROM unnest(departs_in_30m) AS dep
+                    WHERE dep >= (NOW() AT TIME ZONE 'UTC') - INTERVAL '30 minutes'
+                    ORDER BY dep
+                ),
+                updated_at = CURRENT_TIMESTAMP
+                WHERE cardinality(departs_in_30m) > 0
+                  AND EXISTS (
+                      SELECT 1 FROM unnest(departs_in_30m) AS dep
+                      WHERE dep < (NOW() AT TIME ZONE 'UTC') - INTERVAL '30 minutes'
+                  )
+                RETURNING stat_id
+            )
+            INSERT INTO station_changes (stat_id, change_type)
+            SELECT stat_id, 'demand' FROM pruned
+        """)
+        departs_pruned = cursor.rowcount
+        
+        notify_data_change(cursor, 'visitors')
         conn.commit()
         logger.info(f"30일 이전 데이터 삭제 완료!")
         logger.info(f"삭제된 데이터: 충전기 히스토리 {charger_deleted}개, 충전소 히스토리 {station_deleted}개")
+        logger.info(f"만료된 출발 시각 정리: 충전소 {departs_pruned}개")
         return True
         
     except Exception as e:
@@ -108,87 +108,26 @@ def get_ev_charger_info(page):
         logger.error(f"페이지 {page} 데이터 처리 실패: {str(e)}")
         return []
 
-def create_tables_if_not_exists(conn):
+def check_schema_version(conn):
     """
-    필요한 테이블들을 생성
+    DB 스키마 확인 (테이블/인덱스/알림 함수는 backend의 app.migrations에서 관리)
+    마이그레이션은 순서대로 적용되므로, 이 Lambda가 쓰는 마지막 객체인 알림 함수가 있으면 나머지도 있다.
     """
     cursor = conn.cursor()
-    
-    create_chargers_table = """
-    CREATE TABLE IF NOT EXISTS chargers (
-        id SERIAL PRIMARY KEY,
-        stat_id VARCHAR(50) NOT NULL,
-        chger_id VARCHAR(50) NOT NULL,
-        stat_nm VARCHAR(200),
-        addr TEXT,
-        location TEXT,
-        use_time TEXT,
-        lat DECIMAL(10, 8),
-        lng DECIMAL(11, 8),
-        chger_type VARCHAR(10),
-        stat VARCHAR(2),
-        stat_upd_dt VARCHAR(20),
-        last_tsdt VARCHAR(20),
-        last_tedt VARCHAR(20),
-        now_tsdt VARCHAR(20),
-        output INT,
-        method VARCHAR(10),
-        del_yn VARCHAR(1),
-        del_detail VARCHAR(200),
-        busi_id VARCHAR(50),
-        bnm VARCHAR(200),
-        busi_nm VARCHAR(200),
-        busi_call VARCHAR(20),
-        zcode VARCHAR(10),
-        zscode VARCHAR(10),
-        kind VARCHAR(50),
-        kind_detail VARCHAR(100),
-        parking_free VARCHAR(1),
-        note TEXT,
-        limit_yn VARCHAR(1),
-        limit_detail TEXT,
-        traffic_yn VARCHAR(1),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        UNIQUE(stat_id, chger_id)
-    );
+    try:
+        cursor.execute("SELECT to_regprocedure('notify_station_data(text)') IS NOT NULL")
+        ready = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    if not ready:
+        raise RuntimeError("DB 스키마가 오래되었습니다 (notify_station_data 함수 없음): backend에서 'python -m app.migrations'를 먼저 실행하세요")
+
+def notify_data_change(cursor, source):
     """
-    
-    create_grouped_chargers_table = """
-    CREATE TABLE IF NOT EXISTS grouped_chargers (
-        stat_id VARCHAR(50) PRIMARY KEY,
-        stat_nm VARCHAR(200),
-        addr TEXT,
-        location TEXT,
-        use_time TEXT,
-        lat DECIMAL(10, 8),
-        lng DECIMAL(11, 8),
-        total_chargers INTEGER DEFAULT 0,
-        usable_chargers INTEGER DEFAULT 0,
-        using_chargers INTEGER DEFAULT 0,
-        charger_types TEXT[],
-        max_output INTEGER DEFAULT 0,
-        busi_id VARCHAR(50),
-        bnm VARCHAR(200),
-        busi_nm VARCHAR(200),
-        busi_call VARCHAR(20),
-        zcode VARCHAR(10),
-        zscode VARCHAR(10),
-        kind VARCHAR(50),
-        kind_detail VARCHAR(100),
-        parking_free VARCHAR(1),
-        note TEXT,
-        limit_yn VARCHAR(1),
-        limit_detail TEXT,
-        traffic_yn VARCHAR(1),
-        last_update_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
+    API 서버에 데이터 변경 알림 (트랜잭션 안에서 호출하면 커밋될 때 전달되고 롤백되면 버려짐)
+    채널 이름과 알림 내용은 DB 함수(backend의 마이그레이션 4)에서 정함
     """
-    
-    cursor.execute(create_chargers_table)
-    cursor.execute(create_grouped_chargers_table)
-    conn.commit()
-    cursor.close()
+    cursor.execute("SELECT notify_station_data(%s)", (source,))
 
 def update_chargers(conn):
     """
@@ -196,7 +135,7 @@ def update_chargers(conn):
     """
     logger.info('충전소 데이터 수집 시작...')
     
-    create_tables_if_not_exists(conn)
+    check_schema_version(conn)
     
     all_chargers = []
     for page in [1, 2]:
@@ -211,6 +150,14 @@ def update_chargers(conn):
     cursor = conn.cursor()
     
     try:
+        # 변경분 계산을 위해 이전 그룹 데이터 보관 (트랜잭션 종료 시 삭제)
+        cursor.execute("""
+            CREATE TEMP TABLE prev_grouped_chargers ON COMMIT DROP AS
+            SELECT stat_id, stat_nm, lat, lng, use_time, total_chargers, usable_chargers,
+                   using_chargers, charger_types, max_output, parking_free
+            FROM grouped_chargers
+        """)
+        
         cursor.execute("DELETE FROM chargers")
         cursor.execute("DELETE FROM grouped_chargers")
         
@@ -311,11 +258,35 @@ def update_chargers(conn):
         
         cursor.execute(grouped_query)
         
+        # 새로 생겼거나 상태가 바뀐 충전소, 사라진 충전소를 변경 이력에 기록
+        changes_query = """
+        INSERT INTO station_changes (stat_id, change_type)
+        SELECT gc.stat_id, 'status'
+        FROM grouped_chargers gc
+        LEFT JOIN prev_grouped_chargers prev ON prev.stat_id = gc.stat_id
+        WHERE prev.stat_id IS NULL
+           OR (gc.stat_nm, gc.lat, gc.lng, gc.use_time, gc.total_chargers, gc.usable_chargers,
+               gc.using_chargers, gc.charger_types, gc.max_output, gc.parking_free)
+              IS DISTINCT FROM
+              (prev.stat_nm, prev.lat, prev.lng, prev.use_time, prev.total_chargers, prev.usable_chargers,
+               prev.using_chargers, prev.charger_types, prev.max_output, prev.parking_free)
+        UNION ALL
+        SELECT prev.stat_id, 'removed'
+        FROM prev_grouped_chargers prev
+        WHERE NOT EXISTS (SELECT 1 FROM grouped_chargers gc WHERE gc.stat_id = prev.stat_id)
+        """
+        cursor.execute(changes_query)
+        changed_count = cursor.rowcount
+        
+        # 하루가 지난 변경 이력 정리
+        cursor.execute("DELETE FROM station_changes WHERE created_at < CURRENT_TIMESTAMP - INTERVAL '1 day'")
+        
         cursor.execute("SELECT COUNT(*) FROM grouped_chargers")
         grouped_count = cursor.fetchone()[0]
         
+        notify_data_change(cursor, 'chargers')
         conn.commit()
-        logger.info(f'성공적으로 {len(all_chargers)}개 충전소, {grouped_count}개 그룹 데이터 업데이트 완료!')
+        logger.info(f'성공적으로 {len(all_chargers)}개 충전소, {grouped_count}개 그룹 데이터 업데이트 완료! (변경 {changed_count}개)')
         return True
         
     except Exception as e: